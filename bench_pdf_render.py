@@ -0,0 +1,98 @@
+import sys
+import os
+import time
+import argparse
+import statistics
+import tempfile
+import multiprocessing
+
+# Add src to path
+sys.path.append(os.getcwd())
+
+from src.services.report.pdf_service import PDFService
+from src.services.report.pdf_worker import PDFRenderWorker
+
+# Render-time benchmark: cold path (fresh process: import WeasyPrint + parse CSS + load fonts + render)
+# vs the warm PDFRenderWorker (one start-up, then render jobs only), single pass and per-section.
+#   python bench_pdf_render.py --runs 5 --sections 6
+
+
+def sample_results(sections):
+    card = (
+        '<div class="card"><div class="item-title"><span class="icon">📰</span> TIÊU ĐỀ MỤC</div>'
+        '<div class="item-content"><div class="sub-label"><b>📉 Dữ liệu:</b></div>'
+        '<div>VN-Index <b>tăng 1,2%</b> lên <b>1.284,5 điểm</b>; khối ngoại bán ròng <b>512 tỷ</b>.</div></div>'
+        '<div class="item-content action-highlight"><ul><li>[ ] Hành động 1</li><li>[ ] Hành động 2</li></ul></div>'
+        '</div>'
+    )
+    table = "<table>" + "".join(f"<tr><td>Mã {i}</td><td>{i * 1.5:.2f}</td><td>+{i % 7}%</td></tr>" for i in range(20)) + "</table>"
+    names = ["weather", "calendar", "finance", "news", "trends", "tech"]
+    return [{"category": names[i % len(names)], "content": card * 4 + table} for i in range(sections)]
+
+
+def _cold_render(html_body, pdf_path):
+    """Runs in a fresh process, like one daily run today."""
+    started = time.monotonic()
+    from src.services.report.pdf_service import PDFService as Service
+    Service.render_pdf(html_body, Service.build_css(Service._ensure_font()), pdf_path)
+    return time.monotonic() - started
+
+
+def bench_cold(html_body, out_dir, runs):
+    ctx = multiprocessing.get_context("spawn")
+    times = []
+    for i in range(runs):
+        with ctx.Pool(1) as pool:
+            times.append(pool.apply(_cold_render, (html_body, os.path.join(out_dir, f"cold_{i}.pdf"))))
+    return times
+
+
+def bench_warm(html_body, out_dir, runs, results=None):
+    worker = PDFRenderWorker()
+    started = time.monotonic()
+    if not worker.wait_ready():  # Start-up: import + stylesheet + fonts
+        raise RuntimeError("PDF worker unavailable (PDF_RENDER_WORKER=0 or WeasyPrint failed to load)")
+    startup = time.monotonic() - started
+    times = []
+    try:
+        for i in range(runs):
+            t0 = time.monotonic()
+            if results is not None:
+                # Per-section layout in parallel + pypdf merge
+                ok = PDFService._render_sections(results, {}, os.path.join(out_dir, f"sections_{i}.pdf"), worker)
+            else:
+                ok = worker.render(html_body, os.path.join(out_dir, f"warm_{i}.pdf"))
+            if not ok:
+                raise RuntimeError("warm render failed")
+            times.append(time.monotonic() - t0)
+    finally:
+        worker.shutdown()
+    return startup, times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF render benchmark: cold path vs warm worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--sections", type=int, default=6)
+    args = parser.parse_args()
+
+    results = sample_results(args.sections)
+    html_body, _ = PDFService.build_html(results)
+    print(f"📄 Report: {args.sections} sections, {len(html_body) / 1024:.0f} KB HTML, {args.runs} runs each")
+
+    with tempfile.TemporaryDirectory(prefix="bench_pdf_") as out_dir:
+        cold = bench_cold(html_body, out_dir, args.runs)
+        startup, warm = bench_warm(html_body, out_dir, args.runs)
+        _, sections = bench_warm(html_body, out_dir, args.runs, results=results)
+
+    print("\n--- RESULTS (seconds) ---")
+    print(f"🧊 Cold path   : median {statistics.median(cold):.2f} | min {min(cold):.2f} | max {max(cold):.2f}")
+    print(f"🔥 Warm worker : median {statistics.median(warm):.2f} | min {min(warm):.2f} | max {max(warm):.2f}"
+          f" (start-up {startup:.2f}, paid once while data is fetched)")
+    print(f"🧩 Per-section : median {statistics.median(sections):.2f} | min {min(sections):.2f} | max {max(sections):.2f}"
+          f" (parallel layout + merge)")
+    print(f"⚡ Speed-up per render: x{statistics.median(cold) / max(statistics.median(warm), 1e-9):.1f}")
+
+
+if __name__ == "__main__":
+    main()
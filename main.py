@@ -11,6 +11,9 @@ from supabase import create_client
 # --- PROJECT IMPORTS ---
 from src.config import Config
 from src.orchestrator import Orchestrator, CategoryAgent
+from src.pipeline import Pipeline
+from src.compaction import PromptCompactor
+from src.services.http_client import HttpClient
 from src.services.finance.crypto_service import CryptoService
 from src.services.finance.market_service import MarketService
 from src.services.finance.banking_service import BankingService
@@ -18,45 +21,30 @@ from src.services.stock.stock_service import StockService
 from src.services.social.news_service import NewsService
 from src.services.weather.weather_service import WeatherService
 from src.services.subscription_service import SubscriptionService
+from src.services.delivery_service import DeliveryService
 from src.services.calendar.lunar_service import LunarService
+from src.services.report.chart_renderer import ChartRenderer
+from src.services.report.pdf_worker import PDFRenderWorker
+from src.services.report.artifact_store import ArtifactStore
 
 # --- HELPER FUNCTIONS ---
 
 def get_safe_data(service_res):
-    """Safely extracts text and chart_path from service response to avoid crashes."""
+    """Safely extracts text and chart specs from service response to avoid crashes."""
     if isinstance(service_res, dict):
-        return service_res.get("text", "Dữ liệu không khả dụng"), service_res.get("chart_path", None)
-    return str(service_res), None
+        return service_res.get("text", "Dữ liệu không khả dụng"), service_res.get("charts") or []
+    return str(service_res), []
 
-async def send_smart_chunked_message(bot, chat_id, text, parse_mode='Markdown'):
-    """Splits long messages and handles Markdown errors gracefully."""
-    max_length = 4096
-    
-    # Split text into chunks
-    chunks = [text[i:i+max_length] for i in range(0, len(text), max_length)]
-
-    for chunk in chunks:
-        try:
-            # Try sending with formatted mode (Markdown/HTML)
-            await bot.send_message(chat_id=chat_id, text=chunk, parse_mode=parse_mode)
-        except Exception as e:
-            print(f"⚠️ Formatting Error ({parse_mode}): {e}. Sending plain text fallback.")
-            try:
-                # Fallback: Send without formatting
-                await bot.send_message(chat_id=chat_id, text=chunk)
-            except Exception as e_plain:
-                 print(f"❌ Failed to send message chunk: {e_plain}")
-
-async def send_event_notifications(bot, chat_id, upcoming_holidays):
-    """Send a prominent Telegram message with upcoming lunar holidays."""
+def format_event_notifications(upcoming_holidays):
+    """Telegram message (Markdown) for lunar holidays within the next 7 days, or None."""
     if not upcoming_holidays:
-        return
+        return None
     
     # Filter for holidays within the next 7 days
     near_holidays = [h for h in upcoming_holidays if h.get('days_until', 0) <= 7]
     
     if not near_holidays:
-        return
+        return None
 
     # Format holidays message
     event_msg = "🔔 *SỰ KIỆN SẮP TỚI:*\n\n"
@@ -67,16 +55,7 @@ async def send_event_notifications(bot, chat_id, upcoming_holidays):
         date = holiday.get('date', '')
         days_text = f"Còn {days} ngày" if days > 0 else "Hôm nay"
         event_msg += f"• *{name}* - {days_text} ({date})\n"
-    
-    try:
-        await bot.send_message(
-            chat_id=chat_id,
-            text=event_msg,
-            parse_mode='Markdown'
-        )
-        print("✅ Lunar holiday notifications sent!")
-    except Exception as e:
-        print(f"⚠️ Failed to send holiday notifications: {e}")
+    return event_msg
 
 async def save_reminders(alerts):
     """Saves alerts to Supabase, correcting for Timezone and Reminder Logic."""
@@ -121,6 +100,15 @@ async def save_reminders(alerts):
         except Exception as e:
             print(f"❌ Failed to save reminder '{alert.get('title', 'Unknown')}': {e}")
 
+def fetch_upcoming_bills():
+    """Upcoming bills from the Supabase CRM (appended to the finance input), or None."""
+    if not (Config.SUPABASE_URL and Config.SUPABASE_KEY and Config.TELEGRAM_CHAT_ID):
+        return None
+    if Config.DELIVERY_FROM_PROFILES:
+        return None  # Personal bills stay out of a report shared with other recipients
+    supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+    return SubscriptionService(supabase).get_upcoming_bills(Config.TELEGRAM_CHAT_ID)
+
 # --- MAIN FLOW ---
 
 async def main():
@@ -130,6 +118,9 @@ async def main():
         return
 
     bot = Bot(token=Config.TELEGRAM_BOT_TOKEN)
+    artifacts = ArtifactStore()  # Report PDFs by content hash -> Telegram file_id (one upload per report)
+    supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY) if Config.SUPABASE_URL and Config.SUPABASE_KEY else None
+    delivery = DeliveryService(bot, supabase=supabase, artifacts=artifacts)
     orchestrator = Orchestrator(bot)
     
     # Load Base Prompt
@@ -173,97 +164,125 @@ async def main():
             else:
                  print(f"⚠️ Specific prompt missing for {name}, using base only.")
 
-            full_prompt = f"{base_prompt}\n\n{specific_prompt}"
-            orchestrator.add_agent(CategoryAgent(name, api_key, full_prompt))
+            # base_prompt is the shared prefix (cached once per key via Gemini context caching)
+            orchestrator.add_agent(CategoryAgent(name, api_key, specific_prompt, shared_prefix=base_prompt))
         else:
             print(f"⚠️ No API Key for agent: {name}")
 
-    # 3. Fetch Data (Safe Mode)
+    # 3-5. Dataflow pipeline: every node starts as soon as its inputs are ready
+    # (the weather agent no longer waits for stock histories, charts render while agents run, ...)
     print("⏳ Fetching real-time data...")
 
-    # Fetching with safe extraction
-    # Fetching with safe extraction
-    weather_text, weather_chart = get_safe_data(WeatherService.fetch_weather())
-    
-    # Market now returns Dict with chart_path as LIST
-    market_text, market_charts = get_safe_data(MarketService.fetch_market())
-    
-    banking_text, banking_chart = get_safe_data(BankingService.fetch_banking_rates())
-    stock_text, stock_charts = get_safe_data(StockService.fetch_stock_analysis())
-    crypto_text = str(CryptoService.fetch_crypto())
-    
-    # News & Trends
-    news_text = NewsService.fetch_news("general")
-    featured_news = NewsService.fetch_news("featured")
-    business_news = NewsService.fetch_news("business")
-    tech_news = NewsService.fetch_news("tech")
-    trends_text, trends_chart = get_safe_data(NewsService.fetch_trends())
-    
-    # Calendar Data
-    calendar_text = str(LunarService.get_date_info())
-    upcoming_holidays = LunarService.get_upcoming_holidays()  # Get upcoming lunar holidays
-
-    # Compile Data Map
-    data_map = {
-        "finance": (
-            f"--- [MARKET OVERVIEW] ---\n{market_text}\n"
-            f"--- [STOCK WATCHLIST] ---\n{stock_text}\n"
-            f"--- [BANKING] ---\n{banking_text}\n"
-            f"--- [CRYPTO] ---\n{crypto_text}\n"
-            f"--- [MACRO & POLITICS] ---\n{news_text}\n"
-            f"--- [BUSINESS NEWS] ---\n{business_news}"
-        ),
-        "weather": weather_text,
-        "events": "Họp đối tác lúc 10:30, Deadline báo cáo quý lúc 17:00.",
-        "tech": tech_news,
-        "news": f"{news_text}\n\n--- [TIN NỔI BẬT] ---\n{featured_news}",
-        "trends": trends_text,
-        "calendar": calendar_text,
-        # Hidden fields for internal use/charts
-        "weather_chart": weather_chart,
-        "trends_chart": trends_chart,
-        "finance_market_charts": market_charts,
-        "finance_banking_chart": banking_chart,
-        "finance_stock_charts": stock_charts
-    }
+    # Chart and PDF workers start up while data is being fetched
+    renderer = ChartRenderer()
+    renderer.warm_up()
+    pdf_worker = PDFRenderWorker()
+    pdf_worker.warm_up()
 
-    # --- LOGGING DATA LOADED ---
-    print("\n📊 --- DATA LOAD STATUS ---")
-    for k, v in data_map.items():
-        if isinstance(v, str):
-            print(f"✅ Loaded [{k}]: {len(v)} chars")
-        elif isinstance(v, list):
-             print(f"✅ Loaded [{k}]: {len(v)} items")
-    print("----------------------------------\n")
-
-    # Fetch Supabase CRM Data
-    if Config.SUPABASE_URL and Config.SUPABASE_KEY and Config.TELEGRAM_CHAT_ID:
-        try:
-             supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
-             sub_service = SubscriptionService(supabase)
-             bills_data = sub_service.get_upcoming_bills(Config.TELEGRAM_CHAT_ID)
-             
-             # Append bills to finance section
-             data_map["finance"] += f"\n\n--- [PERSONAL FINANCE] ---\n{bills_data}"
-        except Exception as e:
-             print(f"⚠️ CRM Data fetch failed: {e}")
-
-    # 4. AI Analysis
     vn_tz = pytz.timezone('Asia/Ho_Chi_Minh')
     now_str_short = datetime.now(vn_tz).strftime('%d/%m/%Y')
     user_context = f"User Context: General User interested in Finance, Tech, and Trends.\nTODAY'S DATE: {now_str_short}"
+    compactor = PromptCompactor() if Config.PROMPT_COMPACTION_ENABLED else None
+    orchestrator.alerts = []
+
+    pipeline = Pipeline()
+    fetch = dict(timeout=Config.DATA_FETCH_DEADLINE)
+
+    # Sources
+    pipeline.add("weather", WeatherService.fetch_weather, default="Lỗi lấy thời tiết (quá thời gian chờ).", **fetch)
+    pipeline.add("market", MarketService.fetch_market_async, default="Dữ liệu thị trường không khả dụng.", **fetch)
+    pipeline.add("banking", BankingService.fetch_banking_rates, default="Dữ liệu ngân hàng không khả dụng.", **fetch)
+    pipeline.add("stock", StockService.fetch_stock_analysis, default="Dữ liệu cổ phiếu không khả dụng.", **fetch)
+    pipeline.add("crypto", CryptoService.fetch_crypto, default="Không lấy được dữ liệu Crypto.", **fetch)
+    pipeline.add("news", NewsService.fetch_news, "general", default="Không lấy được tin tức.", **fetch)
+    pipeline.add("featured_news", NewsService.fetch_news, "featured", default="Không lấy được tin tức.", **fetch)
+    pipeline.add("business_news", NewsService.fetch_news, "business", default="Không lấy được tin tức.", **fetch)
+    pipeline.add("tech_news", NewsService.fetch_news, "tech", default="Không lấy được tin tức.", **fetch)
+    pipeline.add("trends", NewsService.fetch_trends, default={"text": "Không lấy được Google Trends.", "charts": []}, **fetch)
+    pipeline.add("calendar", LunarService.get_date_info, default={}, **fetch)
+    pipeline.add("holidays", LunarService.get_upcoming_holidays, default=[], **fetch)
+    pipeline.add("bills", fetch_upcoming_bills, default=None, **fetch)
+
+    # Category inputs (compacted to their token budget)
+    def category_input(category, build):
+        def node(*values):
+            text = build(*values)
+            if compactor:
+                text = compactor.compact_one(category, text)
+            print(f"✅ Loaded [{category}]: {len(text)} chars")
+            return text
+        return node
+
+    def finance_text(market, stock, banking, crypto, news, business_news, bills):
+        text = (
+            f"--- [MARKET OVERVIEW] ---\n{get_safe_data(market)[0]}\n"
+            f"--- [STOCK WATCHLIST] ---\n{get_safe_data(stock)[0]}\n"
+            f"--- [BANKING] ---\n{get_safe_data(banking)[0]}\n"
+            f"--- [CRYPTO] ---\n{crypto}\n"
+            f"--- [MACRO & POLITICS] ---\n{news}\n"
+            f"--- [BUSINESS NEWS] ---\n{business_news}"
+        )
+        if bills:
+            text += f"\n\n--- [PERSONAL FINANCE] ---\n{bills}"
+        return text
+
+    inputs = {
+        "finance": (finance_text, ["market", "stock", "banking", "crypto", "news", "business_news", "bills"]),
+        "weather": (lambda weather: get_safe_data(weather)[0], ["weather"]),
+        "tech": (str, ["tech_news"]),
+        "news": (lambda news, featured: f"{news}\n\n--- [TIN NỔI BẬT] ---\n{featured}", ["news", "featured_news"]),
+        "trends": (lambda trends: get_safe_data(trends)[0], ["trends"]),
+        "calendar": (str, ["calendar"]),
+    }
+    for category, (build, deps) in inputs.items():
+        pipeline.add(f"input:{category}", category_input(category, build), deps=deps, default="Không có dữ liệu mới.")
+
+    # Charts render in worker processes while the AI agents run
+    async def render_charts(*sources):
+        charts = [chart for source in sources for chart in get_safe_data(source)[1]]
+        return await renderer.resolve(renderer.submit_all(charts))
+
+    chart_sources = {"weather": ["weather"], "trends": ["trends"], "finance": ["market", "banking", "stock"]}
+    for category, deps in chart_sources.items():
+        pipeline.add(f"charts:{category}", render_charts, deps=deps, default=[])
+
+    # Agents -> sections (agent output + its charts)
     print("🚀 AI Analysis in progress...")
-    
-    try:
-        results = await orchestrator.run_all(user_context, data_map)
-    except Exception as e:
-        print(f"❌ Orchestrator Error: {e}")
-        return
 
-    # 5. Send Report
-    if Config.TELEGRAM_CHAT_ID:
+    # Agents run in request groups: small categories may be packed into one request (Config.GEMINI_PACK_CATEGORIES)
+    def group_node(group):
+        async def node(*texts):
+            return await orchestrator.run_group(group, user_context, {agent.name: text for agent, text in zip(group, texts)})
+        return node
+
+    def section(index):
+        def node(results, charts=None):
+            return {**results[index], "charts": charts or []}
+        return node
+
+    for group in orchestrator.groups():
+        names = [agent.name for agent in group]
+        group_node_name = f"agent:{'+'.join(names)}"
+        pipeline.add(group_node_name, group_node(group), deps=[f"input:{name}" for name in names],
+                     default=[{"category": name, "content": f"⚠️ {name}: Lỗi xử lý."} for name in names])
+        for index, name in enumerate(names):
+            chart_dep = [f"charts:{name}"] if name in chart_sources else []
+            pipeline.add(f"section:{name}", section(index), deps=[group_node_name, *chart_dep])
+    section_nodes = [f"section:{agent.name}" for agent in orchestrator.agents]
+
+    # Report + delivery
+    def build_report(*sections):
+        print("📄 Generating PDF Report...")
+        from src.services.report.pdf_service import PDFService
+        from src.services.report.image_optimizer import ImageOptimizer
+        results = [s for s in sections if s]
+        chart_map, duplicates = ImageOptimizer.dedupe({s["category"]: s["charts"] for s in results if s["charts"]})
+        ImageOptimizer.report(chart_map, duplicates)
+        return PDFService.generate_report(results, chart_map, worker=pdf_worker)
+
+    async def deliver(pdf_path, upcoming_holidays, *sections):
+        results = [s for s in sections if s]
         # Header
-        vn_tz = pytz.timezone('Asia/Ho_Chi_Minh')
         now_str = datetime.now(vn_tz).strftime('%d/%m/%Y %H:%M')
         header = (
             "━━━━━━━━━━━━━━━━━━━━━━━━\n"
@@ -271,55 +290,38 @@ async def main():
             f"📅 _Cập nhật lúc: {now_str}_\n"
             "━━━━━━━━━━━━━━━━━━━━━━━━"
         )
-        await bot.send_message(chat_id=Config.TELEGRAM_CHAT_ID, text=header, parse_mode='Markdown')
-
-        # Prepare Data for PDF
-        # Aggregate Finance Charts
-        finance_charts = []
-        m_charts = data_map.get("finance_market_charts")
-        if m_charts:
-            if isinstance(m_charts, list): finance_charts.extend(m_charts)
-            else: finance_charts.append(m_charts)
-        
-        b_chart = data_map.get("finance_banking_chart")
-        if b_chart:
-            finance_charts.append(b_chart)
-            
-        s_charts = data_map.get("finance_stock_charts")
-        if s_charts:
-            if isinstance(s_charts, list): finance_charts.extend(s_charts)
-            else: finance_charts.append(s_charts)
-
-        chart_source_map = {
-            "weather": data_map["weather_chart"],
-            "trends": data_map["trends_chart"],
-            "finance": finance_charts
-        }
-
-        # Generate PDF
-        print("📄 Generating PDF Report...")
-        from src.services.report.pdf_service import PDFService
-        pdf_path = PDFService.generate_report(results, chart_source_map)
+        messages = [{"kind": "header", "text": header, "parse_mode": "Markdown"}]
 
         if pdf_path and os.path.exists(pdf_path):
-            await bot.send_document(
-                chat_id=Config.TELEGRAM_CHAT_ID,
-                document=open(pdf_path, 'rb'),
-                caption=f"📄 Bản tin Chiến lược Ngày {now_str}",
-                parse_mode='HTML'
-            )
-            print("✅ PDF Report sent successfully!")
-            
-            # Send lunar holiday notifications
-            await send_event_notifications(bot, Config.TELEGRAM_CHAT_ID, upcoming_holidays)
+            messages.append({"kind": "report", "document": pdf_path, "caption": f"📄 Bản tin Chiến lược Ngày {now_str}", "parse_mode": "HTML"})
+            # Lunar holiday notifications
+            event_msg = format_event_notifications(upcoming_holidays)
+            if event_msg:
+                messages.append({"kind": "holidays", "text": event_msg, "parse_mode": "Markdown"})
         else:
             print("❌ Failed to generate PDF. Sending fallback text.")
-            # Fallback: Send raw text if PDF fails
-            full_report = "\n\n".join([r["content"] for r in results])
-            await send_smart_chunked_message(bot, Config.TELEGRAM_CHAT_ID, full_report, parse_mode='HTML')
+            # Fallback: Send raw text if PDF fails (split into 4096-char messages by DeliveryService)
+            messages.append({"kind": "report_text", "text": "\n\n".join([r["content"] for r in results]), "parse_mode": "HTML"})
+
+        # Every recipient gets the same sequence; chats run in parallel within Telegram's rate limits
+        await delivery.deliver(messages, recipients, run_id=os.getenv("GITHUB_RUN_ID"))
 
+    recipients = delivery.recipients()
+    if recipients:
+        print(f"📬 Recipients: {len(recipients)}")
+        pipeline.add("report", build_report, deps=section_nodes)
+        pipeline.add("deliver", deliver, deps=["report", "holidays", *section_nodes])
     else:
-        print("⚠️ No TELEGRAM_CHAT_ID found. Report generated but not sent.")
+        print("⚠️ No TELEGRAM_CHAT_ID or recipients found. Report generated but not sent.")
+
+    try:
+        outputs = await pipeline.run()
+    except Exception as e:
+        print(f"❌ Pipeline Error: {e}")
+        renderer.shutdown()
+        pdf_worker.shutdown()
+        return
+    pdf_path = outputs.get("report")
 
     # 6. Save Reminders (Alerts found by AI)
     if orchestrator.alerts:
@@ -329,10 +331,16 @@ async def main():
     print("✅ Process Completed!")
 
     # 7. Cleanup
+    renderer.shutdown()
+    pdf_worker.shutdown()
+    HttpClient.close()
+    await HttpClient.aclose()
+    await orchestrator.aclose()
+    await CategoryAgent.aclose_clients()
     try:
-        if os.path.exists("output"):
-            shutil.rmtree("output")
-            print("🧹 Cleaned up 'output' folder.")
+        if pdf_path and os.path.exists(pdf_path):
+            shutil.rmtree(os.path.dirname(pdf_path))
+            print("🧹 Cleaned up report folder.")
     except Exception as e:
         print(f"⚠️ Cleanup Error: {e}")
 
@@ -0,0 +1,22 @@
+-- Recipients of the daily report: profiles with daily_report = true (Config.DELIVERY_FROM_PROFILES=1)
+-- Opt-in: existing and new profiles do not receive the report until they are enabled explicitly
+ALTER TABLE profiles ADD COLUMN IF NOT EXISTS daily_report BOOLEAN DEFAULT FALSE;
+
+-- Opt in the chat that already receives the report (TELEGRAM_CHAT_ID), then others one by one:
+-- UPDATE profiles SET daily_report = TRUE WHERE telegram_id = 'YOUR_ID';
+
+-- Delivery status per recipient and run
+CREATE TABLE deliveries (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    run_id TEXT NOT NULL, -- e.g. GitHub run id or "20261018-060000"
+    profile_id UUID REFERENCES profiles(id) ON DELETE CASCADE, -- NULL for TELEGRAM_CHAT_ID without a profile
+    chat_id TEXT NOT NULL,
+    status TEXT NOT NULL, -- sent, partial, failed, blocked
+    messages_sent INTEGER DEFAULT 0,
+    attempts INTEGER DEFAULT 0,
+    error TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX idx_deliveries_run_id ON deliveries (run_id);
+CREATE INDEX idx_deliveries_chat_id ON deliveries (chat_id, created_at);
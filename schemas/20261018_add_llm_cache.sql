@@ -0,0 +1,12 @@
+-- Cache of LLM agent answers (content-addressed: key = sha256 of model, config, prompts and data)
+CREATE TABLE llm_cache (
+    key TEXT PRIMARY KEY,
+    content TEXT NOT NULL,
+    model TEXT, -- e.g. "gemini-2.5-flash"
+    category TEXT, -- e.g. "finance", "weather"
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- Index for evicting expired entries
+CREATE INDEX idx_llm_cache_expires_at ON llm_cache (expires_at);
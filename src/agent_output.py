@@ -0,0 +1,120 @@
+import json
+import re
+from typing import Any, Dict, Optional
+
+# Response schema of an agent in structured mode (Config.GEMINI_STRUCTURED_OUTPUT)
+AGENT_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "html": {"type": "STRING", "description": "Toàn bộ nội dung mục, HTML thô theo mẫu."},
+        "alerts": {
+            "type": "ARRAY",
+            "description": "Nhắc nhở trong ngày (tương ứng các gợi ý /remind_).",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "title": {"type": "STRING"},
+                    "time": {"type": "STRING", "description": "Giờ nhắc, dạng HH:MM (24h)."},
+                },
+                "required": ["title", "time"],
+            },
+        },
+        "key_numbers": {
+            "type": "ARRAY",
+            "description": "Các con số quan trọng nhất của mục.",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "label": {"type": "STRING"},
+                    "value": {"type": "STRING"},
+                    "unit": {"type": "STRING"},
+                },
+                "required": ["label", "value"],
+            },
+        },
+    },
+    "required": ["html", "alerts", "key_numbers"],
+}
+
+STRUCTURED_INSTRUCTIONS = (
+    "ĐỊNH DẠNG TRẢ VỀ: một JSON object gồm `html` (toàn bộ HTML của mục, đúng mẫu ở trên), "
+    "`alerts` (danh sách nhắc nhở {title, time \"HH:MM\"} ứng với các gợi ý /remind_) và "
+    "`key_numbers` (các con số chính {label, value, unit})."
+)
+
+_TIME_RE = re.compile(r"^(\d{1,2})[:h](\d{2})$")
+
+
+def validate_agent_output(data: Any) -> Optional[Dict]:
+    """
+    Checks a decoded structured answer in one pass and normalises it to
+    {"html": str, "alerts": [{"title", "time"}], "key_numbers": [{"label", "value", "unit"}]}.
+    Returns None when the answer is unusable (caller falls back to text parsing); bad items are dropped.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("html"), str) or not data["html"].strip():
+        return None
+
+    alerts = []
+    for item in data.get("alerts") or []:
+        if not isinstance(item, dict) or not str(item.get("title", "")).strip():
+            continue
+        match = _TIME_RE.match(str(item.get("time", "")).strip())
+        if not match or int(match.group(1)) > 23 or int(match.group(2)) > 59:
+            continue
+        alerts.append({
+            "title": f"Nhắc nhở: {str(item['title']).strip()}",
+            "time": f"{int(match.group(1))}:{match.group(2)}",
+        })
+
+    key_numbers = []
+    for item in data.get("key_numbers") or []:
+        if isinstance(item, dict) and str(item.get("label", "")).strip() and item.get("value") not in (None, ""):
+            key_numbers.append({
+                "label": str(item["label"]).strip(),
+                "value": str(item["value"]).strip(),
+                "unit": str(item.get("unit") or "").strip(),
+            })
+
+    return {"html": data["html"].strip(), "alerts": alerts, "key_numbers": key_numbers}
+
+
+def _json_text(text: str) -> str:
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    return text
+
+
+def looks_structured(text: str) -> bool:
+    """True for JSON-object answers (valid or not): they must never be rendered as HTML text."""
+    return isinstance(text, str) and _json_text(text).startswith("{")
+
+
+def parse_agent_output(text: str) -> Optional[Dict]:
+    """Decodes a structured answer (JSON text); None if it is not one, e.g. an error message or plain HTML."""
+    text = _json_text(text)
+    if not text.startswith("{"):
+        return None
+    try:
+        return validate_agent_output(json.loads(text))
+    except ValueError:
+        return None
+
+
+_HTML_FIELD_RE = re.compile(r'"html"\s*:\s*"')
+
+
+def salvage_html(text: str) -> Optional[str]:
+    """
+    The `html` field of a malformed structured answer (e.g. truncated after the html, inside alerts),
+    if that string itself is complete; None otherwise.
+    """
+    text = _json_text(text)
+    match = _HTML_FIELD_RE.search(text)
+    if not match:
+        return None
+    try:
+        html, _ = json.decoder.scanstring(text, match.end())
+    except ValueError:
+        return None  # Cut off inside the html itself
+    return html.strip() or None
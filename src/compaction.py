@@ -0,0 +1,152 @@
+import json
+import re
+from typing import Dict, List, Tuple
+
+from src.config import Config
+
+WEATHER_RAW_MARKER = "--- [RAW WEATHER DATA FOR AI] ---"
+_SECTION_RE = re.compile(r"^--- \[(.+?)\] ---$", re.MULTILINE)
+_MD_LINK_RE = re.compile(r"\[([^\]]+)\]\((?:https?://)[^)]+\)")
+
+# Sections kept longest when a category is over budget (unlisted sections rank after, in text order)
+SECTION_PRIORITIES = {
+    # Tin vĩ mô / kinh doanh trùng với input của agent news -> cắt trước
+    "finance": ["MARKET OVERVIEW", "STOCK WATCHLIST", "PERSONAL FINANCE", "BANKING", "CRYPTO", "BUSINESS NEWS", "MACRO & POLITICS"],
+    "news": ["TIN NỔI BẬT"],
+}
+
+
+class PromptCompactor:
+    """
+    Shrinks each category's raw data before it reaches the agents:
+    1. a per-category reducer keeps only the fields the prompt uses (e.g. weather JSON -> compact table),
+    2. sections are trimmed from the bottom, lowest priority first, until the category fits its token budget.
+    """
+
+    def __init__(self, budgets: Dict[str, int] = None, default_budget: int = None):
+        self.budgets = budgets if budgets is not None else Config.PROMPT_TOKEN_BUDGETS
+        self.default_budget = default_budget or Config.PROMPT_TOKEN_BUDGET
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        # ~3 chars/token for Vietnamese text (same estimate as KeyScheduler)
+        return len(text) // 3
+
+    def compact(self, data_map: Dict[str, str]) -> Dict[str, str]:
+        return {category: self.compact_one(category, text) for category, text in data_map.items()}
+
+    def compact_one(self, category: str, text: str) -> str:
+        if not isinstance(text, str):
+            return text
+        before = self.count_tokens(text)
+        reducer = getattr(self, f"_reduce_{category}", None)
+        if reducer:
+            try:
+                text = reducer(text)
+            except Exception as e:
+                print(f"⚠️ Compaction reducer error ({category}): {e}")
+        text = self.fit_budget(text, self.budgets.get(category, self.default_budget), SECTION_PRIORITIES.get(category, []))
+        after = self.count_tokens(text)
+        if after < before:
+            print(f"✂️ Compacted [{category}]: ~{before:,} -> ~{after:,} tokens")
+        return text
+
+    # --- Budget ---
+
+    @staticmethod
+    def split_sections(text: str) -> List[Tuple[str, str]]:
+        """[(name, body)] in text order; text before the first '--- [NAME] ---' header has name ''."""
+        sections = []
+        matches = list(_SECTION_RE.finditer(text))
+        head = text[:matches[0].start()] if matches else text
+        if head.strip():
+            sections.append(("", head))
+        for i, m in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            sections.append((m.group(1), text[m.end():end]))
+        return sections
+
+    @staticmethod
+    def join_sections(sections: List[Tuple[str, str]]) -> str:
+        return "".join(body if not name else f"--- [{name}] ---{body}" for name, body in sections)
+
+    def fit_budget(self, text: str, budget: int, priorities: List[str]) -> str:
+        if self.count_tokens(text) <= budget:
+            return text
+        sections = self.split_sections(text)
+        listed = {name: i for i, name in enumerate(priorities)}
+        # An unlisted section (e.g. "WATCHLIST" inside "STOCK WATCHLIST") inherits the rank of the listed section above it
+        ranks, current = [], len(priorities)
+        for name, _ in sections:
+            current = listed.get(name, current)
+            ranks.append(current)
+        # Lowest priority first; within the same rank, later sections before earlier ones
+        order = sorted(range(len(sections)), key=lambda i: (ranks[i], i), reverse=True)
+
+        excess = (self.count_tokens(text) - budget) * 3
+        for i in order:
+            if excess <= 0:
+                break
+            name, body = sections[i]
+            lines = body.rstrip("\n").split("\n")
+            dropped = 0
+            while len(lines) > 1 and excess > 0:
+                excess -= len(lines.pop()) + 1
+                dropped += 1
+            if dropped:
+                sections[i] = (name, "\n".join(lines) + f"\n… (rút gọn {dropped} dòng)\n")
+        return self.join_sections(sections)
+
+    # --- Reducers (one per category, named _reduce_<category>) ---
+
+    @staticmethod
+    def _reduce_finance(text: str) -> str:
+        """The finance prompt never cites sources: news lines keep their titles, not their URLs."""
+        sections = PromptCompactor.split_sections(text)
+        news = {"MACRO & POLITICS", "BUSINESS NEWS"}
+        return PromptCompactor.join_sections([
+            (name, _MD_LINK_RE.sub(r"\1", body) if name in news else body) for name, body in sections
+        ])
+
+    @staticmethod
+    def _reduce_weather(text: str) -> str:
+        """Replaces the full worker JSON with the fields the weather prompt uses and a compact hourly table."""
+        if WEATHER_RAW_MARKER not in text:
+            return text
+        summary, raw = text.split(WEATHER_RAW_MARKER, 1)
+        weather = json.loads(raw)
+
+        curr = weather.get("current", {})
+        today = weather["forecast"]["forecastday"][0]
+        day, astro = today.get("day", {}), today.get("astro", {})
+        air = curr.get("air_quality", {})
+        compact = {
+            "location": weather.get("location", {}).get("name"),
+            "current": {
+                "condition": curr.get("condition", {}).get("text"),
+                **{k: curr.get(k) for k in ("temp_c", "feelslike_c", "humidity", "wind_kph", "wind_dir", "uv", "precip_mm")},
+                "aqi_us_epa": air.get("us-epa-index"),
+                "pm2_5": air.get("pm2_5"),
+            },
+            "today": {
+                "condition": day.get("condition", {}).get("text"),
+                **{k: day.get(k) for k in ("maxtemp_c", "mintemp_c", "daily_chance_of_rain", "totalprecip_mm", "uv")},
+                "sunrise": astro.get("sunrise"),
+                "sunset": astro.get("sunset"),
+            },
+        }
+
+        rows = ["Giờ|Trời|°C|Cảm giác|Ẩm%|Mưa%|mm|Gió km/h|UV"]
+        for h in today.get("hour", []):
+            rows.append("|".join(str(v) for v in (
+                h.get("time", "").split(" ")[-1],
+                h.get("condition", {}).get("text", ""),
+                h.get("temp_c"), h.get("feelslike_c"), h.get("humidity"),
+                h.get("chance_of_rain"), h.get("precip_mm"), h.get("wind_kph"), h.get("uv"),
+            )))
+
+        return (
+            f"{summary.rstrip()}\n{WEATHER_RAW_MARKER}\n"
+            f"{json.dumps(compact, ensure_ascii=False)}\n"
+            f"--- [HOURLY] ---\n" + "\n".join(rows)
+        )
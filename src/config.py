@@ -14,10 +14,64 @@ class Config:
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
+    # Delivery: recipients from `profiles` (plus TELEGRAM_CHAT_ID), sent through a rate-limited queue
+    DELIVERY_FROM_PROFILES = os.getenv("DELIVERY_FROM_PROFILES", "0") == "1"
+    DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "16"))  # Chats served concurrently
+    DELIVERY_MAX_RETRIES = int(os.getenv("DELIVERY_MAX_RETRIES", "3"))
+    TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "25"))  # Messages/s per bot (Telegram: ~30)
+    TELEGRAM_CHAT_INTERVAL = float(os.getenv("TELEGRAM_CHAT_INTERVAL", "1.0"))  # Seconds between messages to one chat
+    TELEGRAM_GROUP_INTERVAL = float(os.getenv("TELEGRAM_GROUP_INTERVAL", "3.0"))  # Groups: 20 messages/min
+
     # External APIs
     WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
     WEATHER_LOCATION = os.getenv("WEATHER_LOCATION", "Hanoi")
     STOCK_WATCHLIST = os.getenv("STOCK_WATCHLIST", "FPT.VN,HPG.VN,VHM.VN,VCB.VN,MBB.VN,ACB.VN,TCB.VN,VIC.VN,^VNINDEX").split(",")
+    STOCK_FETCH_CONCURRENCY = int(os.getenv("STOCK_FETCH_CONCURRENCY", "4"))
+    PRICE_STORE_PATH = os.getenv("PRICE_STORE_PATH", os.path.join(os.path.dirname(__file__), "../data/price_history.sqlite"))
+    INDICATOR_VERIFY = os.getenv("INDICATOR_VERIFY", "0") == "1"  # Check streaming indicators against a full recompute
+
+    # Data Collection (overall deadline for the concurrent fetch stage, in seconds)
+    DATA_FETCH_DEADLINE = float(os.getenv("DATA_FETCH_DEADLINE", "120"))
+    DATA_FETCH_WORKERS = int(os.getenv("DATA_FETCH_WORKERS", "16"))
+
+    # Chart rendering (process pool; 0 = render inline in the main process)
+    CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+    CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "60"))
+    CHART_FORMAT = os.getenv("CHART_FORMAT", "png")  # "png" or "svg"; charts stay in memory
+    CHART_DEBUG_DIR = os.getenv("CHART_DEBUG_DIR", "")  # If set, rendered charts are also written here
+
+    # Chart image optimization before the PDF (resample to print DPI, palette PNG, dedupe)
+    CHART_OPTIMIZE = os.getenv("CHART_OPTIMIZE", "1") == "1"
+    CHART_TARGET_DPI = int(os.getenv("CHART_TARGET_DPI", "150"))
+    CHART_PRINT_WIDTH_IN = float(os.getenv("CHART_PRINT_WIDTH_IN", "6.3"))  # A4 content width (210mm - 50mm margins)
+    CHART_PALETTE_COLORS = int(os.getenv("CHART_PALETTE_COLORS", "256"))
+    CHART_LOSSY = os.getenv("CHART_LOSSY", "1") == "1"  # Allow JPEG for photo-like images only
+    CHART_JPEG_MIN_COLORS = int(os.getenv("CHART_JPEG_MIN_COLORS", "20000"))
+    CHART_JPEG_QUALITY = int(os.getenv("CHART_JPEG_QUALITY", "85"))
+
+    # PDF: long-lived WeasyPrint worker (stylesheet + fonts loaded once); 0 = render inline (cold path)
+    PDF_RENDER_WORKER = os.getenv("PDF_RENDER_WORKER", "1") == "1"
+    PDF_RENDER_TIMEOUT = float(os.getenv("PDF_RENDER_TIMEOUT", "120"))
+    PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PDF_SECTION_RENDER = os.getenv("PDF_SECTION_RENDER", "1") == "1"  # Lay out sections in parallel, merge with pypdf
+
+    # Shared HTTP client (connection pool shared by all services)
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "8"))
+    HTTP_ENABLE_HTTP2 = os.getenv("HTTP_ENABLE_HTTP2", "1") == "1"
+
+    # HTTP response cache (TTL in seconds per source; stale entries are revalidated with ETag/Last-Modified)
+    HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "1") == "1"
+    HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(os.path.dirname(__file__), "../.cache/http"))
+    HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", str(7 * 24 * 3600)))
+    HTTP_CACHE_TTL = {
+        "cafef": int(os.getenv("HTTP_CACHE_TTL_CAFEF", "300")),
+        "price_history": int(os.getenv("HTTP_CACHE_TTL_PRICE_HISTORY", "300")),
+        "bank_rates": int(os.getenv("HTTP_CACHE_TTL_BANK_RATES", str(6 * 3600))),
+        "worker": int(os.getenv("HTTP_CACHE_TTL_WORKER", "600")),
+    }
 
     # Default Portfolio (Hardcoded for now as requested)
     # Format: {"Symbol": {"vol": float, "cost": float}}
@@ -41,6 +95,72 @@ class Config:
         "calendar": _get_key.__func__("GEMINI_CALENDAR_KEY", GEMINI_API_KEY),
     }
 
+    # Gemini budgets per API key (free tier defaults) and timeouts in seconds
+    GEMINI_RPM = int(os.getenv("GEMINI_RPM", "10"))
+    GEMINI_TPM = int(os.getenv("GEMINI_TPM", "250000"))
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+    GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "90"))
+    GEMINI_AGENT_DEADLINE = float(os.getenv("GEMINI_AGENT_DEADLINE", "240"))
+    GEMINI_STREAMING = os.getenv("GEMINI_STREAMING", "1") == "1"
+    GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "1") == "1"  # Cache prompts/base.txt server-side
+    GEMINI_CONTEXT_CACHE_TTL = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL", "900"))
+    GEMINI_FAKE = os.getenv("GEMINI_FAKE", "0") == "1"  # Offline runs: src/fake_genai.py instead of the API
+
+    @staticmethod
+    def _get_models(key, default):
+        val = os.getenv(key)
+        if val and val.strip(): return [m.strip() for m in val.split(",") if m.strip()]
+        return default
+
+    # Model tiers per category: first model is the primary, the next ones are fallbacks when its quota runs out
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    GEMINI_LITE_MODEL = os.getenv("GEMINI_LITE_MODEL", "gemini-2.5-flash-lite")
+    GEMINI_MODEL_TIERS = {
+        "finance": _get_models.__func__("GEMINI_FINANCE_MODELS", [GEMINI_MODEL, GEMINI_LITE_MODEL]),
+        "weather": _get_models.__func__("GEMINI_WEATHER_MODELS", [GEMINI_MODEL, GEMINI_LITE_MODEL]),
+        "news": _get_models.__func__("GEMINI_NEWS_MODELS", [GEMINI_MODEL, GEMINI_LITE_MODEL]),
+        "tech": _get_models.__func__("GEMINI_TECH_MODELS", [GEMINI_MODEL, GEMINI_LITE_MODEL]),
+        "trends": _get_models.__func__("GEMINI_TRENDS_MODELS", [GEMINI_LITE_MODEL, GEMINI_MODEL]),
+        "calendar": _get_models.__func__("GEMINI_CALENDAR_MODELS", [GEMINI_LITE_MODEL, GEMINI_MODEL]),
+        "packed": _get_models.__func__("GEMINI_PACKED_MODELS", [GEMINI_MODEL, GEMINI_LITE_MODEL]),
+    }
+
+    # Structured output: agents answer {html, alerts[], key_numbers[]} JSON (falls back to text parsing)
+    GEMINI_STRUCTURED_OUTPUT = os.getenv("GEMINI_STRUCTURED_OUTPUT", "1") == "1"
+
+    # Categories answered together in one JSON request when they share an API key (e.g. "tech,trends,calendar")
+    GEMINI_PACK_CATEGORIES = [c.strip() for c in os.getenv("GEMINI_PACK_CATEGORIES", "").split(",") if c.strip()]
+
+    # Hedged requests: a second request fires once an agent passes its historical p95 latency
+    GEMINI_HEDGE_ENABLED = os.getenv("GEMINI_HEDGE_ENABLED", "1") == "1"
+    GEMINI_HEDGE_MIN_DELAY = float(os.getenv("GEMINI_HEDGE_MIN_DELAY", "5"))
+    GEMINI_HEDGE_MIN_SAMPLES = int(os.getenv("GEMINI_HEDGE_MIN_SAMPLES", "5"))
+    GEMINI_LATENCY_SAMPLES = int(os.getenv("GEMINI_LATENCY_SAMPLES", "50"))
+    GEMINI_LATENCY_FILE = os.getenv("GEMINI_LATENCY_FILE", os.path.join(os.path.dirname(__file__), "../.cache/llm/stats/latency.json"))
+
+    # Report artifacts: content hash -> Telegram file_id of the first upload (later sends reuse it)
+    ARTIFACT_STORE_FILE = os.getenv("ARTIFACT_STORE_FILE", os.path.join(os.path.dirname(__file__), "../.cache/artifacts/telegram_files.json"))
+    ARTIFACT_STORE_TTL = int(os.getenv("ARTIFACT_STORE_TTL", str(30 * 24 * 3600)))
+
+    # LLM response cache (agents run at temperature 0, so identical input -> identical answer)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+    LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join(os.path.dirname(__file__), "../.cache/llm"))
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+    LLM_CACHE_SUPABASE = os.getenv("LLM_CACHE_SUPABASE", "0") == "1"  # Also share the cache via the llm_cache table
+
+    # Prompt compaction: token budget per category for the raw data sent to each agent
+    PROMPT_COMPACTION_ENABLED = os.getenv("PROMPT_COMPACTION_ENABLED", "1") == "1"
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))  # Categories not listed below
+    PROMPT_TOKEN_BUDGETS = {
+        "finance": int(os.getenv("PROMPT_BUDGET_FINANCE", "8000")),
+        "weather": int(os.getenv("PROMPT_BUDGET_WEATHER", "2000")),
+        "news": int(os.getenv("PROMPT_BUDGET_NEWS", "4000")),
+        "tech": int(os.getenv("PROMPT_BUDGET_TECH", "3000")),
+        "trends": int(os.getenv("PROMPT_BUDGET_TRENDS", "3000")),
+        "calendar": int(os.getenv("PROMPT_BUDGET_CALENDAR", "1500")),
+    }
+
     # Paths
     PROMPT_BASE = os.path.join(os.path.dirname(__file__), "../prompts/base.txt")
     PROMPTS_DIR = os.path.join(os.path.dirname(__file__), "../prompts/agents")
@@ -0,0 +1,69 @@
+import asyncio
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from google.genai import errors, types
+
+from src.config import Config
+
+
+class ContextCacheManager:
+    """
+    Gemini explicit context caching for the prompt prefix every agent shares (prompts/base.txt).
+    One cache per (API key, model, prefix): created on first use, reused by every agent on that key,
+    deleted by aclose(). When caching is unavailable (prefix below the model's minimum, free tier,
+    unsupported model) the key is marked as uncached and agents send the full prompt instead.
+    """
+
+    def __init__(self, ttl: int = None):
+        self.ttl = ttl or Config.GEMINI_CONTEXT_CACHE_TTL
+        self._names: Dict[Tuple[str, str, str], Optional[str]] = {}
+        self._clients: Dict[Tuple[str, str, str], object] = {}
+        self._locks: Dict[Tuple[str, str, str], asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(api_key: str, model: str, prefix: str):
+        return api_key, model, hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+
+    async def get(self, client, api_key: str, model: str, prefix: str) -> Optional[str]:
+        """Returns the cached-content name for `prefix`, creating it once; None means send the full prompt."""
+        if not prefix or not Config.GEMINI_CONTEXT_CACHE:
+            return None
+        key = self._key(api_key, model, prefix)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._names:
+                return self._names[key]
+            try:
+                cached = await client.aio.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        contents=[types.Content(role="user", parts=[types.Part.from_text(text=prefix)])],
+                        ttl=f"{int(self.ttl)}s",
+                        display_name="daily-bot-base-prompt",
+                    ),
+                )
+                self._names[key] = cached.name
+                self._clients[key] = client
+                print(f"🧊 Context cache created: {cached.name}")
+            except Exception as e:
+                print(f"⚠️ Context cache unavailable, sending full prompts: {e}")
+                self._names[key] = None
+            return self._names[key]
+
+    def invalidate(self, api_key: str, model: str, prefix: str):
+        """Stops using a cache the server rejected (expired / deleted); no new one is created this run."""
+        self._names[self._key(api_key, model, prefix)] = None
+
+    async def aclose(self):
+        """Deletes the caches created by this run (they are billed for storage until their TTL)."""
+        for key, name in self._names.items():
+            client = self._clients.get(key)
+            if not name or not client:
+                continue
+            try:
+                await client.aio.caches.delete(name=name)
+            except errors.APIError as e:
+                print(f"⚠️ Context cache delete error ({name}): {e}")
+        self._names.clear()
+        self._clients.clear()
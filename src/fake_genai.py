@@ -0,0 +1,133 @@
+"""
+Offline stand-in for google.genai.Client (GEMINI_FAKE=1 or tests).
+Implements the subset the agents use: client.aio.models.generate_content / generate_content_stream
+and client.aio.caches.create / delete, and records every call for assertions.
+"""
+import asyncio
+import itertools
+import json
+from types import SimpleNamespace
+
+from google.genai import errors
+
+
+def _text_of(contents) -> str:
+    """Flattens str / Part / Content / lists of them into plain text."""
+    if contents is None:
+        return ""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, (list, tuple)):
+        return "".join(_text_of(c) for c in contents)
+    if getattr(contents, "parts", None) is not None:
+        return _text_of(contents.parts)
+    return getattr(contents, "text", None) or ""
+
+
+def _config_value(config, name):
+    if isinstance(config, dict):
+        return config.get(name)
+    return getattr(config, name, None)
+
+
+def _fake_value(schema, model, name):
+    kind = str(schema.get("type", "STRING")).upper()
+    if kind == "OBJECT":
+        return {key: _fake_value(sub, model, key if key != "html" else name) for key, sub in schema.get("properties", {}).items()}
+    if kind == "ARRAY":
+        return []
+    return f"<div class=\"card\">[fake {model}{': ' + name if name else ''}]</div>"
+
+
+class _FakeModels:
+    def __init__(self, client):
+        self.client = client
+
+    def _answer(self, model, contents, config):
+        prompt = _text_of(contents)
+        if model in self.client.rate_limited_models:
+            self.client.calls.append({"model": model, "prompt": prompt, "config": config, "status": 429})
+            raise errors.ClientError(429, {"error": {"code": 429, "message": f"Quota exceeded for {model}", "status": "RESOURCE_EXHAUSTED", "details": [
+                {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "60s"}
+            ]}})
+        cached_tokens = 0
+        cache_name = _config_value(config, "cached_content")
+        if cache_name:
+            if cache_name not in self.client.caches_store:
+                raise errors.ClientError(404, {"error": {"code": 404, "message": f"CachedContent not found: {cache_name}", "status": "NOT_FOUND"}})
+            cached_tokens = self.client.count_tokens(self.client.caches_store[cache_name])
+        self.client.calls.append({"model": model, "prompt": prompt, "config": config})
+        schema = _config_value(config, "response_schema")
+        if self.client.responder:
+            text = self.client.responder(prompt)
+        elif isinstance(schema, dict) and schema.get("properties"):
+            # Structured output: a value shaped like the schema (string fields get a fake card)
+            text = json.dumps(_fake_value(schema, model, ""), ensure_ascii=False)
+        else:
+            text = f"<div class=\"card\">[fake {model}]</div>"
+        usage = SimpleNamespace(
+            prompt_token_count=self.client.count_tokens(prompt) + cached_tokens,
+            cached_content_token_count=cached_tokens,
+            candidates_token_count=self.client.count_tokens(text),
+            total_token_count=self.client.count_tokens(prompt) + cached_tokens + self.client.count_tokens(text),
+        )
+        return text, usage
+
+    async def generate_content(self, *, model, contents, config=None):
+        await asyncio.sleep(self.client.latency)
+        text, usage = self._answer(model, contents, config)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        text, usage = self._answer(model, contents, config)
+        size = max(1, len(text) // 3)
+
+        async def chunks():
+            for i in range(0, len(text), size):
+                await asyncio.sleep(self.client.latency / 3)
+                last = i + size >= len(text)
+                yield SimpleNamespace(text=text[i:i + size], usage_metadata=usage if last else None)
+
+        return chunks()
+
+
+class _FakeCaches:
+    def __init__(self, client):
+        self.client = client
+        self._ids = itertools.count(1)
+
+    async def create(self, *, model, config=None):
+        prefix = _text_of(_config_value(config, "contents"))
+        if not self.client.supports_caching:
+            raise errors.ClientError(400, {"error": {"code": 400, "message": "Context caching is not supported", "status": "INVALID_ARGUMENT"}})
+        if self.client.count_tokens(prefix) < self.client.min_cache_tokens:
+            raise errors.ClientError(400, {"error": {"code": 400, "message": "Cached content is too small", "status": "INVALID_ARGUMENT"}})
+        name = f"cachedContents/fake-{next(self._ids)}"
+        self.client.caches_store[name] = prefix
+        self.client.caches_created.append(name)
+        return SimpleNamespace(name=name, model=model)
+
+    async def delete(self, *, name, config=None):
+        self.client.caches_store.pop(name, None)
+
+
+class FakeGenAIClient:
+    def __init__(self, api_key=None, responder=None, supports_caching=True, min_cache_tokens=1024, latency=0.0,
+                 rate_limited_models=()):
+        self.api_key = api_key
+        self.responder = responder
+        self.supports_caching = supports_caching
+        self.min_cache_tokens = min_cache_tokens
+        self.latency = latency
+        self.rate_limited_models = set(rate_limited_models)  # Always answer 429 (quota exhausted) for these
+        self.calls = []
+        self.caches_created = []
+        self.caches_store = {}
+        self.aio = SimpleNamespace(models=_FakeModels(self), caches=_FakeCaches(self), aclose=self._aclose)
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        return len(text) // 3
+
+    async def _aclose(self):
+        return None
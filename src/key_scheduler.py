@@ -0,0 +1,152 @@
+import asyncio
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from src.config import Config
+
+
+class _TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled continuously at `rate` tokens/second."""
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 = now). Call refill() first."""
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        # May go negative (debt) when the real cost turns out higher than the estimate
+        self.tokens -= amount
+
+
+class KeyBudget:
+    """
+    Budget of one API key: requests/minute and tokens/minute buckets, a server-imposed pause
+    (retry hints) and an AIMD concurrency limit — +1 slot per `limit` successes, halved on a 429.
+    """
+
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int, initial_concurrency: int = 2, clock=time.monotonic):
+        self.clock = clock
+        now = clock()
+        self.requests = _TokenBucket(rpm, rpm / 60.0, now)
+        self.tokens = _TokenBucket(tpm, tpm / 60.0, now)
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(initial_concurrency, max_concurrency))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._released: Optional[asyncio.Event] = None
+
+    def delay(self, est_tokens: int) -> float:
+        """Seconds to wait before a request of `est_tokens` may start; 0 means it can start now."""
+        now = self.clock()
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        wait = max(self.blocked_until - now, self.requests.delay(1), self.tokens.delay(est_tokens))
+        if wait <= 0 and self.in_flight >= int(self.limit):
+            return float("inf")  # Wait for a slot to be released
+        return max(wait, 0.0)
+
+    def take(self, est_tokens: int):
+        self.requests.take(1)
+        self.tokens.take(min(est_tokens, self.tokens.capacity))
+        self.in_flight += 1
+
+    def release(self, est_tokens: int, used_tokens: Optional[int] = None):
+        self.in_flight = max(0, self.in_flight - 1)
+        if used_tokens is not None and used_tokens > est_tokens:
+            self.tokens.take(used_tokens - est_tokens)
+        if self._released:
+            # Wake every waiter so it re-checks the budget
+            self._released.set()
+            self._released.clear()
+
+    def on_success(self):
+        self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+
+    def on_rate_limited(self, retry_after: float):
+        self.limit = max(1.0, self.limit / 2)
+        self.blocked_until = max(self.blocked_until, self.clock() + retry_after)
+
+    async def acquire(self, est_tokens: int):
+        if self._released is None:
+            self._released = asyncio.Event()
+        while True:
+            wait = self.delay(est_tokens)
+            if wait == 0:
+                self.take(est_tokens)
+                return
+            try:
+                # Woken early by a release, otherwise re-check once the budget has refilled
+                await asyncio.wait_for(self._released.wait(), timeout=None if wait == float("inf") else wait)
+            except asyncio.TimeoutError:
+                pass
+
+
+class KeyScheduler:
+    """
+    Dispatches LLM requests per API key. Agents with their own key get their own budget and never
+    wait on each other; agents sharing a key queue on that key's RPM/TPM budget instead of hitting 429s.
+    """
+
+    def __init__(self, rpm: int = None, tpm: int = None, max_concurrency: int = None):
+        self.rpm = rpm or Config.GEMINI_RPM
+        self.tpm = tpm or Config.GEMINI_TPM
+        self.max_concurrency = max_concurrency or Config.GEMINI_MAX_CONCURRENCY
+        self.budgets: Dict[str, KeyBudget] = {}
+
+    def budget(self, api_key: str) -> KeyBudget:
+        if api_key not in self.budgets:
+            self.budgets[api_key] = KeyBudget(self.rpm, self.tpm, self.max_concurrency)
+        return self.budgets[api_key]
+
+    @staticmethod
+    def estimate_tokens(prompt: str, max_output_tokens: int = 2048) -> int:
+        # ~3 chars/token for Vietnamese text, plus room for the answer
+        return len(prompt) // 3 + max_output_tokens
+
+    @asynccontextmanager
+    async def slot(self, api_key: str, est_tokens: int):
+        """
+        Holds one request slot on `api_key`. The body may set slot["used_tokens"] from the response's
+        usage metadata so the TPM budget is charged with the real cost.
+        """
+        budget = self.budget(api_key)
+        await budget.acquire(est_tokens)
+        slot = {"used_tokens": None}
+        try:
+            yield slot
+        finally:
+            budget.release(est_tokens, slot["used_tokens"])
+
+
+def retry_after_seconds(error) -> Optional[float]:
+    """Server retry hint of a rate-limit error: RetryInfo.retryDelay in the body, or a Retry-After header."""
+    details = getattr(error, "details", None)
+    if isinstance(details, dict):
+        for item in details.get("error", {}).get("details", []) or []:
+            delay = item.get("retryDelay") if isinstance(item, dict) else None
+            if delay:
+                match = re.match(r"([\d.]+)s", str(delay))
+                if match:
+                    return float(match.group(1))
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers and headers.get("retry-after"):
+        try:
+            return float(headers.get("retry-after"))
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from src.config import Config
+
+
+class FileCacheBackend:
+    """One JSON file per key. Reads refresh the mtime, so size eviction drops least recently used entries."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            self._remove(path)
+            return None
+        os.utime(path)
+        return entry.get("content")
+
+    def set(self, key, content: str, ttl: float, meta: dict = None):
+        entry = {"content": content, "expires_at": time.time() + ttl, **(meta or {})}
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drops the least recently used entries until the store fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+
+class SupabaseCacheBackend:
+    """Shared cache in the `llm_cache` table (schemas/20261018_add_llm_cache.sql)."""
+    TABLE = "llm_cache"
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key) -> Optional[str]:
+        res = self.client.table(self.TABLE).select("content, expires_at").eq("key", key).execute()
+        if not res.data:
+            return None
+        row = res.data[0]
+        if datetime.fromisoformat(row["expires_at"].replace("Z", "+00:00")) < datetime.now(timezone.utc):
+            return None
+        return row["content"]
+
+    def set(self, key, content: str, ttl: float, meta: dict = None):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        self.client.table(self.TABLE).upsert({
+            "key": key,
+            "content": content,
+            "model": (meta or {}).get("model"),
+            "category": (meta or {}).get("category"),
+            "expires_at": expires_at.isoformat(),
+        }).execute()
+
+    def evict(self):
+        self.client.table(self.TABLE).delete().lt("expires_at", datetime.now(timezone.utc).isoformat()).execute()
+
+
+class LLMCache:
+    """
+    Content-addressed cache for agent answers. The key hashes everything that determines the
+    output at temperature 0: model, generation config, system prompt, user context and raw data.
+    Backends are tried in order (local file first); a hit in a later backend is copied to the earlier ones.
+    """
+
+    def __init__(self, backends: List, ttl: float):
+        self.backends = backends
+        self.ttl = ttl
+
+    @classmethod
+    def from_config(cls):
+        if not Config.LLM_CACHE_ENABLED:
+            return None
+        backends = [FileCacheBackend(Config.LLM_CACHE_DIR, Config.LLM_CACHE_MAX_BYTES)]
+        if Config.LLM_CACHE_SUPABASE and Config.SUPABASE_URL and Config.SUPABASE_KEY:
+            try:
+                from supabase import create_client
+                backend = SupabaseCacheBackend(create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY))
+                backend.evict()
+                backends.append(backend)
+            except Exception as e:
+                print(f"⚠️ LLM Cache: Supabase backend disabled ({e})")
+        return cls(backends, Config.LLM_CACHE_TTL)
+
+    @staticmethod
+    def key(model: str, generation_config: dict, system_prompt: str, user_context: str, raw_data: str) -> str:
+        payload = json.dumps(
+            [model, generation_config, system_prompt, user_context, raw_data],
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key) -> Optional[str]:
+        for i, backend in enumerate(self.backends):
+            try:
+                content = backend.get(key)
+            except Exception as e:
+                print(f"⚠️ LLM Cache read error ({type(backend).__name__}): {e}")
+                continue
+            if content is not None:
+                for earlier in self.backends[:i]:
+                    try:
+                        earlier.set(key, content, self.ttl)
+                    except Exception:
+                        pass
+                return content
+        return None
+
+    def set(self, key, content: str, meta: dict = None):
+        for backend in self.backends:
+            try:
+                backend.set(key, content, self.ttl, meta)
+            except Exception as e:
+                print(f"⚠️ LLM Cache write error ({type(backend).__name__}): {e}")
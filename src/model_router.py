@@ -0,0 +1,102 @@
+import json
+import math
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from src.config import Config
+
+
+class LatencyStats:
+    """Recent request latencies per (category, model), persisted between runs (JSON file)."""
+
+    def __init__(self, path: str = None, max_samples: int = None):
+        self.path = path if path is not None else Config.GEMINI_LATENCY_FILE
+        self.max_samples = max_samples or Config.GEMINI_LATENCY_SAMPLES
+        self.samples: Dict[str, List[float]] = {}
+        self._dirty = False
+        if self.path:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.samples = {k: [float(x) for x in v] for k, v in json.load(f).items()}
+            except (OSError, ValueError, AttributeError):
+                self.samples = {}
+
+    @staticmethod
+    def _key(category: str, model: str) -> str:
+        return f"{category}/{model}"
+
+    def record(self, category: str, model: str, seconds: float):
+        samples = self.samples.setdefault(self._key(category, model), [])
+        samples.append(round(seconds, 3))
+        del samples[:-self.max_samples]
+        self._dirty = True
+
+    def p95(self, category: str, model: str) -> Optional[float]:
+        """95th percentile (nearest rank); None until there are enough samples to trust it."""
+        samples = sorted(self.samples.get(self._key(category, model), []))
+        if len(samples) < Config.GEMINI_HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, math.ceil(0.95 * len(samples)) - 1)]
+
+    def save(self):
+        if not self.path or not self._dirty:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.samples, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"⚠️ Latency stats save error: {e}")
+
+
+class ModelRouter:
+    """
+    Chọn model cho từng category:
+    - tier theo category (Config.GEMINI_MODEL_TIERS): model đầu tiên là chính, các model sau là dự phòng,
+    - model bị 429 được "nghỉ" đến hết thời gian server gợi ý -> request tiếp theo chuyển sang model dự phòng,
+    - hedge_delay(): khi request chạy quá p95 lịch sử thì bắn thêm một request song song.
+    """
+
+    def __init__(self, tiers: Dict[str, List[str]] = None, stats: LatencyStats = None, clock=time.monotonic):
+        self.tiers = tiers if tiers is not None else Config.GEMINI_MODEL_TIERS
+        self.stats = stats if stats is not None else LatencyStats()
+        self.clock = clock
+        self.cooling_until: Dict[Tuple[str, str], float] = {}
+
+    def models_for(self, category: str) -> List[str]:
+        return self.tiers.get(category) or self.tiers.get("default") or [Config.GEMINI_MODEL]
+
+    def pick(self, category: str, api_key: str) -> Tuple[str, float]:
+        """(model, seconds to wait): the first model of the tier that is not cooling down, else the one free soonest."""
+        now = self.clock()
+        models = self.models_for(category)
+        for model in models:
+            if self.cooling_until.get((api_key, model), 0) <= now:
+                return model, 0.0
+        model = min(models, key=lambda m: self.cooling_until[(api_key, m)])
+        return model, self.cooling_until[(api_key, model)] - now
+
+    def on_rate_limited(self, api_key: str, model: str, retry_after: float):
+        key = (api_key, model)
+        self.cooling_until[key] = max(self.cooling_until.get(key, 0), self.clock() + retry_after)
+
+    def hedge_delay(self, category: str, model: str) -> Optional[float]:
+        """Seconds after which a second request is fired; None = no hedging (disabled or not enough history)."""
+        if not Config.GEMINI_HEDGE_ENABLED:
+            return None
+        p95 = self.stats.p95(category, model)
+        if p95 is None:
+            return None
+        return max(p95, Config.GEMINI_HEDGE_MIN_DELAY)
+
+    def record_latency(self, category: str, model: str, seconds: float):
+        self.stats.record(category, model, seconds)
+
+    def save(self):
+        self.stats.save()
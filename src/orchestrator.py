@@ -1,126 +1,444 @@
 import asyncio
+import json
 import re
 from datetime import datetime
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
 
 # Thư viện mới (google-genai)
 from google import genai
 from google.genai import errors, types
 
+from src.config import Config
+from src.key_scheduler import KeyScheduler, retry_after_seconds
+from src.llm_cache import LLMCache
+from src.context_cache import ContextCacheManager
+from src.model_router import ModelRouter
+from src.agent_output import AGENT_RESPONSE_SCHEMA, STRUCTURED_INSTRUCTIONS, looks_structured, parse_agent_output, salvage_html, validate_agent_output
+
 class CategoryAgent:
-    def __init__(self, name: str, api_key: str, system_prompt: str):
+    # Một Client cho mỗi API key, dùng chung giữa các agent cùng key (chung connection pool)
+    _clients: Dict[str, genai.Client] = {}
+
+    # Cấu hình Model chuẩn: model theo từng category do ModelRouter chọn (Config.GEMINI_MODEL_TIERS)
+    GENERATION_CONFIG = {
+        'temperature': 0,
+        'top_p': 0.95,
+        'top_k': 20,
+    }
+
+    def __init__(self, name: str, api_key: str, system_prompt: str, shared_prefix: str = ""):
         self.name = name
         self.api_key = api_key
-        self.system_prompt = system_prompt
+        # shared_prefix (prompts/base.txt) luôn đứng đầu prompt -> cache được bằng context caching
+        self.shared_prefix = shared_prefix
+        self.system_prompt = f"{shared_prefix}\n\n{system_prompt}" if shared_prefix else system_prompt
+        self.specific_prompt = system_prompt
+        self.scheduler: Optional[KeyScheduler] = None  # Gán bởi Orchestrator.add_agent
+        self.cache: Optional[LLMCache] = None  # Gán bởi Orchestrator.add_agent
+        self.context_cache: Optional[ContextCacheManager] = None  # Gán bởi Orchestrator.add_agent
+        self.router: Optional[ModelRouter] = None  # Gán bởi Orchestrator.add_agent
+        # Structured mode: the answer is {html, alerts[], key_numbers[]} JSON instead of raw HTML
+        self.structured = Config.GEMINI_STRUCTURED_OUTPUT
+        if self.structured:
+            self.GENERATION_CONFIG = {
+                **CategoryAgent.GENERATION_CONFIG,
+                "response_mime_type": "application/json",
+                "response_schema": AGENT_RESPONSE_SCHEMA,
+            }
         
         # Khởi tạo Client chuẩn (Bỏ http_options để SDK tự xử lý)
-        self.client = genai.Client(api_key=self.api_key)
+        self.client = CategoryAgent.client_for(self.api_key)
+
+    @classmethod
+    def client_for(cls, api_key: str) -> genai.Client:
+        if api_key not in cls._clients:
+            if Config.GEMINI_FAKE:
+                from src.fake_genai import FakeGenAIClient
+                cls._clients[api_key] = FakeGenAIClient(api_key=api_key)
+            else:
+                cls._clients[api_key] = genai.Client(api_key=api_key)
+        return cls._clients[api_key]
+
+    @classmethod
+    async def aclose_clients(cls):
+        """Closes the async transport of every shared client."""
+        for client in cls._clients.values():
+            try:
+                await client.aio.aclose()
+            except Exception as e:
+                print(f"⚠️ Gemini client close error: {e}")
+        cls._clients.clear()
 
     async def generate_impact(self, user_context: str, raw_data: str) -> str:
-        # Prompt Engineering: Ép khuôn output
-        full_prompt = (
-            f"{self.system_prompt}\n\n"
+        # Prompt Engineering: Ép khuôn output (phần chung shared_prefix được ghép ở _request)
+        prompt_body = (
+            f"{self.specific_prompt}\n\n"
             f"--- USER CONTEXT ---\n{user_context}\n\n"
             f"--- REAL-TIME DATA ---\n{raw_data}\n\n"
-            "YÊU CẦU: Chỉ trả về nội dung Impact và Action, ngắn gọn."
+            + (f"{STRUCTURED_INSTRUCTIONS}\n\n" if self.structured else "")
+            + "YÊU CẦU: Chỉ trả về nội dung Impact và Action, ngắn gọn."
         )
-        return await self.safe_generate(full_prompt)
 
-    async def safe_generate(self, prompt: str, max_retries=3) -> str:
-        # Cấu hình Model chuẩn
-        # MODEL_NAME = 'gemini-2.0-flash-lite-preview-02-05' # Nếu muốn dùng bản 2.0 mới nhất
-        MODEL_NAME = 'gemini-2.5-flash' # Khuyên dùng bản này cho ổn định (Free Tier)
+        # temperature 0: cùng input -> cùng output, chạy lại trong ngày không tốn thêm lượt gọi
+        cache_key = None
+        if self.cache:
+            # Key theo model chính của tier: câu trả lời từ model dự phòng vẫn dùng lại được trong ngày
+            if self.router is None:
+                self.router = ModelRouter()
+            cache_key = LLMCache.key(self.router.models_for(self.name)[0], self.GENERATION_CONFIG, self.system_prompt, user_context, raw_data)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                print(f"💾 Cache hit: {self.name}")
+                return cached
+        return await self.safe_generate(prompt_body, cache_key=cache_key)
+
+    def _cacheable(self, text: str) -> bool:
+        """Structured answers are cached only once they validate (see PackedAgent.generate_sections)."""
+        return not self.structured or parse_agent_output(text) is not None
 
-        for i in range(max_retries):
+    def _full_prompt(self, prompt_body: str) -> str:
+        return f"{self.shared_prefix}\n\n{prompt_body}" if self.shared_prefix else prompt_body
+
+    async def _request(self, prompt_body: str, model: str):
+        """
+        One Gemini call. Returns (text, usage_metadata). The shared prefix comes from the context cache
+        when available, otherwise it is sent inline. Streaming: chunks arrive from the first token on.
+        """
+        cached_name = None
+        if self.context_cache and self.shared_prefix:
+            cached_name = await self.context_cache.get(self.client, self.api_key, model, self.shared_prefix)
+        if cached_name:
             try:
-                # Dùng asyncio.to_thread để không chặn luồng chính
-                response = await asyncio.to_thread(
-                    self.client.models.generate_content,
-                    model=MODEL_NAME,
-                    contents=types.Part.from_text(text=prompt),
-                    config={
-                        'temperature': 0,
-                        'top_p': 0.95,
-                        'top_k': 20,
-                    }
-                )
-                return response.text
+                return await self._call(prompt_body, model, {**self.GENERATION_CONFIG, "cached_content": cached_name})
+            except errors.ClientError as e:
+                if e.code not in (400, 403, 404):
+                    raise
+                # Cache hết hạn / bị xóa: gửi prompt đầy đủ
+                print(f"⚠️ {self.name}: context cache rejected ({e.code}), sending full prompt.")
+                self.context_cache.invalidate(self.api_key, model, self.shared_prefix)
+        return await self._call(self._full_prompt(prompt_body), model, self.GENERATION_CONFIG)
+
+    async def _call(self, prompt: str, model: str, config: dict):
+        kwargs = dict(model=model, contents=types.Part.from_text(text=prompt), config=config)
+        if not Config.GEMINI_STREAMING:
+            response = await self.client.aio.models.generate_content(**kwargs)
+            return response.text, getattr(response, "usage_metadata", None)
+
+        chunks, usage = [], None
+        async for chunk in await self.client.aio.models.generate_content_stream(**kwargs):
+            if chunk.text:
+                chunks.append(chunk.text)
+            usage = getattr(chunk, "usage_metadata", None) or usage
+        return "".join(chunks), usage
+
+    async def _attempt(self, prompt: str, model: str, est_tokens: int) -> str:
+        """One request on `model` under the scheduler budget of (API key, model); records its latency."""
+        # Quota của Gemini tính theo từng model -> budget riêng cho mỗi cặp (key, model)
+        async with self.scheduler.slot(f"{self.api_key}|{model}", est_tokens) as slot:
+            started = asyncio.get_running_loop().time()
+            # Async client (client.aio): không tốn thread, và khi bị cancel (timeout) request cũng bị hủy thật
+            text, usage = await asyncio.wait_for(self._request(prompt, model), timeout=Config.GEMINI_REQUEST_TIMEOUT)
+            slot["used_tokens"] = getattr(usage, "total_token_count", None)
+        self.router.record_latency(self.name, model, asyncio.get_running_loop().time() - started)
+        return text
+
+    async def _hedged(self, prompt: str, model: str, est_tokens: int) -> str:
+        """
+        Runs `_attempt`; if it is still running after the historical p95 latency, fires a second
+        identical request and returns whichever succeeds first (the other one is cancelled).
+        """
+        primary = asyncio.ensure_future(self._attempt(prompt, model, est_tokens))
+        delay = self.router.hedge_delay(self.name, model)
+        if delay is None:
+            return await primary
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            print(f"🪁 {self.name}: quá p95 ({delay:.1f}s), gửi thêm một request song song...")
+            hedge = asyncio.ensure_future(self._attempt(prompt, model, est_tokens))
+            pending, error = {primary, hedge}, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in (primary, hedge):
+                if task:
+                    task.cancel()
+
+    async def safe_generate(self, prompt: str, max_retries=3, cache_key: Optional[str] = None) -> str:
+        """`prompt` is the agent-specific part; the shared prefix is added by _request."""
+        if self.scheduler is None:
+            self.scheduler = KeyScheduler()
+        if self.router is None:
+            self.router = ModelRouter()
+        est_tokens = KeyScheduler.estimate_tokens(self._full_prompt(prompt))
+        # Mỗi model dự phòng thêm một lượt thử
+        attempts = max_retries + len(self.router.models_for(self.name)) - 1
+
+        for i in range(attempts):
+            model, wait = self.router.pick(self.name, self.api_key)
+            if wait > 0:
+                print(f"⏳ {self.name}: mọi model đều bị Rate Limit. Chờ {wait:.0f}s...")
+                await asyncio.sleep(wait)
+            budget = self.scheduler.budget(f"{self.api_key}|{model}")
+            try:
+                text = await self._hedged(prompt, model, est_tokens)
+                budget.on_success()
+                # Chỉ cache câu trả lời thành công (và hợp lệ: JSON cụt/sai không được phát lại cả ngày)
+                if cache_key and self.cache and text and self._cacheable(text):
+                    await asyncio.to_thread(self.cache.set, cache_key, text, {"model": model, "category": self.name})
+                return text
                 
             except errors.ClientError as e:
                 error_msg = str(e)
-                # Xử lý Rate Limit (Lỗi 429)
-                if "429" in error_msg or "ResourceExhausted" in error_msg:
-                    wait_time = 5 * (i + 1) # Tăng dần thời gian chờ: 5s, 10s, 15s
-                    print(f"⚠️ {self.name} bị Rate Limit. Chờ {wait_time}s...")
-                    await asyncio.sleep(wait_time)
+                # Xử lý Rate Limit (Lỗi 429): ưu tiên thời gian chờ server gợi ý, giảm concurrency (AIMD),
+                # model này "nghỉ" -> lượt sau chuyển sang model dự phòng nếu có
+                if e.code == 429 or "RESOURCE_EXHAUSTED" in error_msg:
+                    wait_time = retry_after_seconds(e) or 5 * 2 ** i
+                    budget.on_rate_limited(wait_time)
+                    self.router.on_rate_limited(self.api_key, model, wait_time)
+                    next_model, _ = self.router.pick(self.name, self.api_key)
+                    if next_model != model:
+                        print(f"⚠️ {self.name} bị Rate Limit trên {model}. Chuyển sang {next_model}...")
+                    else:
+                        print(f"⚠️ {self.name} bị Rate Limit. Chờ {wait_time:.0f}s (concurrency key: {int(budget.limit)})...")
                 else:
                     return f"⚠️ Lỗi Agent {self.name}: {error_msg}"
+            except asyncio.TimeoutError:
+                raise
             except Exception as e:
                 return f"⚠️ Lỗi hệ thống {self.name}: {str(e)}"
         
         return f"❌ {self.name}: Bỏ qua do quá tải (Rate Limit)."
 
+class PackedAgent(CategoryAgent):
+    """
+    Several small categories sharing one API key, answered by a single request.
+    The response is JSON (response schema: one HTML string per category), split back into sections.
+    """
+    PACK_INSTRUCTIONS = (
+        "Bạn viết {count} mục độc lập của bản tin trong cùng một câu trả lời: {names}.\n"
+        "Mỗi mục tuân theo hướng dẫn riêng của nó bên dưới, với đúng định dạng HTML như khi viết riêng.\n"
+        "Trả về JSON: mỗi khóa là tên mục, giá trị là {value} của mục đó."
+    )
+
+    def __init__(self, agents: List[CategoryAgent]):
+        self.agents = agents
+        self.categories = [agent.name for agent in agents]
+        combined = "\n\n".join(f"=== MỤC: {agent.name} ===\n{agent.specific_prompt}" for agent in agents)
+        super().__init__("packed", agents[0].api_key, combined, shared_prefix=agents[0].shared_prefix)
+        # Structured output: the schema forces one field per category (HTML string, or the agent object in structured mode)
+        section_schema = AGENT_RESPONSE_SCHEMA if self.structured else {"type": "STRING"}
+        self.GENERATION_CONFIG = {
+            **CategoryAgent.GENERATION_CONFIG,
+            "response_mime_type": "application/json",
+            "response_schema": {
+                "type": "OBJECT",
+                "properties": {name: section_schema for name in self.categories},
+                "required": self.categories,
+            },
+        }
+
+    async def generate_sections(self, user_context: str, category_data: Dict[str, str]) -> Dict:
+        """
+        {category: html} ({category: validated agent output} in structured mode).
+        Raises ValueError when the answer is not the expected JSON.
+        """
+        prompt_body = "\n\n".join([
+            self.PACK_INSTRUCTIONS.format(
+                count=len(self.categories), names=", ".join(self.categories),
+                value="object {html, alerts, key_numbers}" if self.structured else "HTML",
+            ),
+            f"--- USER CONTEXT ---\n{user_context}",
+            *(
+                f"=== MỤC: {agent.name} ===\n{agent.specific_prompt}\n\n"
+                f"--- REAL-TIME DATA ({agent.name}) ---\n{category_data.get(agent.name, 'Không có dữ liệu mới.')}"
+                for agent in self.agents
+            ),
+            "YÊU CẦU: Chỉ trả về nội dung Impact và Action, ngắn gọn.",
+        ])
+
+        cache_key = None
+        if self.cache:
+            if self.router is None:
+                self.router = ModelRouter()
+            raw_data = json.dumps({name: category_data.get(name) for name in self.categories}, ensure_ascii=False)
+            cache_key = LLMCache.key(self.router.models_for(self.name)[0], self.GENERATION_CONFIG, self.system_prompt, user_context, raw_data)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                print(f"💾 Cache hit: {self.name} ({', '.join(self.categories)})")
+                return self.parse(cached)
+
+        # Cache only after the answer parsed, so a malformed answer is not replayed
+        text = await self.safe_generate(prompt_body)
+        sections = self.parse(text)
+        if cache_key:
+            await asyncio.to_thread(self.cache.set, cache_key, text, {"model": self.router.models_for(self.name)[0], "category": self.name})
+        return sections
+
+    def parse(self, text: str) -> Dict:
+        try:
+            data = json.loads(Orchestrator._strip_code_fences(text or ""))
+        except ValueError:
+            raise ValueError(f"packed answer is not JSON: {(text or '')[:120]}")
+        if not isinstance(data, dict):
+            raise ValueError("packed answer is not a JSON object")
+        if self.structured:
+            sections = {name: validate_agent_output(data.get(name)) for name in self.categories}
+        else:
+            sections = {name: data[name] for name in self.categories if isinstance(data.get(name), str) and data[name].strip()}
+        missing = [name for name in self.categories if not sections.get(name)]
+        if missing:
+            raise ValueError(f"packed answer is missing: {', '.join(missing)}")
+        return sections
+
+
 class Orchestrator:
     def __init__(self, telegram_bot):
         self.bot = telegram_bot
         self.agents: List[CategoryAgent] = []
         self.alerts = []
+        self.scheduler = KeyScheduler()
+        self.cache = LLMCache.from_config()
+        self.context_cache = ContextCacheManager()
+        self.router = ModelRouter()
+        self.pack_categories = Config.GEMINI_PACK_CATEGORIES
 
     def add_agent(self, agent: CategoryAgent):
+        agent.scheduler = self.scheduler
+        agent.cache = self.cache
+        agent.context_cache = self.context_cache
+        agent.router = self.router
         self.agents.append(agent)
 
-    async def run_all(self, user_context: str, category_data: Dict[str, str]) -> List[Dict[str, str]]:
-        results = []
-        processed_categories = set()
-        
+    async def aclose(self):
+        await self.context_cache.aclose()
+        self.router.save()
+
+    @staticmethod
+    def _strip_code_fences(content: str) -> str:
+        if "```html" in content:
+            return content.replace("```html", "").replace("```", "").strip()
+        if "```" in content:
+            return content.replace("```", "").strip()
+        return content
+
+    async def run_agent(self, agent: CategoryAgent, user_context: str, raw_data: str) -> Dict[str, str]:
+        """
+        Runs one agent under the agent deadline and returns its post-processed section
+        (code fences stripped, alerts collected into self.alerts). Never raises.
+        """
+        deadline = Config.GEMINI_AGENT_DEADLINE
+
+        # Log Data sent to AI
+        preview = raw_data[:120].replace('\n', ' ') + "..." if len(raw_data) > 120 else raw_data.replace('\n', ' ')
+        print(f"🤖 Start: {agent.name} | Input: {len(raw_data)} chars | Preview: {preview}")
+        print(f"   👉 Sending to AI...")
+        try:
+            # Overall deadline per agent (queueing + retries); wait_for cancels the in-flight request
+            content = await asyncio.wait_for(agent.generate_impact(user_context, raw_data), timeout=deadline)
+            print(f"✅ Finish: {agent.name}")
+        except asyncio.TimeoutError:
+            print(f"❌ Timeout ({agent.name}): Skipping...")
+            content = f"⚠️ {agent.name}: Bỏ qua do AI treo quá lâu (>{deadline:.0f}s)."
+        except Exception as e:
+            print(f"❌ Error ({agent.name}): {e}")
+            content = f"⚠️ {agent.name}: Lỗi xử lý ({str(e)})."
+
+        return self.finish_section(agent.name, content)
+
+    def finish_section(self, category: str, content) -> Dict:
+        """
+        Turns an agent answer into a section {category, content, alerts, key_numbers} and collects its alerts.
+        Structured answers (JSON text, or an already validated dict) are used as-is; a malformed one
+        (truncated, invalid) keeps only its html field if that survived, else becomes an error section.
+        Anything else (plain HTML, error messages) goes through the text path: strip fences + /remind_ regex.
+        """
+        output = content if isinstance(content, dict) else parse_agent_output(content)
+        if output is not None:
+            html, alerts, key_numbers = output["html"], output["alerts"], output["key_numbers"]
+        elif looks_structured(content):
+            # Never render raw JSON into the report
+            html = salvage_html(content)
+            print(f"⚠️ [{category}] Malformed structured answer, {'using its html field' if html else 'dropped'}.")
+            html = html or f"⚠️ {category}: Lỗi xử lý."
+            alerts, key_numbers = [], []
+        else:
+            html = self._strip_code_fences(content or "")
+            alerts, key_numbers = self.extract_alerts(html), []
+        self.alerts.extend(alerts)
+        return {"category": category, "content": html, "alerts": alerts, "key_numbers": key_numbers}
+
+    def groups(self) -> List[List[CategoryAgent]]:
+        """
+        Agents as request groups, in registration order. Packable categories (Config.GEMINI_PACK_CATEGORIES)
+        that share an API key form one group; every other agent is its own group.
+        """
+        groups, packs = [], {}
+        for agent in self.agents:
+            if agent.name in self.pack_categories:
+                if agent.api_key not in packs:
+                    packs[agent.api_key] = []
+                    groups.append(packs[agent.api_key])
+                packs[agent.api_key].append(agent)
+            else:
+                groups.append([agent])
+        return groups
+
+    async def run_group(self, agents: List[CategoryAgent], user_context: str, category_data: Dict[str, str]) -> List[Dict[str, str]]:
+        """
+        Runs one request group. A packed group that fails (error, timeout, malformed JSON)
+        falls back to one request per agent. Never raises.
+        """
+        if len(agents) == 1:
+            return [await self.run_agent(agents[0], user_context, category_data.get(agents[0].name, "Không có dữ liệu mới."))]
+
+        packed = PackedAgent(agents)
+        packed.scheduler, packed.cache, packed.context_cache, packed.router = self.scheduler, self.cache, self.context_cache, self.router
+        names = ", ".join(packed.categories)
+        print(f"📦 Start: packed [{names}] in one request...")
+        try:
+            sections = await asyncio.wait_for(packed.generate_sections(user_context, category_data), timeout=Config.GEMINI_AGENT_DEADLINE)
+            print(f"✅ Finish: packed [{names}]")
+        except Exception as e:
+            print(f"⚠️ Packed request failed ({e}). Falling back to one request per category...")
+            return list(await asyncio.gather(*[
+                self.run_agent(agent, user_context, category_data.get(agent.name, "Không có dữ liệu mới.")) for agent in agents
+            ]))
+
+        return [self.finish_section(name, sections[name]) for name in packed.categories]
+
+    async def run_stream(self, user_context: str, category_data: Dict[str, str]) -> AsyncIterator[Dict[str, str]]:
+        """
+        Runs every agent concurrently and yields each section as soon as it is ready (completion order),
+        already post-processed: code fences stripped and alerts collected into self.alerts.
+        """
+        self.alerts = []
         print(f"🚀 Bắt đầu chạy AI Pipeline (Chế độ Song Song - Turbo Mode)...")
-        
-        # Limit concurrency to 3 agents at a time to avoid Rate Limit (429)
-        semaphore = asyncio.Semaphore(3)
-
-        # Helper function for individual agent task
-        async def process_agent(agent):
-            async with semaphore:
-                raw_data = category_data.get(agent.name, "Không có dữ liệu mới.")
-                processed_categories.add(agent.name)
-                
-                # Log Data sent to AI
-                preview = raw_data[:120].replace('\n', ' ') + "..." if len(raw_data) > 120 else raw_data.replace('\n', ' ')
-                print(f"🤖 Start: {agent.name} | Input: {len(raw_data)} chars | Preview: {preview}")
-                print(f"   👉 Sending to AI...")
-                try:
-                    # Timeout after 45 seconds per agent
-                    content = await asyncio.wait_for(agent.generate_impact(user_context, raw_data), timeout=90.0)
-                    print(f"✅ Finish: {agent.name}")
-                    return {"category": agent.name, "content": content}
-                except asyncio.TimeoutError:
-                    print(f"❌ Timeout ({agent.name}): Skipping...")
-                    return {"category": agent.name, "content": f"⚠️ {agent.name}: Bỏ qua do AI treo quá lâu (>90s)."}
-                except Exception as e:
-                    print(f"❌ Error ({agent.name}): {e}")
-                    return {"category": agent.name, "content": f"⚠️ {agent.name}: Lỗi xử lý ({str(e)})."}
-
-        # Create tasks for all agents
-        tasks = [process_agent(agent) for agent in self.agents]
-        
-        # Run concurrently (but bounded by Semaphore)
-        results = await asyncio.gather(*tasks)
-
-        # CLEANUP: Strip Markdown Code Blocks
-        for res in results:
-            content = res.get("content", "")
-            if "```html" in content:
-                res["content"] = content.replace("```html", "").replace("```", "").strip()
-            elif "```" in content:
-                res["content"] = content.replace("```", "").strip()
-        
-        # 3. (Deleted) Raw Data fallback removed as requested.
-        
-        # Extract Alerts from all results for persistence
-        all_text = "\n\n".join([r["content"] for r in results])
-        self.alerts = self.extract_alerts(all_text)
-        
-        return results
+
+        # Concurrency is governed per API key by self.scheduler (RPM/TPM budgets + AIMD)
+        tasks = [asyncio.create_task(self.run_group(group, user_context, category_data)) for group in self.groups()]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for res in await finished:
+                    yield res
+        finally:
+            # Consumer stopped early (or was cancelled): don't leave agents running
+            for task in tasks:
+                task.cancel()
+
+    async def run_all(self, user_context: str, category_data: Dict[str, str]) -> List[Dict[str, str]]:
+        """Collects run_stream; results are returned in agent registration order (report order)."""
+        by_category = {}
+        async for res in self.run_stream(user_context, category_data):
+            by_category[res["category"]] = res
+        return [by_category[agent.name] for agent in self.agents if agent.name in by_category]
 
     def extract_alerts(self, content: str) -> List[Dict]:
         """
@@ -0,0 +1,109 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence
+
+from src.config import Config
+
+
+class Pipeline:
+    """
+    Dataflow graph: mỗi node chạy ngay khi các node nó phụ thuộc đã xong,
+    nên thời gian tổng là critical path thay vì (fetch chậm nhất + AI chậm nhất).
+    Node lỗi/quá hạn dùng giá trị mặc định; các node phía sau vẫn chạy với giá trị đó.
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or Config.DATA_FETCH_WORKERS
+        self.nodes: Dict[str, tuple] = {}
+        self.status: Dict[str, Dict[str, Any]] = {}
+        self._started = 0.0
+
+    def add(self, name: str, func: Callable, *args, deps: Sequence[str] = (), default=None, timeout: float = None, **kwargs):
+        """
+        Đăng ký một node. `func` (sync -> chạy trong thread, hoặc coroutine function) được gọi với
+        giá trị của `deps` trước, rồi `args`/`kwargs`. Deps phải được đăng ký trước, nên đồ thị luôn không có chu trình.
+        `timeout` tính từ lúc node bắt đầu chạy (sau khi deps xong).
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate pipeline node: {name}")
+        missing = [d for d in deps if d not in self.nodes]
+        if missing:
+            raise ValueError(f"Node '{name}' depends on unknown node(s): {', '.join(missing)}")
+        self.nodes[name] = (func, args, kwargs, tuple(deps), default, timeout)
+
+    async def _run_node(self, name, tasks, loop, executor):
+        func, args, kwargs, deps, default, timeout = self.nodes[name]
+        inputs = [await tasks[d] for d in deps]
+        start = time.monotonic()
+        info = self.status[name] = {"status": "running", "start": start - self._started}
+        try:
+            if asyncio.iscoroutinefunction(func):
+                coro = func(*inputs, *args, **kwargs)
+            else:
+                coro = loop.run_in_executor(executor, functools.partial(func, *inputs, *args, **kwargs))
+            value = await asyncio.wait_for(coro, timeout) if timeout else await coro
+            info["status"] = "ok"
+        except asyncio.TimeoutError:
+            info["status"] = "timeout"
+            value = default
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            info.update(status="error", error=str(e))
+            value = default
+        info["end"] = time.monotonic() - self._started
+        return value
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Returns {node_name: value}. Per-node status is left in `self.status`
+        ({"status": "ok" | "error" | "timeout", "start"/"end": seconds since run start, "error": str}).
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline")
+        self.status = {}
+        self._started = time.monotonic()
+
+        # Registration order is a topological order, so every dependency task exists before its dependents
+        tasks: Dict[str, asyncio.Future] = {}
+        for name in self.nodes:
+            tasks[name] = asyncio.ensure_future(self._run_node(name, tasks, loop, executor))
+        try:
+            values = await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            # Threads past their timeout are abandoned; their HTTP timeouts bound them.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self._print_status()
+        return dict(zip(tasks.keys(), values))
+
+    def critical_path(self) -> List[str]:
+        """The chain of nodes that ends last: from the last node back through its latest-finishing dependency."""
+        if not self.status:
+            return []
+        name = max(self.status, key=lambda n: self.status[n].get("end", 0))
+        path = [name]
+        while self.nodes[name][3]:
+            name = max(self.nodes[name][3], key=lambda n: self.status.get(n, {}).get("end", 0))
+            path.append(name)
+        return path[::-1]
+
+    def _print_status(self):
+        print("\n⏱️ --- PIPELINE STATUS ---")
+        for name in self.nodes:
+            info = self.status.get(name, {})
+            state = info.get("status", "unknown")
+            icon = "✅" if state == "ok" else "⌛" if state == "timeout" else "❌"
+            line = f"{icon} {name}: {state} ({info.get('start', 0):.1f}s -> {info.get('end', 0):.1f}s)"
+            if info.get("error"):
+                line += f" | {info['error']}"
+            print(line)
+        path = self.critical_path()
+        if path:
+            total = self.status[path[-1]].get("end", 0)
+            print(f"🧭 Critical path ({total:.1f}s): {' -> '.join(path)}")
+        print("----------------------------------\n")
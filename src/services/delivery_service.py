@@ -0,0 +1,178 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+from src.config import Config
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class RateLimiter:
+    """
+    Telegram limits: about 30 messages/s per bot, 1 message/s per private chat and 20/min per group.
+    A send first waits for its chat's next slot, then books the next global slot (so a slow or
+    flood-controlled chat never holds up the others). RetryAfter pushes that chat's next slot back.
+    """
+
+    def __init__(self, global_rate: float = None, chat_interval: float = None, group_interval: float = None, clock=time.monotonic):
+        self.global_interval = 1.0 / (global_rate or Config.TELEGRAM_GLOBAL_RATE)
+        self.chat_interval = Config.TELEGRAM_CHAT_INTERVAL if chat_interval is None else chat_interval
+        self.group_interval = Config.TELEGRAM_GROUP_INTERVAL if group_interval is None else group_interval
+        self.clock = clock
+        self._global_next = 0.0
+        self._chat_next: Dict[str, float] = {}
+
+    def _interval(self, chat_id) -> float:
+        # Group/channel ids are negative
+        return self.group_interval if str(chat_id).startswith("-") else self.chat_interval
+
+    async def acquire(self, chat_id):
+        wait = self._chat_next.get(chat_id, 0.0) - self.clock()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        now = self.clock()
+        slot = max(now, self._global_next)
+        self._global_next = slot + self.global_interval
+        self._chat_next[chat_id] = slot + self._interval(chat_id)
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def back_off(self, chat_id, seconds: float):
+        self._chat_next[chat_id] = max(self._chat_next.get(chat_id, 0.0), self.clock() + seconds)
+
+
+def _seconds(retry_after) -> float:
+    return retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+
+
+class DeliveryService:
+    """
+    Gửi bản tin tới nhiều người nhận:
+    - Người nhận: bảng `profiles` (daily_report = true) khi Config.DELIVERY_FROM_PROFILES, luôn kèm TELEGRAM_CHAT_ID.
+    - Hàng đợi asyncio + Config.DELIVERY_WORKERS worker: các chat chạy song song, tin nhắn trong một chat giữ thứ tự.
+    - RateLimiter giữ giới hạn toàn cục / từng chat; RetryAfter, lỗi mạng -> chờ rồi gửi lại.
+    - Trạng thái từng người nhận được ghi vào bảng `deliveries` (schemas/20261018_add_deliveries.sql).
+    A message is a dict: {"kind", "text", "parse_mode"} or {"kind", "document" (path), "caption", "parse_mode"}.
+    """
+    TABLE = "deliveries"
+
+    def __init__(self, bot, supabase=None, artifacts=None, limiter: RateLimiter = None, workers: int = None):
+        self.bot = bot
+        self.supabase = supabase
+        self.artifacts = artifacts  # ArtifactStore: one upload per document, file_id for the other chats
+        self.limiter = limiter or RateLimiter()
+        self.workers = workers or Config.DELIVERY_WORKERS
+
+    def recipients(self) -> List[dict]:
+        recipients = []
+        if Config.DELIVERY_FROM_PROFILES and self.supabase:
+            try:
+                res = self.supabase.table("profiles").select("id, telegram_id").eq("daily_report", True).execute()
+                recipients = [{"profile_id": row["id"], "chat_id": str(row["telegram_id"])} for row in res.data or [] if row.get("telegram_id")]
+            except Exception as e:
+                print(f"⚠️ Recipients query error, sending to TELEGRAM_CHAT_ID only: {e}")
+        if Config.TELEGRAM_CHAT_ID and all(r["chat_id"] != str(Config.TELEGRAM_CHAT_ID) for r in recipients):
+            recipients.insert(0, {"profile_id": None, "chat_id": str(Config.TELEGRAM_CHAT_ID)})
+        return recipients
+
+    @staticmethod
+    def _split(message: dict) -> List[dict]:
+        text = message.get("text")
+        if not text or len(text) <= MAX_MESSAGE_LENGTH:
+            return [message]
+        return [{**message, "text": text[i:i + MAX_MESSAGE_LENGTH]} for i in range(0, len(text), MAX_MESSAGE_LENGTH)]
+
+    async def deliver(self, messages: List[dict], recipients: List[dict] = None, run_id: str = None) -> List[dict]:
+        """Sends `messages` to every recipient; returns one status dict per recipient."""
+        recipients = self.recipients() if recipients is None else recipients
+        messages = [part for message in messages for part in self._split(message)]
+        if not recipients or not messages:
+            print("⚠️ No recipients to deliver to.")
+            return []
+
+        queue = asyncio.Queue()
+        for recipient in recipients:
+            queue.put_nowait(recipient)
+        statuses = []
+
+        async def worker():
+            while not queue.empty():
+                recipient = queue.get_nowait()
+                statuses.append(await self._deliver_one(recipient, messages))
+                queue.task_done()
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(recipients)))))
+        sent = sum(1 for s in statuses if s["status"] == "sent")
+        print(f"📬 Delivered to {sent}/{len(statuses)} recipients in {time.monotonic() - started:.1f}s")
+        self._record(statuses, run_id)
+        return statuses
+
+    async def _deliver_one(self, recipient: dict, messages: List[dict]) -> dict:
+        status = {**recipient, "status": "sent", "messages_sent": 0, "attempts": 0, "error": None}
+        for message in messages:
+            try:
+                await self._send(recipient["chat_id"], message, status)
+                status["messages_sent"] += 1
+            except Forbidden as e:
+                # Bot blocked or removed from the chat: nothing else will get through
+                status.update(status="blocked", error=str(e))
+                return status
+            except Exception as e:
+                print(f"❌ Delivery error ({recipient['chat_id']}, {message.get('kind')}): {e}")
+                status["error"] = str(e)
+        if status["error"]:
+            status["status"] = "partial" if status["messages_sent"] else "failed"
+        return status
+
+    async def _send(self, chat_id, message: dict, status: dict):
+        parse_mode = message.get("parse_mode")
+        for attempt in range(Config.DELIVERY_MAX_RETRIES + 1):
+            await self.limiter.acquire(chat_id)
+            status["attempts"] += 1
+            try:
+                return await self._call(chat_id, message, parse_mode)
+            except RetryAfter as e:
+                seconds = _seconds(e.retry_after)
+                print(f"⏳ Flood control for {chat_id}: retry in {seconds:.0f}s")
+                self.limiter.back_off(chat_id, seconds)
+            except BadRequest as e:
+                if not parse_mode or "parse" not in str(e).lower():
+                    raise
+                # Broken Markdown/HTML: send the same text without formatting
+                print(f"⚠️ Formatting Error ({parse_mode}): {e}. Sending plain text fallback.")
+                parse_mode = None
+            except NetworkError as e:
+                print(f"⚠️ Network error for {chat_id} (attempt {attempt + 1}): {e}")
+                self.limiter.back_off(chat_id, 2 ** attempt)
+        raise RuntimeError(f"gave up after {Config.DELIVERY_MAX_RETRIES + 1} attempts")
+
+    async def _call(self, chat_id, message: dict, parse_mode: Optional[str]):
+        if message.get("document"):
+            kwargs = {"caption": message.get("caption"), "parse_mode": parse_mode}
+            if self.artifacts:
+                return await self.artifacts.send_document(self.bot, chat_id, message["document"], **kwargs)
+            with open(message["document"], "rb") as f:
+                return await self.bot.send_document(chat_id=chat_id, document=f, **kwargs)
+        return await self.bot.send_message(chat_id=chat_id, text=message["text"], parse_mode=parse_mode)
+
+    def _record(self, statuses: List[dict], run_id: str = None):
+        if not self.supabase or not statuses:
+            return
+        run_id = run_id or time.strftime("%Y%m%d-%H%M%S")
+        rows = [{
+            "run_id": run_id,
+            "profile_id": s["profile_id"],
+            "chat_id": s["chat_id"],
+            "status": s["status"],
+            "messages_sent": s["messages_sent"],
+            "attempts": s["attempts"],
+            "error": (s["error"] or "")[:500] or None,
+        } for s in statuses]
+        try:
+            self.supabase.table(self.TABLE).insert(rows).execute()
+        except Exception as e:
+            print(f"⚠️ Delivery status save error: {e}")
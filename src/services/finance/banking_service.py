@@ -1,8 +1,7 @@
-import requests
-import os
-import urllib3
 from datetime import datetime
 from src.config import Config
+from src.services.http_client import HttpClient
+from src.services.report.chart_renderer import chart_spec, chart_artifact
 
 class BankingService:
     @staticmethod
@@ -11,10 +10,9 @@ class BankingService:
             # CafeF Interest Rates
             url = "https://cafefnew.mediacdn.vn/Images/Uploaded/DuLieuDownload/Liveboard/all_banks_interest_rates.json"
             headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 "Referer": "https://cafef.vn/"
             }
-            res = requests.get(url, headers=headers, timeout=90)
+            res = HttpClient.get(url, headers=headers, timeout=90, ttl=Config.HTTP_CACHE_TTL["bank_rates"])
             if res.status_code == 200:
                 return res.json()
             return None
@@ -31,7 +29,6 @@ class BankingService:
             dates_to_try = [now, now - timedelta(days=1)]
             
             headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 "Referer": "https://cafef.vn/"
             }
 
@@ -40,7 +37,7 @@ class BankingService:
                 url = f"https://cafef.vn/du-lieu/ajax/exchangerate/ajaxratecurrency.ashx?time={date_str}"
                 
                 try:
-                    res = requests.get(url, headers=headers, timeout=90)
+                    res = HttpClient.get(url, headers=headers, timeout=90, ttl=Config.HTTP_CACHE_TTL["cafef"])
                     if res.status_code == 200:
                         data = res.json()
                         if data and isinstance(data, list) and len(data) > 0:
@@ -72,12 +69,6 @@ class BankingService:
             x = np.arange(len(banks))
             width = 0.35
             
-            # Create Output Dir
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            chart_path = os.path.join(output_dir, "interest_rate_chart.png")
-
             # Plotting OO
             fig = Figure(figsize=(12, 6))
             canvas = FigureCanvas(fig)
@@ -102,8 +93,7 @@ class BankingService:
                             ha='center', va='top', fontsize=9, color='#27ae60', fontweight='bold')
 
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "interest_rate_chart")
         except Exception as e:
             print(f"⚠️ Rate Chart Error: {e}")
             return None
@@ -135,7 +125,7 @@ class BankingService:
         # Interest Rates
         rates_data = BankingService._fetch_raw_interest_rates()
         int_text = "N/A"
-        chart_path = None
+        charts = []
         
         if rates_data and 'Data' in rates_data:
              chart_data = []
@@ -168,10 +158,10 @@ class BankingService:
                          except: pass
                  
                  int_text = "\n".join(lines)
-                 chart_path = BankingService._generate_rate_chart(chart_data)
+                 charts.append(chart_spec("interest_rate", chart_data))
              except Exception as e:
                  print(f"Rate process error: {e}")
                  int_text = "Lỗi xử lý lãi suất."
         
         text = f"--- [TỶ GIÁ & LÃI SUẤT] ---\n{ex_text}\n\nLãi suất 12M các NH lớn:\n{int_text}"
-        return {"text": text, "chart_path": chart_path}
+        return {"text": text, "charts": charts}
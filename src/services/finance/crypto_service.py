@@ -1,12 +1,12 @@
-import requests
 from src.config import Config
+from src.services.http_client import HttpClient
 
 class CryptoService:
     @staticmethod
     def _fetch_from_worker(path, params=None):
         try:
             url = f"{Config.WORKER_HOST.rstrip('/')}{path}"
-            res = requests.get(url, params=params, timeout=20)
+            res = HttpClient.get(url, params=params, timeout=20, ttl=Config.HTTP_CACHE_TTL["worker"])
             res.raise_for_status()
             return res.json()
         except Exception as e:
@@ -1,22 +1,67 @@
-import requests
-import urllib3
-import os
+import asyncio
 from datetime import datetime
+from src.config import Config
+from src.services.http_client import HttpClient
+from src.services.report.chart_renderer import chart_spec, chart_artifact
+
+_CAFEF_HEADERS = {
+    "Referer": "https://cafef.vn/"
+}
+
+_SEC_FETCH_HEADERS = {
+    "Sec-Fetch-Dest": "empty",
+    "Sec-Fetch-Mode": "cors",
+    "Sec-Fetch-Site": "same-site"
+}
+
+_CAFEF_APP_HEADERS = {
+    "Referer": "https://cafef.vn/",
+    "Origin": "https://cafef.vn",
+    **_SEC_FETCH_HEADERS
+}
+
+_PROP_TRADING_URL = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxgiaodichtudoanh.ashx"
 
 class MarketService:
+    # Every CafeF request behind fetch_market, shared by the sync and async paths
+    REQUESTS = {
+        "foreign_buy": {"url": "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxkhoingoai.ashx?type=buy", "headers": _CAFEF_HEADERS, "timeout": 10, "verify": False, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "foreign_sell": {"url": "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxkhoingoai.ashx?type=sell", "headers": _CAFEF_HEADERS, "timeout": 10, "verify": False, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "commodities": {"url": "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxhanghoa.ashx?type=1", "headers": _CAFEF_HEADERS, "timeout": 90, "verify": False, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "global": {"url": "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxchisothegioi.ashx", "headers": _CAFEF_HEADERS, "timeout": 90, "verify": False, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "breadth": {"url": "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxdorongthitruong.ashx?centerID=HOSE", "headers": _CAFEF_HEADERS, "timeout": 90, "verify": False, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "leaders": {"url": "https://msh-appdata.cafef.vn/rest-api/api/v1/MarketLeaderGroup?centerId=1&take=10", "headers": _CAFEF_APP_HEADERS, "timeout": 90, "verify": False, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "exchange_rates": {"url": "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxtygia.ashx", "headers": _CAFEF_HEADERS, "timeout": 90, "verify": False, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "prop_buy": {"url": _PROP_TRADING_URL, "params": {"type": "BUYVALUE"}, "headers": _SEC_FETCH_HEADERS, "timeout": 10, "verify": True, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+        "prop_sell": {"url": _PROP_TRADING_URL, "params": {"type": "SELLVALUE"}, "headers": _SEC_FETCH_HEADERS, "timeout": 10, "verify": True, "ttl": Config.HTTP_CACHE_TTL["cafef"]},
+    }
+
     @staticmethod
-    def _fetch_cafef_commodities():
+    def _get_json(name):
+        """Fetches one endpoint from REQUESTS. Returns parsed JSON, or None on non-200."""
+        res = HttpClient.get(**MarketService.REQUESTS[name])
+        if res.status_code != 200:
+            print(f"Lỗi HTTP ({name}): {res.status_code}")
+            return None
+        return res.json()
+
+    @staticmethod
+    async def _aget_json(name):
+        """Async version of _get_json. Never raises, so one failed endpoint only degrades its own block."""
         try:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            url = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxhanghoa.ashx?type=1"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Referer": "https://cafef.vn/"
-            }
-            res = requests.get(url, headers=headers, timeout=90, verify=False)
-            if res.status_code == 200:
-                return res.json()
+            res = await HttpClient.aget(**MarketService.REQUESTS[name])
+            if res.status_code != 200:
+                print(f"Lỗi HTTP ({name}): {res.status_code}")
+                return None
+            return res.json()
+        except Exception as e:
+            print(f"⚠️ CafeF Error ({name}): {e}")
             return None
+
+    @staticmethod
+    def _fetch_cafef_commodities():
+        try:
+            return MarketService._get_json("commodities")
         except Exception as e:
             print(f"⚠️ CafeF Commodities Error: {e}")
             return None
@@ -24,16 +69,7 @@ class MarketService:
     @staticmethod
     def _fetch_cafef_global():
         try:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            url = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxchisothegioi.ashx"
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Referer": "https://cafef.vn/"
-            }
-            res = requests.get(url, headers=headers, timeout=90, verify=False)
-            if res.status_code == 200:
-                return res.json()
-            return None
+            return MarketService._get_json("global")
         except Exception as e:
             print(f"⚠️ CafeF Global Error: {e}")
             return None
@@ -64,12 +100,6 @@ class MarketService:
             values = [x[1] for x in data]
             colors = ['#2ecc71' if v > 0 else '#e74c3c' for v in values]
             
-            # Create Output Dir
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            chart_path = os.path.join(output_dir, "market_leader_chart.png")
-
             # Plotting (OO Interface)
             fig = Figure(figsize=(10, 6))
             canvas = FigureCanvas(fig)
@@ -94,8 +124,7 @@ class MarketService:
                          va='center', ha=align, fontsize=9, fontweight='bold')
 
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "market_leader_chart")
 
         except Exception as e:
             print(f"⚠️ Leader Chart Error: {e}")
@@ -105,119 +134,84 @@ class MarketService:
             print(f"⚠️ Leader Chart Error: {e}")
             return None
 
+
     @staticmethod
     def _fetch_cafef_market_breadth():
         try:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
             # Fetch for HOSE
-            url = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxdorongthitruong.ashx?centerID=HOSE"
-            headers = {
-               "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-               "Referer": "https://cafef.vn/"
-            }
-            res = requests.get(url, headers=headers, timeout=90, verify=False)
-            if res.status_code == 200:
-                return res.json()
-            return None
+            return MarketService._get_json("breadth")
         except Exception as e:
              print(f"⚠️ CafeF Breadth Error: {e}")
              return None
 
+    @staticmethod
+    def _parse_exchange_rates(data):
+        if data and data.get('Success'):
+            return data.get('Data', [])
+        return []
+
     @staticmethod
     def _fetch_cafef_exchange_rates():
         try:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            url = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxtygia.ashx"
-            headers = {
-               "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-               "Referer": "https://cafef.vn/"
-            }
-            res = requests.get(url, headers=headers, timeout=90, verify=False)
-            if res.status_code == 200:
-                data = res.json()
-                if data and data.get('Success'):
-                    return data.get('Data', [])
-            return []
+            return MarketService._parse_exchange_rates(MarketService._get_json("exchange_rates"))
         except Exception as e:
              print(f"⚠️ CafeF Exchange Rate Error: {e}")
              return []
 
+    @staticmethod
+    def _compute_prop_trading(buy_json, sell_json):
+        # Helper to map
+        def map_data(data_input):
+            d = {}
+            # Unwrap if it's the wrapper dict
+            target_list = data_input
+            if isinstance(data_input, dict):
+                target_list = data_input.get("Data", [])
+            
+            if not isinstance(target_list, list): return d
+            
+            for item in target_list:
+                # CafeF usually returns 'StockCode' and 'Value'
+                # Or 'Symbol' based on user JSON sample
+                sym = item.get('StockCode') or item.get('Symbol')
+                val = item.get('Value') or item.get('TotalValue') or item.get('Volume') or 0
+                if sym: d[sym] = float(val)
+            return d
+
+        buy_map = map_data(buy_json or {})
+        sell_map = map_data(sell_json or {})
+        
+        all_syms = set(buy_map.keys()) | set(sell_map.keys())
+        net_flow = []
+        
+        total_buy_val = 0
+        total_sell_val = 0
+        
+        for sym in all_syms:
+            b = buy_map.get(sym, 0)
+            s = sell_map.get(sym, 0)
+            total_buy_val += b
+            total_sell_val += s
+            
+            net = b - s
+            if net != 0:
+                 net_flow.append((sym, net))
+        
+        net_flow.sort(key=lambda x: x[1], reverse=True)
+        
+        top_buy = net_flow[:5]
+        top_sell = net_flow[-5:]
+        top_sell.sort(key=lambda x: x[1]) # Sort asc (most negative first)
+        
+        return top_buy, top_sell, total_buy_val, total_sell_val
+
     @staticmethod
     def _fetch_cafef_prop_trading():
         try:
-            # Full Headers as requested
-            headers = {
-                  "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                  "Accept": "application/json, text/plain, */*",
-                  "Accept-Language": "vi-VN,vi;q=0.9,en-US;q=0.8,en;q=0.7",
-                  "Connection": "keep-alive",
-                  "Sec-Fetch-Dest": "empty",
-                  "Sec-Fetch-Mode": "cors",
-                  "Sec-Fetch-Site": "same-site"
-            }
-            
-            # Helper to map
-            def map_data(data_input):
-                d = {}
-                # Unwrap if it's the wrapper dict
-                target_list = data_input
-                if isinstance(data_input, dict):
-                    target_list = data_input.get("Data", [])
-                
-                if not isinstance(target_list, list): return d
-                
-                for item in target_list:
-                    # CafeF usually returns 'StockCode' and 'Value'
-                    # Or 'Symbol' based on user JSON sample
-                    sym = item.get('StockCode') or item.get('Symbol')
-                    val = item.get('Value') or item.get('TotalValue') or item.get('Volume') or 0
-                    if sym: d[sym] = float(val)
-                return d
-
-            # Base URL
-            base_url = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxgiaodichtudoanh.ashx"
-
-            # Fetch Buy Value
-            params_buy = {"type": "BUYVALUE"}
-            res_buy = requests.get(base_url, headers=headers, params=params_buy, timeout=10, verify=True)
-            # print(f"DEBUG: Buy Status: {res_buy.status_code}") # Debug
-            # print(f"DEBUG: Buy Content: {res_buy.text[:100]}") # Debug
-            
-            # Handle response safely
-            buy_json = res_buy.json() if res_buy.status_code == 200 else {}
-            buy_map = map_data(buy_json)
-            # print(f"DEBUG: Buy Map Len: {len(buy_map)}") # Debug
-            
-            # Fetch Sell Value
-            params_sell = {"type": "SELLVALUE"}
-            res_sell = requests.get(base_url, headers=headers, params=params_sell, timeout=10, verify=True)
-            sell_json = res_sell.json() if res_sell.status_code == 200 else {}
-            sell_map = map_data(sell_json)
-            
-            all_syms = set(buy_map.keys()) | set(sell_map.keys())
-            net_flow = []
-            
-            total_buy_val = 0
-            total_sell_val = 0
-            
-            for sym in all_syms:
-                b = buy_map.get(sym, 0)
-                s = sell_map.get(sym, 0)
-                total_buy_val += b
-                total_sell_val += s
-                
-                net = b - s
-                if net != 0:
-                     net_flow.append((sym, net))
-            
-            net_flow.sort(key=lambda x: x[1], reverse=True)
-            
-            top_buy = net_flow[:5]
-            top_sell = net_flow[-5:]
-            top_sell.sort(key=lambda x: x[1]) # Sort asc (most negative first)
-            
-            return top_buy, top_sell, total_buy_val, total_sell_val
-            
+            # Fetch Buy Value, then Sell Value
+            buy_json = MarketService._get_json("prop_buy")
+            sell_json = MarketService._get_json("prop_sell")
+            return MarketService._compute_prop_trading(buy_json, sell_json)
         except Exception as e:
              print(f"⚠️ Prop Trading Error: {e}")
              return [], [], 0, 0
@@ -225,92 +219,61 @@ class MarketService:
     @staticmethod
     def _fetch_cafef_leaders():
         try:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            url = "https://msh-appdata.cafef.vn/rest-api/api/v1/MarketLeaderGroup?centerId=1&take=10"
-            headers = {
-               "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                  "Referer": "https://cafef.vn/",
-                  "Origin": "https://cafef.vn",
-                  "Host": "msh-appdata.cafef.vn",
-                  "Accept": "application/json, text/plain, */*",
-                  "Accept-Language": "vi-VN,vi;q=0.9,en-US;q=0.8,en;q=0.7",
-                  "Connection": "keep-alive",
-                  "Sec-Fetch-Dest": "empty",
-                  "Sec-Fetch-Mode": "cors",
-                  "Sec-Fetch-Site": "same-site"
-            }
-            
-            res = requests.get(url, headers=headers, timeout=90, verify=False)
-            
-            if res.status_code != 200:
-                  print(f"Lỗi HTTP: {res.status_code}")
-                  # print(res.text[:200]) # Optional debug
-                  return None
-
-            if res.status_code == 200:
-                return res.json()
-            return None
+            return MarketService._get_json("leaders")
         except Exception as e:
              print(f"⚠️ CafeF Leader Error: {e}")
              return None
 
+    @staticmethod
+    def _compute_foreign_flow(buy_data, sell_data):
+        buy_data = buy_data if buy_data is not None else []
+        sell_data = sell_data if sell_data is not None else []
+
+        # Process Data: Calculate Net Flow (Buy - Sell)
+        # Structure assumed: list of dicts with 'Symbol' and 'Value' (Volume or Value?) - usually Volume or Value. 
+        # Let's inspect keys if possible. Assuming 'Symbol' and 'Value' based on typical endpoints.
+        
+        # Helper to map symbol -> value
+        def map_data(data_list):
+            d = {}
+            if not isinstance(data_list, list): return d
+            for item in data_list:
+                sym = item.get('Symbol') or item.get('StockCode')
+                val = item.get('Value') or item.get('Volume') or 0 # Ensure we get something
+                if sym: d[sym] = float(val)
+            return d
+
+        buy_map = map_data(buy_data)
+        sell_map = map_data(sell_data)
+        
+        # Merge keys
+        all_syms = set(buy_map.keys()) | set(sell_map.keys())
+        
+        net_flow = [] # (Symbol, NetValue)
+        for sym in all_syms:
+            b = buy_map.get(sym, 0)
+            s = sell_map.get(sym, 0)
+            net = b - s
+            if net != 0:
+                net_flow.append((sym, net))
+        
+        # Sort by absolute net value? Or separate Buy/Sell?
+        # Typically users want Top Net Buy and Top Net Sell.
+        net_flow.sort(key=lambda x: x[1], reverse=True) # Descending for Buy
+        
+        top_buy = net_flow[:5]
+        top_sell = net_flow[-5:] # Smallest (most negative) for Sell
+        top_sell.sort(key=lambda x: x[1]) # Sort ascending (most negative first)
+        
+        return top_buy, top_sell, buy_data, sell_data
+
     @staticmethod
     def _fetch_cafef_foreign_flow():
         try:
-            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-            headers = {
-               "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-               "Referer": "https://cafef.vn/"
-            }
-            
-            # Fetch Buy
-            url_buy = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxkhoingoai.ashx?type=buy"
-            res_buy = requests.get(url_buy, headers=headers, timeout=10, verify=False)
-            buy_data = res_buy.json() if res_buy.status_code == 200 else []
-            
-            # Fetch Sell
-            url_sell = "https://cafef.vn/du-lieu/ajax/mobile/smart/ajaxkhoingoai.ashx?type=sell"
-            res_sell = requests.get(url_sell, headers=headers, timeout=10, verify=False)
-            sell_data = res_sell.json() if res_sell.status_code == 200 else []
-
-            # Process Data: Calculate Net Flow (Buy - Sell)
-            # Structure assumed: list of dicts with 'Symbol' and 'Value' (Volume or Value?) - usually Volume or Value. 
-            # Let's inspect keys if possible. Assuming 'Symbol' and 'Value' based on typical endpoints.
-            
-            # Helper to map symbol -> value
-            def map_data(data_list):
-                d = {}
-                if not isinstance(data_list, list): return d
-                for item in data_list:
-                    sym = item.get('Symbol') or item.get('StockCode')
-                    val = item.get('Value') or item.get('Volume') or 0 # Ensure we get something
-                    if sym: d[sym] = float(val)
-                return d
-
-            buy_map = map_data(buy_data)
-            sell_map = map_data(sell_data)
-            
-            # Merge keys
-            all_syms = set(buy_map.keys()) | set(sell_map.keys())
-            
-            net_flow = [] # (Symbol, NetValue)
-            for sym in all_syms:
-                b = buy_map.get(sym, 0)
-                s = sell_map.get(sym, 0)
-                net = b - s
-                if net != 0:
-                    net_flow.append((sym, net))
-            
-            # Sort by absolute net value? Or separate Buy/Sell?
-            # Typically users want Top Net Buy and Top Net Sell.
-            net_flow.sort(key=lambda x: x[1], reverse=True) # Descending for Buy
-            
-            top_buy = net_flow[:5]
-            top_sell = net_flow[-5:] # Smallest (most negative) for Sell
-            top_sell.sort(key=lambda x: x[1]) # Sort ascending (most negative first)
-            
-            return top_buy, top_sell, buy_data, sell_data
-
+            # Fetch Buy, then Sell
+            buy_data = MarketService._get_json("foreign_buy")
+            sell_data = MarketService._get_json("foreign_sell")
+            return MarketService._compute_foreign_flow(buy_data, sell_data)
         except Exception as e:
             print(f"⚠️ Foreign Flow Error: {e}")
             return [], [], [], []
@@ -372,14 +335,8 @@ class MarketService:
                          f'{width:,.1f}', 
                          va='center', ha=align, fontsize=9, fontweight='bold')
 
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            chart_path = os.path.join(output_dir, "foreign_flow_chart.png")
-            
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "foreign_flow_chart")
         except Exception as e:
             print(f"⚠️ Foreign Flow Chart Error: {e}")
             return None
@@ -427,14 +384,8 @@ class MarketService:
                 ax.text(label_x_pos + offset, bar.get_y() + bar.get_height()/2, 
                         f'{width:+.2f}%', va='center', ha=align, fontsize=9, fontweight='bold')
 
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            chart_path = os.path.join(output_dir, "commodities_chart.png")
-            
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "commodities_chart")
         except Exception as e:
             print(f"⚠️ Commodities Chart Error: {e}")
             return None
@@ -490,31 +441,69 @@ class MarketService:
                 ax.text(label_x_pos + offset, bar.get_y() + bar.get_height()/2, 
                         f'{width:+.2f}%', va='center', ha=align, fontsize=9, fontweight='bold')
 
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            chart_path = os.path.join(output_dir, "global_chart.png")
-            
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "global_chart")
         except Exception as e:
             print(f"⚠️ Global Chart Error: {e}")
             return None
 
     @staticmethod
     def fetch_market():
+        return MarketService._build_market(
+            MarketService._fetch_cafef_foreign_flow(),
+            MarketService._fetch_cafef_commodities(),
+            MarketService._fetch_cafef_global(),
+            MarketService._fetch_cafef_market_breadth(),
+            MarketService._fetch_cafef_leaders(),
+            MarketService._fetch_cafef_exchange_rates(),
+            MarketService._fetch_cafef_prop_trading(),
+        )
+
+    @staticmethod
+    async def fetch_market_async():
+        """
+        Same output as fetch_market, but fires all CafeF requests at once.
+        Takes as long as the slowest endpoint; each block degrades on its own.
+        """
+        names = list(MarketService.REQUESTS.keys())
+        payloads = await asyncio.gather(*(MarketService._aget_json(name) for name in names))
+        raw = dict(zip(names, payloads))
+
+        try:
+            foreign = MarketService._compute_foreign_flow(raw["foreign_buy"], raw["foreign_sell"])
+        except Exception as e:
+            print(f"⚠️ Foreign Flow Error: {e}")
+            foreign = ([], [], [], [])
+
+        try:
+            ex_rates = MarketService._parse_exchange_rates(raw["exchange_rates"])
+        except Exception as e:
+            print(f"⚠️ CafeF Exchange Rate Error: {e}")
+            ex_rates = []
+
+        try:
+            prop = MarketService._compute_prop_trading(raw["prop_buy"], raw["prop_sell"])
+        except Exception as e:
+            print(f"⚠️ Prop Trading Error: {e}")
+            prop = ([], [], 0, 0)
+
+        # Text formatting + chart specs only (charts render in ChartRenderer): cheap enough for the event loop
+        return MarketService._build_market(
+            foreign, raw["commodities"], raw["global"], raw["breadth"], raw["leaders"], ex_rates, prop
+        )
+
+    @staticmethod
+    def _build_market(foreign, comm_data, gl_data, breadth_data, leaders, ex_rates, prop):
         lines = []
-        chart_paths = []
+        charts = []
 
         # 0. Foreign Flow (NEW)
-        top_buy, top_sell, raw_buy, raw_sell = MarketService._fetch_cafef_foreign_flow()
+        top_buy, top_sell, raw_buy, raw_sell = foreign
         if top_buy or top_sell:
             lines.append("[KHỐI NGOẠI (HOSE)]")
             
             # Generate Foreign Flow Chart
-            ff_chart = MarketService._generate_foreign_flow_chart((top_buy, top_sell))
-            if ff_chart: chart_paths.append(ff_chart)
+            charts.append(chart_spec("foreign_flow", (top_buy, top_sell)))
 
             if top_buy:
                 lines.append("Mua ròng mạnh:")
@@ -530,14 +519,12 @@ class MarketService:
             lines.append("")
 
         # 1. Commodities (Hang Hoa)
-        comm_data = MarketService._fetch_cafef_commodities()
         if comm_data and comm_data.get('Success') and 'Data' in comm_data:
             comm_list = comm_data['Data']
             lines.append("[HÀNG HÓA - TOP 15 QUAN TRỌNG]")
             
             # Generate Chart
-            c_chart = MarketService._generate_commodities_chart(comm_list)
-            if c_chart: chart_paths.append(c_chart)
+            charts.append(chart_spec("commodities", comm_list))
 
             for item in comm_list[:15]:
                 name = item.get('goods')
@@ -547,14 +534,12 @@ class MarketService:
                      lines.append(f"- {name}: {price:,.2f} ({change}%)")
 
         # 2. World Indices
-        gl_data = MarketService._fetch_cafef_global()
         if gl_data:
             if isinstance(gl_data, list):
                 lines.append("\n[CHỈ SỐ THẾ GIỚI]")
                 
                 # Generate Chart
-                g_chart = MarketService._generate_global_chart(gl_data)
-                if g_chart: chart_paths.append(g_chart)
+                charts.append(chart_spec("global", gl_data))
 
                 count = 0
                 for item in gl_data:
@@ -566,7 +551,6 @@ class MarketService:
                         count += 1
         
         # 3. Market Breadth (NEW)
-        breadth_data = MarketService._fetch_cafef_market_breadth()
         lines.append("\n[ĐỘ RỘNG THỊ TRƯỜNG (HOSE)]")
         if breadth_data:
             # Typically returns list of dicts with time? Or single snapshot?
@@ -591,13 +575,11 @@ class MarketService:
         
         # 4. Market Leaders
         lines.append("\n[DẪN DẮT VN-INDEX - ALL]")
-        leaders = MarketService._fetch_cafef_leaders()
         if leaders and isinstance(leaders, list):
              l_strs = []
              
              # Generate Leader Chart
-             leader_chart = MarketService._generate_leader_chart(leaders)
-             if leader_chart: chart_paths.append(leader_chart)
+             charts.append(chart_spec("leader", leaders))
              
              for item in leaders:
                  sym = item.get('Symbol') or item.get('StockCode')
@@ -606,7 +588,6 @@ class MarketService:
                  lines.append(", ".join(l_strs))
 
         # 5. Global Exchange Rates (NEW)
-        ex_rates = MarketService._fetch_cafef_exchange_rates()
         if ex_rates:
             lines.append("\n[TỶ GIÁ THẾ GIỚI]")
             # Filter key pairs: USDEUR, USDJPY, USDCNY, GBPUSD, AUDUSD
@@ -620,7 +601,7 @@ class MarketService:
                         lines.append(f"- {code}: {price} ({change})")
 
         # 6. Proprietary Trading (NEW)
-        td_buy, td_sell, td_total_buy, td_total_sell = MarketService._fetch_cafef_prop_trading()
+        td_buy, td_sell, td_total_buy, td_total_sell = prop
         if td_buy or td_sell:
              lines.append("\n[TỰ DOANH (HOSE)]")
              net_val = td_total_buy - td_total_sell
@@ -639,8 +620,5 @@ class MarketService:
         
         return {
             "text": "\n\n[MARKET DATA - CafeF]:\n" + "\n".join(lines),
-            "chart_path": chart_paths # Dict key expects 'chart_path' but we pass a list here. 
-            # Note: get_safe_data in main.py will extract this. 
-            # We'll need to handle list in main.py if get_safe_data expects single.
-            # Actually get_safe_data just gets the value. So list is fine.
+            "charts": charts  # Chart specs, rendered later by ChartRenderer
         }
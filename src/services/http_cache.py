@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import httpx
+
+from src.config import Config
+
+# Headers that describe the wire encoding; the cached body is already decoded
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class ResponseCache:
+    """
+    Disk-backed cache for GET responses, keyed by URL + params.
+    Fresh entries (younger than the caller's TTL) are served without a network round-trip;
+    stale entries are revalidated with If-None-Match / If-Modified-Since.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(Config.HTTP_CACHE_DIR)
+            return cls._default
+
+    @staticmethod
+    def key(url, params=None):
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        return hashlib.sha256(json.dumps([url, items]).encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key[:2], key)
+        return base + ".json", base + ".body"
+
+    def load(self, url, params=None):
+        meta_path, body_path = self._paths(self.key(url, params))
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(body_path, "rb") as f:
+                entry["body"] = f.read()
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def is_fresh(entry, ttl):
+        return entry is not None and time.time() - entry["stored_at"] < ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if not entry:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        # Only validators the origin issued: a date from our own clock could get a wrong 304
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    @staticmethod
+    def to_response(entry, url, params=None):
+        return httpx.Response(
+            status_code=entry["status"],
+            headers=entry["headers"],
+            content=entry["body"],
+            request=httpx.Request("GET", url, params=params),
+        )
+
+    def _write_atomic(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def store(self, url, params, response: httpx.Response):
+        if response.status_code != 200 or "no-store" in response.headers.get("cache-control", ""):
+            return
+        meta_path, body_path = self._paths(self.key(url, params))
+        meta = {
+            "url": url,
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _DROP_HEADERS},
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "stored_at": time.time(),
+        }
+        try:
+            # Body first: the meta file is the commit point of an entry
+            self._write_atomic(body_path, response.content)
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️ HTTP Cache write error: {e}")
+
+    def touch(self, url, params, entry):
+        """Marks a revalidated (304) entry as fresh again."""
+        meta_path, _ = self._paths(self.key(url, params))
+        meta = {k: v for k, v in entry.items() if k != "body"}
+        meta["stored_at"] = time.time()
+        try:
+            self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+        except OSError as e:
+            print(f"⚠️ HTTP Cache write error: {e}")
+
+    def resolve(self, url, params, entry, response: httpx.Response) -> httpx.Response:
+        """Turns a network response into the caller's response: 304 -> cached body, 200 -> stored."""
+        if response.status_code == 304 and entry:
+            self.touch(url, params, entry)
+            return self.to_response(entry, url, params)
+        self.store(url, params, response)
+        return response
+
+    def prune(self, max_age):
+        """Deletes entries not refreshed for `max_age` seconds."""
+        cutoff = time.time() - max_age
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                except OSError:
+                    continue
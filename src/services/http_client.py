@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from src.config import Config
+from src.services.http_cache import ResponseCache
+
+try:
+    import h2  # noqa: F401 - HTTP/2 chỉ bật khi có package h2
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+# Default headers for every outgoing request (services only add what differs, e.g. Referer)
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "vi-VN,vi;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+# Connection-level headers are managed by the transport (and are illegal over HTTP/2)
+_HOP_BY_HOP_HEADERS = {"connection", "host", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+
+class HttpClient:
+    """
+    Shared, pooled HTTP client (httpx) for all services.
+    One keep-alive pool per TLS-verify mode, HTTP/2 where supported, and a per-host concurrency cap.
+    """
+    _lock = threading.Lock()
+    _sync_clients = {}
+    _async_clients = weakref.WeakKeyDictionary()  # event loop -> {verify: AsyncClient}
+    _host_semaphores = {}
+    _async_host_semaphores = weakref.WeakKeyDictionary()  # event loop -> {host: Semaphore}
+
+    @staticmethod
+    def _limits():
+        return httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    @staticmethod
+    def _client_kwargs(verify):
+        return {
+            "headers": DEFAULT_HEADERS,
+            "limits": HttpClient._limits(),
+            "http2": Config.HTTP_ENABLE_HTTP2 and _HTTP2_AVAILABLE,
+            "verify": verify,
+            "follow_redirects": True,
+        }
+
+    @staticmethod
+    def _clean_headers(headers):
+        if not headers:
+            return None
+        return {k: v for k, v in headers.items() if k.lower() not in _HOP_BY_HOP_HEADERS}
+
+    @staticmethod
+    def _host(url):
+        return urlsplit(url).netloc
+
+    @classmethod
+    def client(cls, verify=True) -> httpx.Client:
+        with cls._lock:
+            client = cls._sync_clients.get(verify)
+            if client is None or client.is_closed:
+                client = httpx.Client(**cls._client_kwargs(verify))
+                cls._sync_clients[verify] = client
+            return client
+
+    @classmethod
+    def async_client(cls, verify=True) -> httpx.AsyncClient:
+        # AsyncClient is bound to the event loop it was first used on, so keep one per loop
+        loop = asyncio.get_running_loop()
+        clients = cls._async_clients.setdefault(loop, {})
+        client = clients.get(verify)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**cls._client_kwargs(verify))
+            clients[verify] = client
+        return client
+
+    @classmethod
+    @contextmanager
+    def _host_slot(cls, host):
+        with cls._lock:
+            sem = cls._host_semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(Config.HTTP_PER_HOST_LIMIT)
+                cls._host_semaphores[host] = sem
+        with sem:
+            yield
+
+    @classmethod
+    @asynccontextmanager
+    async def _async_host_slot(cls, host):
+        loop = asyncio.get_running_loop()
+        sems = cls._async_host_semaphores.setdefault(loop, {})
+        sem = sems.get(host)
+        if sem is None:
+            sem = asyncio.Semaphore(Config.HTTP_PER_HOST_LIMIT)
+            sems[host] = sem
+        async with sem:
+            yield
+
+    @staticmethod
+    def _cache_lookup(url, params, headers, ttl):
+        """Returns (cache, entry, fresh_response, headers) for a GET with the given TTL (seconds)."""
+        if not ttl or not Config.HTTP_CACHE_ENABLED:
+            return None, None, None, headers
+        cache = ResponseCache.default()
+        entry = cache.load(url, params)
+        if ResponseCache.is_fresh(entry, ttl):
+            return cache, entry, ResponseCache.to_response(entry, url, params), headers
+        return cache, entry, None, {**(headers or {}), **ResponseCache.conditional_headers(entry)}
+
+    @classmethod
+    def get(cls, url, params=None, headers=None, timeout=20, verify=True, ttl=None) -> httpx.Response:
+        """GET through the shared pool. With `ttl`, responses are served from / stored in the disk cache."""
+        cache, entry, cached, headers = cls._cache_lookup(url, params, headers, ttl)
+        if cached is not None:
+            return cached
+        with cls._host_slot(cls._host(url)):
+            res = cls.client(verify).get(url, params=params, headers=cls._clean_headers(headers), timeout=timeout)
+        return cache.resolve(url, params, entry, res) if cache else res
+
+    @classmethod
+    async def aget(cls, url, params=None, headers=None, timeout=20, verify=True, ttl=None) -> httpx.Response:
+        cache, entry, cached, headers = cls._cache_lookup(url, params, headers, ttl)
+        if cached is not None:
+            return cached
+        async with cls._async_host_slot(cls._host(url)):
+            res = await cls.async_client(verify).get(url, params=params, headers=cls._clean_headers(headers), timeout=timeout)
+        return cache.resolve(url, params, entry, res) if cache else res
+
+    @classmethod
+    def close(cls):
+        with cls._lock:
+            for client in cls._sync_clients.values():
+                client.close()
+            cls._sync_clients.clear()
+        if Config.HTTP_CACHE_ENABLED:
+            ResponseCache.default().prune(Config.HTTP_CACHE_MAX_AGE)
+
+    @classmethod
+    async def aclose(cls):
+        loop = asyncio.get_running_loop()
+        for client in cls._async_clients.pop(loop, {}).values():
+            await client.aclose()
@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+from telegram.error import BadRequest
+
+from src.config import Config
+
+
+class ArtifactStore:
+    """
+    Report artifacts keyed by content hash (sha256 of the file), with the Telegram file_id returned by the
+    first upload. Later sends of the same bytes, to any chat, reference that file_id instead of uploading again.
+    file_ids belong to one bot, so the key also carries a hash of the bot token. Persisted as a JSON index.
+    """
+
+    def __init__(self, path: str = None, ttl: float = None):
+        self.path = path if path is not None else Config.ARTIFACT_STORE_FILE
+        self.ttl = Config.ARTIFACT_STORE_TTL if ttl is None else ttl
+        self.entries: Dict[str, dict] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        if self.path:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = {k: v for k, v in json.load(f).items() if isinstance(v, dict) and v.get("file_id")}
+            except (OSError, ValueError, AttributeError):
+                self.entries = {}
+
+    @staticmethod
+    def digest(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    @staticmethod
+    def _key(bot, digest: str) -> str:
+        bot_hash = hashlib.sha256(str(getattr(bot, "token", "")).encode()).hexdigest()[:12]
+        return f"{bot_hash}:{digest}"
+
+    def file_id(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if not entry or entry.get("stored_at", 0) + self.ttl < time.time():
+            return None
+        return entry["file_id"]
+
+    def record(self, key: str, file_id: str, name: str, size: int):
+        self.entries[key] = {"file_id": file_id, "name": name, "size": size, "stored_at": time.time()}
+        self.save()
+
+    def forget(self, key: str):
+        if self.entries.pop(key, None):
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        now = time.time()
+        self.entries = {k: v for k, v in self.entries.items() if v.get("stored_at", 0) + self.ttl >= now}
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Artifact store save error: {e}")
+
+    async def send_document(self, bot, chat_id, path: str, **kwargs):
+        """
+        bot.send_document for a local file: the first send uploads it (the handle is closed afterwards),
+        later sends reuse the file_id. Concurrent sends of the same file wait for that single upload.
+        """
+        key = self._key(bot, self.digest(path))
+        file_id = self.file_id(key)
+        if not file_id:
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                file_id = self.file_id(key)
+                if not file_id:
+                    return await self._upload(bot, chat_id, path, key, **kwargs)
+        try:
+            return await bot.send_document(chat_id=chat_id, document=file_id, **kwargs)
+        except BadRequest as e:
+            # file_id no longer valid (other bot, file purged): upload again
+            print(f"⚠️ Cached file_id rejected, re-uploading {os.path.basename(path)}: {e}")
+            self.forget(key)
+            return await self._upload(bot, chat_id, path, key, **kwargs)
+
+    async def _upload(self, bot, chat_id, path: str, key: str, **kwargs):
+        name = os.path.basename(path)
+        with open(path, "rb") as f:
+            message = await bot.send_document(chat_id=chat_id, document=f, filename=name, **kwargs)
+        document = getattr(message, "document", None)
+        if document and getattr(document, "file_id", None):
+            self.record(key, document.file_id, name, os.path.getsize(path))
+            print(f"📦 Uploaded {name} once, file_id stored for later sends")
+        return message
@@ -0,0 +1,160 @@
+import asyncio
+import importlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.config import Config
+
+# Chart kind -> "module:Class.builder". Resolved inside the worker, so a spec only carries plain (picklable) data.
+BUILDERS = {
+    "foreign_flow": "src.services.finance.market_service:MarketService._generate_foreign_flow_chart",
+    "commodities": "src.services.finance.market_service:MarketService._generate_commodities_chart",
+    "global": "src.services.finance.market_service:MarketService._generate_global_chart",
+    "leader": "src.services.finance.market_service:MarketService._generate_leader_chart",
+    "interest_rate": "src.services.finance.banking_service:BankingService._generate_rate_chart",
+    "weather": "src.services.weather.weather_service:WeatherService._generate_weather_chart",
+    "trends": "src.services.social.news_service:NewsService._generate_trend_chart",
+    "portfolio": "src.services.stock.stock_service:StockService._generate_portfolio_chart",
+}
+
+
+def chart_spec(kind, data):
+    """Plain description of one chart: which builder to call and the data to call it with."""
+    return {"kind": kind, "data": data}
+
+
+def chart_artifact(canvas, name):
+    """
+    Renders a matplotlib canvas in memory. An artifact is a plain dict (picklable, so it can leave a
+    worker process): {"name", "format", "mime", "data": bytes, "width", "height"}.
+    """
+    fmt = "svg" if Config.CHART_FORMAT == "svg" else "png"
+    buf = io.BytesIO()
+    canvas.figure.savefig(buf, format=fmt)
+    width, height = canvas.get_width_height()
+    return {
+        "name": name,
+        "format": fmt,
+        "mime": "image/svg+xml" if fmt == "svg" else "image/png",
+        "data": buf.getvalue(),
+        "width": width,
+        "height": height,
+    }
+
+
+def spill_artifact(artifact, directory, prefix=""):
+    """Debug helper: writes an artifact to `directory` and returns the file path."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{prefix}{artifact['name']}.{artifact['format']}")
+    with open(path, "wb") as f:
+        f.write(artifact["data"])
+    return path
+
+
+def render_spec(spec):
+    """
+    Runs the builder for `spec` (in a worker process or inline). Returns what the builder returns,
+    shrunk for print by ImageOptimizer when Config.CHART_OPTIMIZE is on.
+    """
+    module_name, attr = BUILDERS[spec["kind"]].split(":")
+    target = importlib.import_module(module_name)
+    for part in attr.split("."):
+        target = getattr(target, part)
+    artifact = target(spec["data"])
+    if Config.CHART_OPTIMIZE and artifact:
+        from src.services.report.image_optimizer import ImageOptimizer
+        artifact = ImageOptimizer.optimize(artifact)
+    return artifact
+
+
+def _noop():
+    return None
+
+
+class ChartRenderer:
+    """
+    Renders chart specs in a ProcessPoolExecutor so matplotlib work runs on spare cores
+    while the LLM stage is waiting on the network.
+    submit() returns futures immediately; resolve() collects the results later.
+    """
+
+    def __init__(self, max_workers=None):
+        self.workers = Config.CHART_RENDER_WORKERS if max_workers is None else max_workers
+        self._pool = None
+        self._specs = {}
+        # Unique per run, so debug spills from concurrent runs never overwrite each other
+        self.run_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        if self.workers > 0:
+            try:
+                # spawn: the parent already runs threads and an event loop, forking it is not safe
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            except (OSError, NotImplementedError, ValueError) as e:
+                print(f"⚠️ Chart process pool unavailable, rendering inline: {e}")
+
+    def warm_up(self):
+        """Starts the worker processes now (interpreter start + imports) so it overlaps with data fetching."""
+        if self._pool:
+            for _ in range(self.workers):
+                self._pool.submit(_noop)
+
+    @staticmethod
+    def _render_inline(spec):
+        future = Future()
+        try:
+            future.set_result(render_spec(spec))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def submit(self, spec) -> Future:
+        if self._pool:
+            try:
+                future = self._pool.submit(render_spec, spec)
+                self._specs[future] = spec
+                return future
+            except (BrokenProcessPool, RuntimeError) as e:
+                print(f"⚠️ Chart pool error, rendering inline: {e}")
+                self._pool = None
+        return self._render_inline(spec)
+
+    def submit_all(self, specs):
+        """Accepts None, one spec or a list of specs; returns a list of futures."""
+        if not specs:
+            return []
+        if isinstance(specs, dict):
+            specs = [specs]
+        return [self.submit(spec) for spec in specs]
+
+    async def resolve(self, futures, timeout=None):
+        """
+        Waits for `futures` and returns the chart artifacts in order. Failed charts are skipped.
+        With Config.CHART_DEBUG_DIR set, every artifact is also written there for inspection.
+        """
+        timeout = Config.CHART_RENDER_TIMEOUT if timeout is None else timeout
+        results = []
+        for future in futures:
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM): render this one inline instead of losing it
+                spec = self._specs.get(future)
+                fallback = self._render_inline(spec) if spec else None
+                result = fallback.result() if fallback and not fallback.exception() else None
+            except Exception as e:
+                print(f"⚠️ Chart Render Error: {e}")
+                result = None
+            if result:
+                results.append(result)
+                if Config.CHART_DEBUG_DIR:
+                    spill_artifact(result, Config.CHART_DEBUG_DIR, prefix=f"{self.run_id}_")
+        return results
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._specs.clear()
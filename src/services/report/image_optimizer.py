@@ -0,0 +1,116 @@
+import hashlib
+import io
+
+from src.config import Config
+
+
+class ImageOptimizer:
+    """
+    Shrinks chart artifacts (see chart_renderer.chart_artifact) before they are inlined into the PDF:
+    1. resample to the print size: content width of the A4 page at Config.CHART_TARGET_DPI (never upscale),
+    2. palette PNG: exact when the chart has <= 256 colours, otherwise quantized without dithering,
+    3. JPEG only for photo-like images (many colours) and only when it is smaller,
+    4. identical images are deduplicated.
+    The smallest candidate wins and an artifact never grows. SVG charts are left as they are.
+    """
+
+    @staticmethod
+    def max_width_px():
+        return int(Config.CHART_PRINT_WIDTH_IN * Config.CHART_TARGET_DPI)
+
+    @staticmethod
+    def optimize(artifact):
+        """Returns an optimized copy of a PNG artifact (with "original_size"); other artifacts are returned as-is."""
+        if not isinstance(artifact, dict) or artifact.get("format") != "png" or not artifact.get("data"):
+            return artifact
+        original = artifact["data"]
+        try:
+            from PIL import Image
+
+            img = Image.open(io.BytesIO(original))
+            img.load()
+            if img.mode == "RGBA" and img.getextrema()[3] == (255, 255):
+                img = img.convert("RGB")  # Opaque (matplotlib default): drop the alpha channel
+            elif img.mode not in ("RGB", "RGBA"):
+                img = img.convert("RGBA")
+
+            max_width = ImageOptimizer.max_width_px()
+            if img.width > max_width:
+                height = max(1, round(img.height * max_width / img.width))
+                img = img.resize((max_width, height), Image.Resampling.LANCZOS)
+
+            candidates = []
+            colors = img.getcolors(maxcolors=256)
+            if colors is not None:
+                # <= 256 colours: palette PNG is lossless
+                candidates.append(("png", ImageOptimizer._png(img.quantize(colors=len(colors), method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE))))
+            else:
+                method = Image.Quantize.FASTOCTREE if img.mode == "RGBA" else Image.Quantize.MEDIANCUT
+                candidates.append(("png", ImageOptimizer._png(img.quantize(colors=Config.CHART_PALETTE_COLORS, method=method, dither=Image.Dither.NONE))))
+                many_colors = img.getcolors(maxcolors=Config.CHART_JPEG_MIN_COLORS) is None
+                if Config.CHART_LOSSY and img.mode == "RGB" and many_colors:
+                    # Photo-like content: JPEG artifacts are not visible on gradients/photos (unlike on text and thin lines)
+                    buf = io.BytesIO()
+                    img.save(buf, format="JPEG", quality=Config.CHART_JPEG_QUALITY, optimize=True)
+                    candidates.append(("jpeg", buf.getvalue()))
+
+            fmt, data = min(candidates, key=lambda c: len(c[1]))
+            if len(data) >= len(original):
+                return {**artifact, "original_size": len(original)}
+            return {
+                **artifact,
+                "format": fmt,
+                "mime": f"image/{fmt}",
+                "data": data,
+                "width": img.width,
+                "height": img.height,
+                "original_size": len(original),
+            }
+        except Exception as e:
+            print(f"⚠️ Image optimize error ({artifact.get('name')}): {e}")
+            return artifact
+
+    @staticmethod
+    def _png(img):
+        buf = io.BytesIO()
+        img.save(buf, format="PNG", optimize=True)
+        return buf.getvalue()
+
+    @staticmethod
+    def dedupe(chart_map):
+        """
+        {category: [artifacts]} with identical images removed inside a category and shared (same object)
+        across categories. Returns (chart_map, number of duplicates found).
+        """
+        seen, duplicates, out = {}, 0, {}
+        for category, charts in (chart_map or {}).items():
+            charts = charts if isinstance(charts, list) else [charts]
+            kept, local = [], set()
+            for chart in charts:
+                if not isinstance(chart, dict) or not chart.get("data"):
+                    kept.append(chart)
+                    continue
+                digest = hashlib.sha256(chart["data"]).hexdigest()
+                if digest in seen:
+                    duplicates += 1
+                    if digest in local:
+                        continue
+                    chart = seen[digest]
+                seen.setdefault(digest, chart)
+                local.add(digest)
+                kept.append(chart)
+            out[category] = kept
+        return out, duplicates
+
+    @staticmethod
+    def report(chart_map, duplicates=0):
+        """Prints total chart size before/after optimization."""
+        charts = [c for charts in (chart_map or {}).values() for c in (charts if isinstance(charts, list) else [charts])
+                  if isinstance(c, dict) and c.get("data")]
+        if not charts:
+            return
+        after = sum(len(c["data"]) for c in charts)
+        before = sum(c.get("original_size", len(c["data"])) for c in charts)
+        saved = (1 - after / before) * 100 if before else 0
+        print(f"🖼️ Charts: {len(charts)} images, {before / 1024:.0f} KB -> {after / 1024:.0f} KB (-{saved:.0f}%)"
+              f"{f', {duplicates} duplicate(s)' if duplicates else ''}")
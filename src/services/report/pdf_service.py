@@ -1,6 +1,18 @@
 import os
+import io
+import re
+import html
 import base64
-from weasyprint import HTML, CSS
+import shutil
+import tempfile
+
+from src.config import Config
+
+try:
+    from pypdf import PdfWriter  # Tùy chọn: ghép PDF từng section (thiếu thì render một lượt như cũ)
+    _PYPDF_AVAILABLE = True
+except ImportError:
+    _PYPDF_AVAILABLE = False
 
 class PDFService:
     @staticmethod
@@ -13,6 +25,17 @@ class PDFService:
             print(f"⚠️ Image read error ({path}): {e}")
             return None
 
+    @staticmethod
+    def _chart_data_uri(chart):
+        """Chart artifact (in-memory bytes + mime, see chart_renderer) -> data URI. Plain file paths still work."""
+        if isinstance(chart, dict) and chart.get("data"):
+            b64 = base64.b64encode(chart["data"]).decode("utf-8")
+            return f"data:{chart.get('mime', 'image/png')};base64,{b64}"
+        if isinstance(chart, str) and os.path.exists(chart):
+            b64 = PDFService._read_file_as_base64(chart)
+            return f"data:image/png;base64,{b64}" if b64 else None
+        return None
+
     @staticmethod
     def _ensure_font():
         """Downloads Roboto font if missing to support Vietnamese."""
@@ -26,8 +49,8 @@ class PDFService:
             print("⬇️ Downloading Roboto font for Vietnamese support...")
             url = "https://github.com/google/fonts/raw/main/ofl/roboto/Roboto-Regular.ttf"
             try:
-                import requests
-                response = requests.get(url)
+                from src.services.http_client import HttpClient
+                response = HttpClient.get(url, timeout=60)
                 with open(font_path, "wb") as f:
                     f.write(response.content)
                 print("✅ Font downloaded.")
@@ -37,15 +60,8 @@ class PDFService:
         return os.path.abspath(font_path)
 
     @staticmethod
-    def generate_report(results, chart_map=None):
-        """
-        Generates a PDF report using WeasyPrint with Premium Magazine Style.
-        """
-        if not chart_map:
-            chart_map = {}
-
-        # Ensure Font
-        font_path = PDFService._ensure_font()
+    def build_css(font_path=None):
+        """Premium Magazine Style stylesheet (the same for every report; compiled once by the PDF worker)."""
         font_css = ""
         if font_path:
             font_css = f"""
@@ -280,23 +296,34 @@ class PDFService:
             /* --- LINKS --- */
             a {{ color: #2980b9; text-decoration: none; font-weight: 500; }}
         """
+        return css_string
 
-        # 2. Build HTML Content
+    @staticmethod
+    def _report_time():
         from datetime import datetime
         import pytz
         vn_tz = pytz.timezone('Asia/Ho_Chi_Minh')
-        now_dt = datetime.now(vn_tz)
-        date_str = now_dt.strftime('%d/%m/%Y')
-        time_str = now_dt.strftime('%H:%M')
+        return datetime.now(vn_tz)
 
-        html_body = f"""
+    @staticmethod
+    def _document(body, head=""):
+        return f"""
         <!DOCTYPE html>
         <html>
         <head>
             <meta charset="UTF-8">
-            <title>Daily Report</title>
+            <title>Daily Report</title>{head}
         </head>
-        <body>
+        <body>{body}
+        </body>
+        </html>
+        """
+
+    @staticmethod
+    def _cover_html(now_dt):
+        date_str = now_dt.strftime('%d/%m/%Y')
+        time_str = now_dt.strftime('%H:%M')
+        return f"""
             <!-- COVER PAGE -->
             <div class="cover-page">
                 <div style="flex: 1; display: flex; align-items: center;">
@@ -318,63 +345,176 @@ class PDFService:
             </div>
         """
 
+    @staticmethod
+    def _section_html(res, chart_map):
+        cat = res.get("category", "unknown").upper()
+        content = res.get("content", "")
+
+        # Start New Section
+        section_html = f"""
+        <div class="content-section">
+            <h1 class="section-header">{cat}</h1>
+            {content}
+        """
+
+        # Embed Chart(s)
+        c_val = chart_map.get(res.get("category"))
+
+        # Normalize to list
+        charts = []
+        if isinstance(c_val, list):
+            charts = c_val
+        elif c_val:
+            charts = [c_val]
+
+        if charts:
+            section_html += '<div class="chart-grid">'
+            for chart in charts:
+                data_uri = PDFService._chart_data_uri(chart)
+                if data_uri:
+                     section_html += f"""
+                        <div class="chart-item">
+                            <img class="chart-img" src="{data_uri}" />
+                        </div>
+                    """
+            section_html += '</div>'
+
+        section_html += "</div>" # Close content-section
+        return section_html
+
+    @staticmethod
+    def build_html(results, chart_map=None):
+        """Report HTML (cover + one section per result, charts embedded as data URIs). Returns (html, report datetime)."""
+        if not chart_map:
+            chart_map = {}
+        now_dt = PDFService._report_time()
+
         # Category Pages
+        body = PDFService._cover_html(now_dt) + "".join(PDFService._section_html(res, chart_map) for res in results)
+        return PDFService._document(body), now_dt
+
+    @staticmethod
+    def _section_footer(cat):
+        # Sections are laid out separately, so page numbers restart per section: "FINANCE · 2/3"
+        label = html.escape(cat.upper()).replace('"', "")
+        return f"""
+            <style>
+                @page {{ @bottom-right {{ content: "{label} · " counter(page) "/" counter(pages); }} }}
+            </style>"""
+
+    @staticmethod
+    def build_section_documents(results, chart_map=None):
+        """One standalone document per page group: [(name, html)] for the cover and every section."""
+        if not chart_map:
+            chart_map = {}
+        now_dt = PDFService._report_time()
+        docs = [("cover", PDFService._document(PDFService._cover_html(now_dt)))]
         for res in results:
-            cat = res.get("category", "unknown").upper()
-            content = res.get("content", "")
-            
-            # Start New Section
-            html_body += f"""
-            <div class="content-section">
-                <h1 class="section-header">{cat}</h1>
-                {content}
-            """
-            
-            # Embed Chart(s)
-            c_val = chart_map.get(res.get("category"))
-            
-            # Normalize to list
-            c_paths = []
-            if isinstance(c_val, list):
-                c_paths = c_val
-            elif isinstance(c_val, str):
-                c_paths = [c_val]
-                
-            if c_paths:
-                html_body += '<div class="chart-grid">'
-                for c_path in c_paths:
-                    if c_path and os.path.exists(c_path):
-                        b64_img = PDFService._read_file_as_base64(c_path)
-                        if b64_img:
-                             html_body += f"""
-                                <div class="chart-item">
-                                    <img class="chart-img" src="data:image/png;base64,{b64_img}" />
-                                </div>
-                            """
-                html_body += '</div>'
-            
-            html_body += "</div>" # Close content-section
+            cat = res.get("category", "unknown")
+            docs.append((cat, PDFService._document(PDFService._section_html(res, chart_map), PDFService._section_footer(cat))))
+        return docs, now_dt
 
-        html_body += """
-        </body>
-        </html>
+    @staticmethod
+    def _fallback_section_document(res):
+        """Plain-text version of a section whose HTML failed to render (tags stripped, no charts)."""
+        cat = res.get("category", "unknown")
+        text = html.unescape(re.sub(r"<[^>]+>", " ", res.get("content", "")))
+        text = re.sub(r"[ \t]+", " ", text).strip() or "Không có nội dung."
+        body = f"""
+        <div class="content-section">
+            <h1 class="section-header">{html.escape(cat.upper())}</h1>
+            <div class="alert">⚠️ Mục này không hiển thị được định dạng gốc, nội dung được giữ dạng văn bản.</div>
+            <div class="card"><div style="white-space: pre-wrap;">{html.escape(text)}</div></div>
+        </div>"""
+        return PDFService._document(body, PDFService._section_footer(cat))
+
+    @staticmethod
+    def merge_pdfs(parts, pdf_path):
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(io.BytesIO(part))
+        with open(pdf_path, "wb") as f:
+            writer.write(f)
+        writer.close()
+
+    @staticmethod
+    def _render_sections(results, chart_map, pdf_path, worker):
+        """
+        Lays out the cover and each section in parallel worker processes, then merges the pages.
+        A section that fails is re-rendered as plain text; only that section loses its formatting.
+        Returns pdf_path, or None if the report could not be assembled, including when a plain-text
+        retry fails too (caller renders in one pass rather than shipping a report without that section).
         """
+        docs, _ = PDFService.build_section_documents(results, chart_map)
+        print(f"⏳ Rendering PDF: {len(docs)} parts in parallel...")
+        parts = worker.render_documents([doc for _, doc in docs])
+
+        failed = [i for i, part in enumerate(parts) if part is None and i > 0]
+        if parts[0] is None or (results and len(failed) == len(results)):
+            return None  # Nothing section-specific: the renderer itself is failing
+        if failed:
+            print(f"⚠️ Sections failed to render, using plain text: {', '.join(docs[i][0] for i in failed)}")
+            retries = worker.render_documents([PDFService._fallback_section_document(results[i - 1]) for i in failed])
+            for i, part in zip(failed, retries):
+                parts[i] = part
+            lost = [docs[i][0] for i in failed if parts[i] is None]
+            if lost:
+                print(f"❌ Sections lost after plain-text retry: {', '.join(lost)}. Rendering in one pass.")
+                return None
+
+        try:
+            PDFService.merge_pdfs([part for part in parts if part], pdf_path)
+            return pdf_path
+        except Exception as e:
+            print(f"❌ PDF Merge Error: {e}")
+            return None
+
+    @staticmethod
+    def render_pdf(html_body, css_string, pdf_path):
+        """Cold path: imports WeasyPrint, parses the stylesheet and loads the fonts for this one document."""
+        from weasyprint import HTML, CSS
+        from weasyprint.text.fonts import FontConfiguration
+
+        font_config = FontConfiguration()
+        HTML(string=html_body, base_url=".").write_pdf(
+            pdf_path,
+            stylesheets=[CSS(string=css_string, font_config=font_config)],
+            font_config=font_config
+        )
+
+    @staticmethod
+    def generate_report(results, chart_map=None, output_dir=None, worker=None):
+        """
+        Generates a PDF report using WeasyPrint with Premium Magazine Style.
+        chart_map: {category: chart artifact or list of artifacts}.
+        worker: a started PDFRenderWorker (warm WeasyPrint + compiled stylesheet); falls back to the cold path.
+        The PDF goes to `output_dir`, or to a fresh temp dir so concurrent runs never collide.
+        """
+        html_body, now_dt = PDFService.build_html(results, chart_map)
 
         # 3. Generate PDF
-        output_dir = "output"
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+        temp_dir = None
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            output_dir = temp_dir = tempfile.mkdtemp(prefix="daily_report_")
             
         file_date = now_dt.strftime('%Y-%m-%d')
         pdf_path = os.path.join(output_dir, f"Daily_Report_{file_date}.pdf")
+
+        if worker and Config.PDF_SECTION_RENDER and _PYPDF_AVAILABLE:
+            if PDFService._render_sections(results, chart_map, pdf_path, worker):
+                return pdf_path
+        if worker and worker.render(html_body, pdf_path):
+            return pdf_path
         
         try:
             print("⏳ Rendering PDF with WeasyPrint (Standard Layout)...")
-            HTML(string=html_body, base_url=".").write_pdf(
-                pdf_path, 
-                stylesheets=[CSS(string=css_string)]
-            )
+            PDFService.render_pdf(html_body, PDFService.build_css(PDFService._ensure_font()), pdf_path)
             return pdf_path
         except Exception as e:
              print(f"❌ PDF Write Error: {e}")
+             # The caller only cleans up the folder of a returned PDF
+             if temp_dir:
+                 shutil.rmtree(temp_dir, ignore_errors=True)
              return None
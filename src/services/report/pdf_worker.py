@@ -0,0 +1,128 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.config import Config
+
+# Per worker process: WeasyPrint classes, the compiled stylesheet and its font configuration
+_state = {}
+
+
+def _init_worker():
+    """Runs once when the worker process starts: import WeasyPrint, load fonts, compile the stylesheet."""
+    started = time.monotonic()
+    from weasyprint import HTML, CSS
+    from weasyprint.text.fonts import FontConfiguration
+    from src.services.report.pdf_service import PDFService
+
+    font_config = FontConfiguration()
+    css = CSS(string=PDFService.build_css(PDFService._ensure_font()), font_config=font_config)
+    _state.update(HTML=HTML, css=css, font_config=font_config)
+    print(f"🖨️ PDF worker ready ({time.monotonic() - started:.1f}s)")
+
+
+def _render_job(html_body, pdf_path, base_url="."):
+    started = time.monotonic()
+    _state["HTML"](string=html_body, base_url=base_url).write_pdf(
+        pdf_path, stylesheets=[_state["css"]], font_config=_state["font_config"]
+    )
+    return time.monotonic() - started
+
+
+def _render_bytes(html_body, base_url="."):
+    """Lays out one document and returns the PDF bytes (sections are merged by the parent)."""
+    return _state["HTML"](string=html_body, base_url=base_url).write_pdf(
+        stylesheets=[_state["css"]], font_config=_state["font_config"]
+    )
+
+
+def _noop():
+    return None
+
+
+class PDFRenderWorker:
+    """
+    Long-lived PDF render processes. WeasyPrint is imported, the fonts loaded and the report stylesheet
+    compiled once per process at start-up (overlapping data fetching); render jobs then go through the pool's queue.
+    render() returns False on any failure so the caller can use the cold path (PDFService.render_pdf);
+    render_documents() lays out several documents (report sections) in parallel.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = Config.PDF_RENDER_WORKERS if workers is None else workers
+        self._pool = None
+        if Config.PDF_RENDER_WORKER and self.workers > 0:
+            try:
+                # spawn: the parent already runs threads and an event loop, forking it is not safe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+                )
+            except (OSError, NotImplementedError, ValueError) as e:
+                print(f"⚠️ PDF worker unavailable, rendering inline: {e}")
+
+    def warm_up(self):
+        """Starts the worker now so its start-up cost is paid while the rest of the pipeline runs."""
+        if self._pool:
+            for _ in range(self.workers):
+                self._pool.submit(_noop)
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        """Blocks until the worker has finished start-up; False if it is disabled or failed to start."""
+        if not self._pool:
+            return False
+        try:
+            for future in [self._pool.submit(_noop) for _ in range(self.workers)]:
+                future.result(timeout=Config.PDF_RENDER_TIMEOUT if timeout is None else timeout)
+            return True
+        except Exception as e:
+            print(f"⚠️ PDF worker failed to start: {e}")
+            return False
+
+    def render(self, html_body: str, pdf_path: str, timeout: float = None) -> bool:
+        if not self._pool:
+            return False
+        timeout = Config.PDF_RENDER_TIMEOUT if timeout is None else timeout
+        try:
+            elapsed = self._pool.submit(_render_job, html_body, pdf_path).result(timeout=timeout)
+            print(f"✅ PDF rendered by warm worker ({elapsed:.1f}s)")
+            return True
+        except BrokenProcessPool as e:
+            # Start-up failed (e.g. WeasyPrint system libraries missing) or the worker died
+            print(f"⚠️ PDF worker broken, using cold render: {e}")
+            self._pool = None
+        except Exception as e:
+            print(f"⚠️ PDF worker render error, using cold render: {e}")
+        return False
+
+    def render_documents(self, documents, timeout: float = None):
+        """PDF bytes for each HTML document, in order; None for a document that failed or timed out."""
+        if not self._pool:
+            return [None] * len(documents)
+        deadline = time.monotonic() + (Config.PDF_RENDER_TIMEOUT if timeout is None else timeout)
+        try:
+            futures = [self._pool.submit(_render_bytes, document) for document in documents]
+        except (BrokenProcessPool, RuntimeError) as e:
+            print(f"⚠️ PDF worker broken: {e}")
+            self._pool = None
+            return [None] * len(documents)
+
+        parts = []
+        for i, future in enumerate(futures):
+            try:
+                parts.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except BrokenProcessPool as e:
+                print(f"⚠️ PDF worker broken: {e}")
+                self._pool = None
+                parts.extend([None] * (len(futures) - i))
+                break
+            except Exception as e:
+                print(f"⚠️ PDF part {i} render error: {e}")
+                future.cancel()
+                parts.append(None)
+        return parts
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
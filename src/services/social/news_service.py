@@ -1,13 +1,13 @@
-import requests
-import os
 from src.config import Config
+from src.services.http_client import HttpClient
+from src.services.report.chart_renderer import chart_spec, chart_artifact
 
 class NewsService:
     @staticmethod
     def _fetch_from_worker(path, params=None):
         try:
             url = f"{Config.WORKER_HOST.rstrip('/')}{path}"
-            res = requests.get(url, params=params, timeout=20)
+            res = HttpClient.get(url, params=params, timeout=20, ttl=Config.HTTP_CACHE_TTL["worker"])
             res.raise_for_status()
             return res.json()
         except Exception as e:
@@ -43,12 +43,6 @@ class NewsService:
                 try: traffic.append(int(tf_str))
                 except: traffic.append(0)
             
-            # Create Output Dir
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            chart_path = os.path.join(output_dir, "trend_chart.png")
-
             # Dynamic Height: Base 2 + 0.5 per item. For 15 items -> ~9.5 inch height
             fig_height = max(6, len(chart_data) * 0.5 + 2)
             
@@ -69,8 +63,7 @@ class NewsService:
                          ha='left', va='center', fontweight='bold')
 
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "trend_chart")
         except Exception as e:
             print(f"⚠️ Trend Chart Error: {e}")
             return None
@@ -79,16 +72,14 @@ class NewsService:
     def fetch_trends(limit=30):
         data = NewsService._fetch_from_worker("/trends", params={"limit": limit})
         if not data or 'data' not in data:
-            return {"text": "Không lấy được Google Trends.", "chart_path": None}
+            return {"text": "Không lấy được Google Trends.", "charts": []}
         
         trends_list = data['data']
         trends_text = []
         for entry in trends_list:
             trends_text.append(f"- {entry['title']} ({entry['traffic']} lượt tìm): {entry['link']}")
         
-        chart_path = NewsService._generate_trend_chart(trends_list)
-        
         return {
             "text": "\n".join(trends_text),
-            "chart_path": chart_path
+            "charts": [chart_spec("trends", trends_list)]
         }
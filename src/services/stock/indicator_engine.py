@@ -0,0 +1,144 @@
+import numpy as np
+
+
+class IndicatorEngine:
+    """
+    Batch technical-indicator engine.
+    All symbols are packed into one aligned 2D array (rows = symbols, columns = bars, oldest -> newest,
+    right-aligned so the latest bar of every symbol sits in the last column; shorter histories are
+    NaN-padded on the left). Every indicator is then computed for the whole universe at once.
+    """
+    MA_WINDOWS = (20, 50, 200)
+    VOLUME_WINDOW = 20
+    RSI_PERIOD = 14
+    MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+    BB_WINDOW, BB_STD = 20, 2.0
+    ATR_PERIOD = 14
+
+    @staticmethod
+    def _value(item, *keys):
+        for key in keys:
+            v = item.get(key)
+            if v:
+                return float(v)
+        return np.nan
+
+    @staticmethod
+    def build_matrix(histories):
+        """
+        histories: {symbol: CafeF rows (newest first)}.
+        Returns (symbols, {"close", "high", "low", "volume"} -> 2D float arrays).
+        """
+        symbols = [s for s, rows in histories.items() if rows]
+        width = max((len(histories[s]) for s in symbols), default=0)
+        fields = {name: np.full((len(symbols), width), np.nan) for name in ("close", "high", "low", "volume")}
+
+        for i, symbol in enumerate(symbols):
+            rows = histories[symbol][::-1]  # Oldest -> Newest
+            start = width - len(rows)
+            get = IndicatorEngine._value
+            fields["close"][i, start:] = [get(r, 'GiaDongCua', 'GiaDieuChinh', 'Price') for r in rows]
+            fields["high"][i, start:] = [get(r, 'GiaCaoNhat', 'High') for r in rows]
+            fields["low"][i, start:] = [get(r, 'GiaThapNhat', 'Low') for r in rows]
+            fields["volume"][i, start:] = [get(r, 'KhoiLuongKhopLenh', 'KhoiLuong', 'Volume') for r in rows]
+
+        # Volume 0 is a real value (no trades), not missing
+        fields["volume"] = np.where(np.isnan(fields["volume"]) & ~np.isnan(fields["close"]), 0.0, fields["volume"])
+        return symbols, fields
+
+    @staticmethod
+    def rolling_mean(values, window):
+        """Rolling mean along the bar axis; NaN until a full window of valid values is available."""
+        out = np.full(values.shape, np.nan)
+        if values.shape[1] < window:
+            return out
+        valid = ~np.isnan(values)
+        pad = np.zeros((values.shape[0], 1))
+        sums = np.concatenate([pad, np.cumsum(np.where(valid, values, 0.0), axis=1)], axis=1)
+        counts = np.concatenate([pad, np.cumsum(valid, axis=1)], axis=1)
+        window_sum = sums[:, window:] - sums[:, :-window]
+        window_count = counts[:, window:] - counts[:, :-window]
+        out[:, window - 1:] = np.where(window_count == window, window_sum / window, np.nan)
+        return out
+
+    @staticmethod
+    def rolling_std(values, window):
+        mean = IndicatorEngine.rolling_mean(values, window)
+        mean_sq = IndicatorEngine.rolling_mean(values * values, window)
+        return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+    @staticmethod
+    def smooth(values, period, alpha):
+        """
+        Recursive smoothing (EMA: alpha=2/(n+1), Wilder: alpha=1/n), seeded with the SMA of the
+        first `period` valid values of each row. Vectorised across symbols, one pass over bars.
+        """
+        rows, width = values.shape
+        out = np.full(values.shape, np.nan)
+        valid = ~np.isnan(values)
+        first = np.where(valid.any(axis=1), valid.argmax(axis=1), width)
+        seed_at = first + period - 1
+        seeds = IndicatorEngine.rolling_mean(values, period)
+
+        prev = np.full(rows, np.nan)
+        for t in range(width):
+            current = np.where(t == seed_at, seeds[:, t], prev + alpha * (values[:, t] - prev))
+            current = np.where(t >= seed_at, current, np.nan)
+            out[:, t] = current
+            prev = current
+        return out
+
+    @staticmethod
+    def compute_arrays(fields):
+        close, high, low, volume = fields["close"], fields["high"], fields["low"], fields["volume"]
+        E = IndicatorEngine
+        out = {}
+
+        for w in E.MA_WINDOWS:
+            out[f"ma{w}"] = E.rolling_mean(close, w)
+        out[f"vol{E.VOLUME_WINDOW}"] = E.rolling_mean(volume, E.VOLUME_WINDOW)
+
+        # RSI (Wilder)
+        delta = np.full(close.shape, np.nan)
+        delta[:, 1:] = np.diff(close, axis=1)
+        gain = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+        loss = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+        avg_gain = E.smooth(gain, E.RSI_PERIOD, 1.0 / E.RSI_PERIOD)
+        avg_loss = E.smooth(loss, E.RSI_PERIOD, 1.0 / E.RSI_PERIOD)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        out["rsi"] = np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, rsi)
+
+        # MACD
+        ema_fast = E.smooth(close, E.MACD_FAST, 2.0 / (E.MACD_FAST + 1))
+        ema_slow = E.smooth(close, E.MACD_SLOW, 2.0 / (E.MACD_SLOW + 1))
+        out["macd"] = ema_fast - ema_slow
+        out["macd_signal"] = E.smooth(out["macd"], E.MACD_SIGNAL, 2.0 / (E.MACD_SIGNAL + 1))
+        out["macd_hist"] = out["macd"] - out["macd_signal"]
+
+        # Bollinger Bands
+        mid = E.rolling_mean(close, E.BB_WINDOW)
+        std = E.rolling_std(close, E.BB_WINDOW)
+        out["bb_middle"] = mid
+        out["bb_upper"] = mid + E.BB_STD * std
+        out["bb_lower"] = mid - E.BB_STD * std
+
+        # ATR (Wilder)
+        prev_close = np.full(close.shape, np.nan)
+        prev_close[:, 1:] = close[:, :-1]
+        with np.errstate(invalid="ignore"):
+            tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        out["atr"] = E.smooth(tr, E.ATR_PERIOD, 1.0 / E.ATR_PERIOD)
+        return out
+
+    @staticmethod
+    def compute(histories):
+        """Returns {symbol: {indicator: latest value (float, NaN if not enough bars)}}."""
+        symbols, fields = IndicatorEngine.build_matrix(histories)
+        if not symbols:
+            return {}
+        arrays = IndicatorEngine.compute_arrays(fields)
+        arrays["close"] = fields["close"]
+        arrays["volume"] = fields["volume"]
+        latest = {name: values[:, -1] for name, values in arrays.items()}
+        return {symbol: {name: float(col[i]) for name, col in latest.items()} for i, symbol in enumerate(symbols)}
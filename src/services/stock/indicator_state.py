@@ -0,0 +1,284 @@
+import json
+import math
+import threading
+from collections import deque
+
+from src.services.stock.indicator_engine import IndicatorEngine
+from src.services.stock.price_store import PriceHistoryStore
+
+NAN = float("nan")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS indicator_state (
+    symbol TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    last_date TEXT,
+    state TEXT NOT NULL
+)
+"""
+
+
+def _fmax(a, b):
+    # NaN-ignoring max, same as np.fmax
+    if math.isnan(a):
+        return b
+    if math.isnan(b):
+        return a
+    return max(a, b)
+
+
+class _Window:
+    """Fixed-size window with running sum / sum of squares over valid values."""
+
+    def __init__(self, size, values=None):
+        self.size = size
+        self.values = deque(values or [], maxlen=size)
+        valid = [v for v in self.values if not math.isnan(v)]
+        self.count = len(valid)
+        self.total = sum(valid)
+        self.total_sq = sum(v * v for v in valid)
+
+    def push(self, x):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            if not math.isnan(old):
+                self.count -= 1
+                self.total -= old
+                self.total_sq -= old * old
+        self.values.append(x)
+        if not math.isnan(x):
+            self.count += 1
+            self.total += x
+            self.total_sq += x * x
+
+    def mean(self):
+        return self.total / self.size if self.count == self.size else NAN
+
+    def std(self):
+        if self.count != self.size:
+            return NAN
+        mean = self.total / self.size
+        return math.sqrt(max(self.total_sq / self.size - mean * mean, 0.0))
+
+
+class _Smoother:
+    """EMA / Wilder recursion seeded with the SMA of the first `period` values (matches IndicatorEngine.smooth)."""
+
+    def __init__(self, period, alpha, seed=None, value=NAN, started=False):
+        self.period = period
+        self.alpha = alpha
+        self.seed = seed or []
+        self.value = value
+        self.started = started
+
+    def push(self, x):
+        if not self.started:
+            if math.isnan(x):
+                return self.value
+            self.started = True
+        if len(self.seed) < self.period:
+            self.seed.append(x)
+            if len(self.seed) == self.period:
+                self.value = sum(self.seed) / self.period  # NaN if the seed window had a gap
+        else:
+            self.value = self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def to_dict(self):
+        return {"seed": self.seed, "value": self.value, "started": self.started}
+
+    @classmethod
+    def from_dict(cls, period, alpha, d):
+        return cls(period, alpha, seed=d["seed"], value=d["value"], started=d["started"])
+
+
+class IndicatorState:
+    """
+    Incremental indicator state for one symbol; each new bar is applied in O(1):
+    running sums for SMAs / volume / Bollinger, Wilder averages for RSI and ATR, EMA state for MACD.
+    """
+    E = IndicatorEngine
+
+    def __init__(self):
+        E = self.E
+        self.last_date = None
+        self.prev_close = NAN
+        self.close = NAN
+        self.volume = NAN
+        self.ma = {w: _Window(w) for w in E.MA_WINDOWS}
+        self.vol = _Window(E.VOLUME_WINDOW)
+        self.bb = _Window(E.BB_WINDOW)
+        self.smoothers = self._new_smoothers()
+
+    def _new_smoothers(self):
+        E = self.E
+        return {
+            "gain": _Smoother(E.RSI_PERIOD, 1.0 / E.RSI_PERIOD),
+            "loss": _Smoother(E.RSI_PERIOD, 1.0 / E.RSI_PERIOD),
+            "ema_fast": _Smoother(E.MACD_FAST, 2.0 / (E.MACD_FAST + 1)),
+            "ema_slow": _Smoother(E.MACD_SLOW, 2.0 / (E.MACD_SLOW + 1)),
+            "signal": _Smoother(E.MACD_SIGNAL, 2.0 / (E.MACD_SIGNAL + 1)),
+            "atr": _Smoother(E.ATR_PERIOD, 1.0 / E.ATR_PERIOD),
+        }
+
+    def update(self, row):
+        """Applies one CafeF bar (oldest -> newest order)."""
+        get = self.E._value
+        close = get(row, 'GiaDongCua', 'GiaDieuChinh', 'Price')
+        high = get(row, 'GiaCaoNhat', 'High')
+        low = get(row, 'GiaThapNhat', 'Low')
+        volume = get(row, 'KhoiLuongKhopLenh', 'KhoiLuong', 'Volume')
+        if math.isnan(volume) and not math.isnan(close):
+            volume = 0.0
+
+        for window in self.ma.values():
+            window.push(close)
+        self.vol.push(volume)
+        self.bb.push(close)
+
+        delta = close - self.prev_close
+        s = self.smoothers
+        s["gain"].push(NAN if math.isnan(delta) else max(delta, 0.0))
+        s["loss"].push(NAN if math.isnan(delta) else max(-delta, 0.0))
+
+        s["ema_fast"].push(close)
+        s["ema_slow"].push(close)
+        s["signal"].push(s["ema_fast"].value - s["ema_slow"].value)
+
+        tr = _fmax(high - low, _fmax(abs(high - self.prev_close), abs(low - self.prev_close)))
+        s["atr"].push(tr)
+
+        self.prev_close = close
+        self.close = close
+        self.volume = volume
+        self.last_date = PriceHistoryStore._parse_date(row["Ngay"]) if row.get("Ngay") else self.last_date
+
+    def snapshot(self):
+        """Latest values, same keys as IndicatorEngine.compute."""
+        E, s = self.E, self.smoothers
+        out = {f"ma{w}": self.ma[w].mean() for w in E.MA_WINDOWS}
+        out[f"vol{E.VOLUME_WINDOW}"] = self.vol.mean()
+
+        avg_gain, avg_loss = s["gain"].value, s["loss"].value
+        if avg_loss == 0 and not math.isnan(avg_gain):
+            out["rsi"] = 100.0
+        elif avg_loss == 0 or math.isnan(avg_loss) or math.isnan(avg_gain):
+            out["rsi"] = NAN
+        else:
+            out["rsi"] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+        out["macd"] = s["ema_fast"].value - s["ema_slow"].value
+        out["macd_signal"] = s["signal"].value
+        out["macd_hist"] = out["macd"] - out["macd_signal"]
+
+        mid, std = self.bb.mean(), self.bb.std()
+        out["bb_middle"] = mid
+        out["bb_upper"] = mid + E.BB_STD * std
+        out["bb_lower"] = mid - E.BB_STD * std
+        out["atr"] = s["atr"].value
+        out["close"] = self.close
+        out["volume"] = self.volume
+        return out
+
+    def to_json(self):
+        return json.dumps({
+            "last_date": self.last_date,
+            "prev_close": self.prev_close,
+            "close": self.close,
+            "volume": self.volume,
+            "ma": {str(w): list(win.values) for w, win in self.ma.items()},
+            "vol": list(self.vol.values),
+            "bb": list(self.bb.values),
+            "smoothers": {name: sm.to_dict() for name, sm in self.smoothers.items()},
+        })
+
+    @classmethod
+    def from_json(cls, raw):
+        d = json.loads(raw)
+        state = cls()
+        state.last_date = d["last_date"]
+        state.prev_close = d["prev_close"]
+        state.close = d["close"]
+        state.volume = d["volume"]
+        state.ma = {int(w): _Window(int(w), values) for w, values in d["ma"].items()}
+        state.vol = _Window(cls.E.VOLUME_WINDOW, d["vol"])
+        state.bb = _Window(cls.E.BB_WINDOW, d["bb"])
+        fresh = state._new_smoothers()
+        state.smoothers = {
+            name: _Smoother.from_dict(sm.period, sm.alpha, d["smoothers"][name]) for name, sm in fresh.items()
+        }
+        return state
+
+
+class IndicatorStateStore:
+    """Persists IndicatorState per symbol next to the price history and advances it bar by bar."""
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, price_store: PriceHistoryStore):
+        self.prices = price_store
+        with self.prices._connect() as conn:
+            conn.execute(_SCHEMA)
+
+    @classmethod
+    def default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(PriceHistoryStore.default())
+            return cls._default
+
+    def _load(self, symbol):
+        with self.prices._connect() as conn:
+            found = conn.execute("SELECT revision, state FROM indicator_state WHERE symbol = ?", (symbol,)).fetchone()
+        return found
+
+    def _save(self, symbol, revision, state):
+        with self.prices._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO indicator_state (symbol, revision, last_date, state) VALUES (?, ?, ?, ?)",
+                (symbol, revision, state.last_date, state.to_json()),
+            )
+
+    def advance(self, symbol):
+        """
+        Applies every stored bar newer than the persisted state and returns the latest snapshot,
+        or None if the store has no bars for `symbol`. A replaced history (new revision) is replayed from scratch.
+        """
+        revision = self.prices.revision(symbol)
+        found = self._load(symbol)
+        state = IndicatorState.from_json(found[1]) if found and found[0] == revision else IndicatorState()
+
+        new_bars = self.prices.bars_after(symbol, state.last_date)
+        for row in new_bars:
+            state.update(row)
+        if state.last_date is None:
+            return None
+        if new_bars:
+            self._save(symbol, revision, state)
+        return state.snapshot()
+
+    def reset(self, symbol):
+        with self.prices._connect() as conn:
+            conn.execute("DELETE FROM indicator_state WHERE symbol = ?", (symbol,))
+
+    def verify(self, symbol, rtol=1e-6, atol=1e-9):
+        """
+        Verification mode: compares the streaming snapshot with a full IndicatorEngine recompute
+        over the same stored bars. Returns {indicator: (streaming, full)} for every mismatch.
+        """
+        snapshot = self.advance(symbol)
+        bars = self.prices.bars_after(symbol)
+        if snapshot is None or not bars:
+            return {}
+        full = IndicatorEngine.compute({symbol: bars[::-1]})[symbol]
+
+        mismatches = {}
+        for name, expected in full.items():
+            got = snapshot.get(name, NAN)
+            if math.isnan(expected) and math.isnan(got):
+                continue
+            if math.isnan(expected) or math.isnan(got) or not math.isclose(got, expected, rel_tol=rtol, abs_tol=atol):
+                mismatches[name] = (got, expected)
+        if mismatches:
+            print(f"⚠️ Indicator state drift ({symbol}): {mismatches}")
+        return mismatches
@@ -0,0 +1,224 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.config import Config
+
+# CafeF row keys <-> store columns
+_COLUMNS = [
+    ("Ngay", "date"),
+    ("GiaMoCua", "open"),
+    ("GiaCaoNhat", "high"),
+    ("GiaThapNhat", "low"),
+    ("GiaDongCua", "close"),
+    ("GiaDieuChinh", "adj_close"),
+    ("ThayDoi", "change"),
+    ("KhoiLuongKhopLenh", "volume"),
+    ("GiaTriKhopLenh", "value"),
+    ("KLThoaThuan", "deal_volume"),
+    ("GtThoaThuan", "deal_value"),
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,          -- ISO yyyy-mm-dd
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    adj_close REAL,
+    change TEXT,
+    volume REAL,
+    value REAL,
+    deal_volume REAL,
+    deal_value REAL,
+    PRIMARY KEY (symbol, date)
+);
+CREATE TABLE IF NOT EXISTS symbol_meta (
+    symbol TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL DEFAULT 0  -- bumped whenever the history is replaced or a stored bar is rewritten
+);
+"""
+
+
+class PriceHistoryStore:
+    """
+    Local SQLite store of CafeF daily OHLCV bars (incl. adjusted close) per symbol.
+    Only bars after the last stored date are downloaded on a normal day.
+    """
+    CAFEF_DATE_FORMAT = "%d/%m/%Y"
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @classmethod
+    def default(cls):
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(Config.PRICE_STORE_PATH)
+            return cls._default
+
+    @contextmanager
+    def _connect(self):
+        # One connection per call: the store is used from the stock fetch thread pool
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _parse_date(value):
+        return datetime.strptime(value, PriceHistoryStore.CAFEF_DATE_FORMAT).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _to_record(symbol, row):
+        record = {"symbol": symbol}
+        for cafef_key, column in _COLUMNS:
+            record[column] = row.get(cafef_key)
+        record["date"] = PriceHistoryStore._parse_date(row["Ngay"])
+        return record
+
+    @staticmethod
+    def _to_row(record):
+        row = {}
+        for cafef_key, column in _COLUMNS:
+            row[cafef_key] = record[column]
+        row["Ngay"] = datetime.strptime(record["date"], "%Y-%m-%d").strftime(PriceHistoryStore.CAFEF_DATE_FORMAT)
+        return row
+
+    def last_date(self, symbol):
+        with self._connect() as conn:
+            cur = conn.execute("SELECT MAX(date) FROM daily_bars WHERE symbol = ?", (symbol,))
+            value = cur.fetchone()[0]
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+    def _stored_adj_close(self, symbol, iso_date):
+        with self._connect() as conn:
+            cur = conn.execute("SELECT adj_close FROM daily_bars WHERE symbol = ? AND date = ?", (symbol, iso_date))
+            found = cur.fetchone()
+        return found[0] if found else None
+
+    def upsert(self, symbol, rows, replace=False):
+        records = []
+        for row in rows:
+            try:
+                records.append(self._to_record(symbol, row))
+            except (KeyError, TypeError, ValueError):
+                continue  # Skip rows without a valid date
+        if not records:
+            return 0
+
+        columns = ["symbol"] + [column for _, column in _COLUMNS]
+        placeholders = ", ".join("?" for _ in columns)
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM daily_bars WHERE symbol = ?", (symbol,))
+            # A new revision makes derived state (IndicatorStateStore) replay the history:
+            # it cannot undo a bar it already applied, e.g. an intraday bar corrected by sync()
+            if replace or self._rewrites_stored_bar(conn, symbol, records):
+                conn.execute(
+                    "INSERT INTO symbol_meta (symbol, revision) VALUES (?, 1) "
+                    "ON CONFLICT(symbol) DO UPDATE SET revision = revision + 1",
+                    (symbol,),
+                )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO daily_bars ({', '.join(columns)}) VALUES ({placeholders})",
+                [tuple(r[c] for c in columns) for r in records],
+            )
+        return len(records)
+
+    @staticmethod
+    def _rewrites_stored_bar(conn, symbol, records):
+        """True if any record changes the values of a bar that is already stored."""
+        columns = [column for _, column in _COLUMNS if column != "date"]
+        for record in records:
+            stored = conn.execute(
+                f"SELECT {', '.join(columns)} FROM daily_bars WHERE symbol = ? AND date = ?",
+                (symbol, record["date"]),
+            ).fetchone()
+            if stored is None:
+                continue
+            for column, old_value in zip(columns, stored):
+                new_value = record[column]
+                if old_value is None or new_value is None:
+                    if old_value != new_value:
+                        return True
+                elif isinstance(old_value, str) or isinstance(new_value, str):
+                    if str(old_value) != str(new_value):
+                        return True
+                elif abs(float(new_value) - float(old_value)) > 1e-9:
+                    return True
+        return False
+
+    def load(self, symbol, limit=300):
+        """Returns stored bars as CafeF-style dicts, newest first (same shape as the API)."""
+        columns = [column for _, column in _COLUMNS]
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"SELECT {', '.join(columns)} FROM daily_bars WHERE symbol = ? ORDER BY date DESC LIMIT ?",
+                (symbol, limit),
+            )
+            return [self._to_row(dict(zip(columns, values))) for values in cur.fetchall()]
+
+    def bars_after(self, symbol, iso_date=None):
+        """Stored bars strictly after `iso_date` (all bars if None), oldest first."""
+        columns = [column for _, column in _COLUMNS]
+        with self._connect() as conn:
+            cur = conn.execute(
+                f"SELECT {', '.join(columns)} FROM daily_bars WHERE symbol = ? AND date > ? ORDER BY date ASC",
+                (symbol, iso_date or ""),
+            )
+            return [self._to_row(dict(zip(columns, values))) for values in cur.fetchall()]
+
+    def revision(self, symbol):
+        with self._connect() as conn:
+            found = conn.execute("SELECT revision FROM symbol_meta WHERE symbol = ?", (symbol,)).fetchone()
+        return found[0] if found else 0
+
+    def sync(self, symbol, download, full_size=300):
+        """
+        Brings `symbol` up to date. `download(symbol, page_size, start_date)` returns CafeF rows.
+        Re-downloads the first stored-overlap bar to detect corporate actions: if its adjusted
+        close changed, the whole adjusted history is stale and gets replaced.
+        """
+        last = self.last_date(symbol)
+        if last is None or (datetime.now() - last).days > full_size:
+            rows = download(symbol, full_size, None)
+            return self.upsert(symbol, rows, replace=True)
+
+        # Inclusive of the last stored date (overlap row); weekends make this an upper bound
+        page_size = max(2, (datetime.now() - last).days + 1)
+        rows = download(symbol, page_size, last.strftime(self.CAFEF_DATE_FORMAT))
+        if not rows:
+            return 0
+
+        last_iso = last.strftime("%Y-%m-%d")
+        new_rows = []
+        for row in rows:
+            try:
+                iso = self._parse_date(row["Ngay"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if iso == last_iso:
+                stored = self._stored_adj_close(symbol, last_iso)
+                fresh = row.get("GiaDieuChinh")
+                if stored is not None and fresh is not None and abs(float(fresh) - float(stored)) > 1e-6:
+                    print(f"🔁 Price adjustment detected for {symbol}, reloading full history.")
+                    return self.upsert(symbol, download(symbol, full_size, None), replace=True)
+            if iso >= last_iso:
+                new_rows.append(row)  # Overlap row is rewritten too, in case it was an intraday bar
+
+        return self.upsert(symbol, new_rows)
@@ -1,17 +1,20 @@
-import requests
-import urllib3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from src.config import Config
 from src.services.watchlist_service import WatchlistService
-import pandas as pd
+from src.services.http_client import HttpClient
+from src.services.report.chart_renderer import chart_spec, chart_artifact
+from src.services.stock.price_store import PriceHistoryStore
+from src.services.stock.indicator_engine import IndicatorEngine
+from src.services.stock.indicator_state import IndicatorStateStore
 import numpy as np
 
 class StockService:
     @staticmethod
-    def _fetch_stock_history(symbol, page_size=300):
+    def _download_history(symbol, page_size=300, start_date=None):
         try:
-            # Fetch more data for history (PageSize=300 for >200 days for MA200)
-            url = f"https://cafef.vn/du-lieu/Ajax/PageNew/DataHistory/PriceHistory.ashx?Symbol={symbol}&StartDate=&EndDate=&PageIndex=1&PageSize={page_size}"
+            # start_date (dd/mm/yyyy) limits the download to bars from that day on
+            url = f"https://cafef.vn/du-lieu/Ajax/PageNew/DataHistory/PriceHistory.ashx?Symbol={symbol}&StartDate={start_date or ''}&EndDate=&PageIndex=1&PageSize={page_size}"
             headers = {
                 "Connection": "keep-alive",
                 "Pragma": "no-cache",
@@ -27,7 +30,7 @@ class StockService:
                 "Referer": "https://s.cafef.vn/Lich-su-giao-dich-VNINDEX-1.chn",
                 "Accept-Language": "vi,en-US;q=0.9,en;q=0.8"
             }
-            res = requests.get(url, headers=headers, timeout=90, verify=False)
+            res = HttpClient.get(url, headers=headers, timeout=90, verify=False, ttl=Config.HTTP_CACHE_TTL["price_history"])
             if res.status_code == 200:
                 data = res.json()
                 if isinstance(data, dict):
@@ -40,55 +43,81 @@ class StockService:
             print(f"⚠️ CafeF History Error ({symbol}): {e}")
             return []
 
+    @staticmethod
+    def _fetch_stock_history(symbol, page_size=300):
+        # PageSize=300 for >200 days for MA200; served from the local store, only new bars are downloaded
+        try:
+            store = PriceHistoryStore.default()
+            store.sync(symbol, StockService._download_history, full_size=page_size)
+            history = store.load(symbol, limit=page_size)
+            if history:
+                return history
+        except Exception as e:
+            print(f"⚠️ Price Store Error ({symbol}): {e}")
+        return StockService._download_history(symbol, page_size)
+
+    @staticmethod
+    def _normalize_symbol(symbol):
+        # "FPT.VN" -> "FPT", "^VNINDEX" -> "VNINDEX"
+        return symbol.strip().replace("^", "").split(".")[0].upper()
+
+    @staticmethod
+    def fetch_histories(symbols, max_workers=None):
+        """
+        Downloads history for each unique symbol once per run, with bounded concurrency.
+        Returns {normalized_symbol: history_rows}.
+        """
+        unique = list(dict.fromkeys(StockService._normalize_symbol(s) for s in symbols if s and s.strip()))
+        if not unique:
+            return {}
+
+        workers = min(max_workers or Config.STOCK_FETCH_CONCURRENCY, len(unique))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stock-history") as pool:
+            return dict(zip(unique, pool.map(StockService._fetch_stock_history, unique)))
+
+    @staticmethod
+    def _compute_indicators(histories):
+        """
+        Latest indicators per symbol. Uses the persisted streaming state (O(1) per new bar);
+        symbols without stored bars, or that fail verification, fall back to a full IndicatorEngine pass.
+        """
+        usable = {s: h for s, h in histories.items() if h and len(h) >= 30}
+        indicators = {}
+        try:
+            states = IndicatorStateStore.default()
+            for symbol in usable:
+                if Config.INDICATOR_VERIFY and states.verify(symbol):
+                    states.reset(symbol)  # Drifted: rebuild from scratch next run
+                    continue
+                snapshot = states.advance(symbol)
+                if snapshot:
+                    indicators[symbol] = snapshot
+        except Exception as e:
+            print(f"⚠️ Indicator State Error: {e}")
+
+        missing = {s: h for s, h in usable.items() if s not in indicators}
+        if missing:
+            indicators.update(IndicatorEngine.compute(missing))
+        return indicators
+
+    @staticmethod
+    def _indicator_view(ind):
+        return ind["rsi"], ind["ma20"], ind["ma50"], ind["ma200"], ind["vol20"]
+
     @staticmethod
     def calculate_technical_indicators(history_data):
-        
+        """Per-symbol view over IndicatorEngine: (rsi, ma20, ma50, ma200, vol_avg20)."""
         if not history_data or len(history_data) < 30:
             return None, None, None, None, None
-            
-        # Extract prices and volumes
-        prices = []
-        volumes = []
-        for item in history_data:
-            p = item.get('GiaDongCua') or item.get('GiaDieuChinh') or item.get('Price') or 0
-            v = item.get('KhoiLuongKhopLenh') or item.get('KhoiLuong') or item.get('Volume') or 0
-            prices.append(float(p))
-            volumes.append(float(v))
-        
-        prices.reverse() # Oldest -> Newest
-        volumes.reverse()
-        
-        df = pd.DataFrame({'close': prices, 'volume': volumes})
-        
-        # Calculate MAs
-        df['ma20'] = df['close'].rolling(window=20).mean()
-        df['ma50'] = df['close'].rolling(window=50).mean()
-        df['ma200'] = df['close'].rolling(window=200).mean()
-        
-        # Calculate Volume Avg (20)
-        df['vol20'] = df['volume'].rolling(window=20).mean()
-        
-        # Calculate RSI 14
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        latest_ma20 = df['ma20'].iloc[-1]
-        latest_ma50 = df['ma50'].iloc[-1]
-        latest_ma200 = df['ma200'].iloc[-1]
-        latest_rsi = df['rsi'].iloc[-1]
-        latest_vol_avg = df['vol20'].iloc[-1]
-        
-        return latest_rsi, latest_ma20, latest_ma50, latest_ma200, latest_vol_avg
+
+        ind = IndicatorEngine.compute({"_": history_data})["_"]
+        return StockService._indicator_view(ind)
 
     @staticmethod
     def _generate_portfolio_chart(portfolio_data):
         try:
             from matplotlib.figure import Figure
             from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
-            import os
             
             # portfolio_data = list of (Symbol, CurrentVal, CostVal, ProfitVal)
             if not portfolio_data: return None
@@ -96,12 +125,6 @@ class StockService:
             symbols = [x[0] for x in portfolio_data]
             current_vals = [x[1]/1000000 for x in portfolio_data] # Million VND
             
-            # Create Output Dir
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            chart_path = os.path.join(output_dir, "portfolio_chart.png")
-
             # Plot Pie Chart
             fig = Figure(figsize=(6, 4))
             canvas = FigureCanvas(fig)
@@ -115,8 +138,7 @@ class StockService:
             ax.set_title('Tỷ trọng Danh mục (theo giá thị trường)')
             
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "portfolio_chart")
         except Exception as e:
             print(f"⚠️ Portfolio Chart Error: {e}")
             return None
@@ -124,18 +146,25 @@ class StockService:
     @staticmethod
     def fetch_stock_analysis():
         results = []
-        chart_paths = []
+        charts = []
         
         # 1. Watchlist Processing
         watchlist = WatchlistService.get_watchlist(Config.TELEGRAM_CHAT_ID, "stock")
         if not watchlist:
             watchlist = Config.STOCK_WATCHLIST
+        portfolio = getattr(Config, 'DEFAULT_PORTFOLIO', {})
+
+        # Download watchlist + portfolio symbols once, shared by both sections
+        histories = StockService.fetch_histories(list(watchlist) + list(portfolio.keys()))
         
+        # Indicators for the whole universe (streaming state, batch engine as fallback)
+        indicators = StockService._compute_indicators(histories)
+
         results.append("--- [WATCHLIST] ---")
         for symbol in watchlist:
             try:
-                target = symbol.replace("^", "").split(".")[0]
-                history = StockService._fetch_stock_history(target)
+                target = StockService._normalize_symbol(symbol)
+                history = histories.get(target)
                 if not history: continue
                 
                 node = history[0]
@@ -144,7 +173,8 @@ class StockService:
                 pct = node.get('PhanTramThayDoi') or node.get('Percent') or 0
                 vol = node.get('KhoiLuongKhopLenh') or node.get('Volume') or 0
                 
-                rsi, ma20, ma50, ma200, vol_avg = StockService.calculate_technical_indicators(history)
+                ind = indicators.get(target)
+                rsi, ma20, ma50, ma200, vol_avg = StockService._indicator_view(ind) if ind else (None,) * 5
                 
                 tech_str = ""
                 if rsi is not None and ma20 is not None:
@@ -157,12 +187,19 @@ class StockService:
                     ma_status = f"MA20({ma20:,.1f})"
                     tech_str = f" | {trend_icon} RSI:{rsi:.0f}({rsi_status}) | {ma_status} | Vol:{vol_check}"
 
+                    if not np.isnan(ind["macd_hist"]):
+                        tech_str += f" | MACD:{'↑' if ind['macd_hist'] > 0 else '↓'}({ind['macd_hist']:+.2f})"
+                    if not np.isnan(ind["bb_upper"]):
+                        bb_pos = "Trên dải BB" if price > ind["bb_upper"] else "Dưới dải BB" if price < ind["bb_lower"] else "Trong dải BB"
+                        tech_str += f" | {bb_pos}"
+                    if not np.isnan(ind["atr"]):
+                        tech_str += f" | ATR:{ind['atr']:.2f}"
+
                 results.append(f"Mã: {target} | Giá: {price} | +/-: {change} ({pct}%) | Vol: {vol:,.0f} {tech_str}")
             except Exception as e:
                 print(f"⚠️ Stock Error ({symbol}): {e}")
 
         # 2. Portfolio Processing (NEW)
-        portfolio = getattr(Config, 'DEFAULT_PORTFOLIO', {})
         if portfolio:
             results.append("\n--- [PORTFOLIO TRONG TAY] ---")
             portfolio_data_chart = [] # For chart
@@ -174,8 +211,8 @@ class StockService:
                     vol_hold = details.get('vol', 0)
                     cost_price = details.get('cost', 0)
                     
-                    # Fetch realtime price
-                    history = StockService._fetch_stock_history(symbol)
+                    # Realtime price (already fetched above)
+                    history = histories.get(StockService._normalize_symbol(symbol))
                     if not history: continue
                     current_price = history[0].get('GiaDongCua') or history[0].get('Price') or 0
                     
@@ -216,16 +253,15 @@ class StockService:
                 total_pct = (total_profit / total_cost) * 100
                 results.append(f"\n💰 TỔNG NAV: {total_market * 1000:,.0f} VND (P/L: {total_pct:.2f}%)")
             
-            # Generate Chart
-            p_chart = StockService._generate_portfolio_chart(portfolio_data_chart)
-            if p_chart: chart_paths.append(p_chart)
+            # Chart (rendered later by ChartRenderer)
+            charts.append(chart_spec("portfolio", portfolio_data_chart))
 
         # Return Text OR Dict if we have charts
         # If charts exist, we must return Dict to be parsed by Main
-        if chart_paths:
+        if charts:
              return {
                  "text": "\n".join(results),
-                 "chart_path": chart_paths # Main expects list or single? Main handles both.
+                 "charts": charts
              }
         
         return "\n".join(results) if results else "Không có dữ liệu watchlist."
@@ -1,14 +1,14 @@
-import requests
 import json
-import os
 from src.config import Config
+from src.services.http_client import HttpClient
+from src.services.report.chart_renderer import chart_spec, chart_artifact
 
 class WeatherService:
     @staticmethod
     def _fetch_from_worker(path, params=None):
         try:
             url = f"{Config.WORKER_HOST.rstrip('/')}{path}"
-            res = requests.get(url, params=params, timeout=20)
+            res = HttpClient.get(url, params=params, timeout=20, ttl=Config.HTTP_CACHE_TTL["worker"])
             res.raise_for_status()
             return res.json()
         except Exception as e:
@@ -27,13 +27,6 @@ class WeatherService:
             temps = [h.get('temp_c', 0) for h in hours]
             humidities = [h.get('humidity', 0) for h in hours]
             
-            # Create Output Dir
-            output_dir = "output"
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-            
-            chart_path = os.path.join(output_dir, "weather_chart.png")
-
             # Plotting Combo Chart OO
             fig = Figure(figsize=(12, 6))
             canvas = FigureCanvas(fig)
@@ -65,8 +58,7 @@ class WeatherService:
             ax1.set_title(f"Biểu đồ Nhiệt độ & Độ ẩm - {location_name} ({date_str})", fontsize=14, fontweight='bold', pad=20)
             
             fig.tight_layout()
-            canvas.print_png(chart_path)
-            return chart_path
+            return chart_artifact(canvas, "weather_chart")
         except Exception as e:
             print(f"⚠️ Chart Error: {e}")
             return None
@@ -98,10 +90,8 @@ class WeatherService:
         # 2. Raw JSON for AI
         raw_json_str = json.dumps(weather, ensure_ascii=False)
         
-        # 3. Generate Chart
-        chart_path = WeatherService._generate_weather_chart(weather)
-        
+        # 3. Chart (rendered later by ChartRenderer)
         return {
             "text": f"{summary}\n--- [RAW WEATHER DATA FOR AI] ---\n{raw_json_str}",
-            "chart_path": chart_path
+            "charts": [chart_spec("weather", weather)]
         }
@@ -0,0 +1,81 @@
+import sys
+import os
+import json
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent_output import parse_agent_output
+from src.orchestrator import CategoryAgent, Orchestrator
+
+
+def test_structured_answer_is_validated_in_one_pass():
+    answer = json.dumps({
+        "html": "<div class=\"card\">Họp lúc <b>10:30</b></div>",
+        "alerts": [
+            {"title": "Họp đối tác", "time": "9:30"},
+            {"title": "Giờ sai", "time": "25:00"},
+            {"title": "", "time": "08:00"},
+        ],
+        "key_numbers": [{"label": "VN-Index", "value": 1284.5, "unit": "điểm"}, {"label": "Thiếu giá trị"}],
+    }, ensure_ascii=False)
+
+    output = parse_agent_output(answer)
+
+    assert output["html"].startswith("<div class=\"card\">")
+    assert output["alerts"] == [{"title": "Nhắc nhở: Họp đối tác", "time": "9:30"}]
+    assert output["key_numbers"] == [{"label": "VN-Index", "value": "1284.5", "unit": "điểm"}]
+    assert parse_agent_output("<div>plain html</div>") is None
+    assert parse_agent_output('{"alerts": []}') is None  # No html
+
+
+def test_text_answers_fall_back_to_fence_stripping_and_remind_regex():
+    orchestrator = Orchestrator(telegram_bot=None)
+
+    section = orchestrator.finish_section("calendar", "```html\n<div>Gợi ý: /remind_hop_doi_tac_10h30</div>\n```")
+
+    assert section["content"] == "<div>Gợi ý: /remind_hop_doi_tac_10h30</div>"
+    assert [a["time"] for a in section["alerts"]] == ["10:30"]
+    assert section["key_numbers"] == []
+    assert orchestrator.alerts == section["alerts"]
+
+
+def test_malformed_structured_answer_never_reaches_the_report_as_json():
+    orchestrator = Orchestrator(telegram_bot=None)
+
+    cut_in_alerts = '{"html": "<div class=\\"card\\">Nắng</div>", "alerts": [{"title": "Họp", "ti'
+    cut_in_html = '```json\n{"html": "<div class=\\"card\\">Nắ'
+
+    assert orchestrator.finish_section("weather", cut_in_alerts)["content"] == "<div class=\"card\">Nắng</div>"
+    section = orchestrator.finish_section("news", cut_in_html)
+    assert section["content"] == "⚠️ news: Lỗi xử lý."
+    assert section["alerts"] == [] and orchestrator.alerts == []
+
+
+class _DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, content, meta=None):
+        self.entries[key] = content
+
+
+def test_malformed_structured_answer_is_not_cached():
+    agent = CategoryAgent("news", "key-a", "Prompt riêng cho news.")
+    agent.cache = _DictCache()
+    answers = iter(['{"html": "<div>Tin', json.dumps({"html": "<div>Tin</div>", "alerts": [], "key_numbers": []})])
+
+    async def hedged(prompt, model, est_tokens):
+        return next(answers)
+
+    agent._hedged = hedged
+
+    assert agent.structured
+    assert asyncio.run(agent.generate_impact("user", "data")) == '{"html": "<div>Tin'
+    assert agent.cache.entries == {}  # The next run asks the model again
+    valid = asyncio.run(agent.generate_impact("user", "data"))
+    assert list(agent.cache.entries.values()) == [valid]
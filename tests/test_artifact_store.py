@@ -0,0 +1,66 @@
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telegram.error import BadRequest
+
+from src.services.report.artifact_store import ArtifactStore
+
+
+class _FakeBot:
+    token = "123:abc"
+
+    def __init__(self, stale_file_ids=()):
+        self.sent = []
+        self.stale_file_ids = set(stale_file_ids)
+        self.handles = []
+
+    async def send_document(self, chat_id, document, **kwargs):
+        await asyncio.sleep(0.01)
+        if isinstance(document, str):
+            if document in self.stale_file_ids:
+                raise BadRequest("Wrong file identifier/http url specified")
+            self.sent.append((chat_id, document))
+            return SimpleNamespace(document=SimpleNamespace(file_id=document))
+        self.handles.append(document)
+        self.sent.append((chat_id, "upload"))
+        return SimpleNamespace(document=SimpleNamespace(file_id=f"file-{len(self.handles)}"))
+
+
+def test_one_upload_for_many_chats_and_file_id_survives_restart(tmp_path):
+    pdf_path = tmp_path / "Daily_Report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 report")
+    index = str(tmp_path / "files.json")
+    bot = _FakeBot()
+
+    async def run():
+        store = ArtifactStore(path=index)
+        await asyncio.gather(*(store.send_document(bot, chat, str(pdf_path), caption="x") for chat in (1, 2, 3)))
+
+    asyncio.run(run())
+
+    assert sorted(document for _, document in bot.sent) == ["file-1", "file-1", "upload"]
+    assert all(handle.closed for handle in bot.handles)
+
+    # Next run (new store from the JSON index): no upload at all
+    asyncio.run(ArtifactStore(path=index).send_document(bot, 4, str(pdf_path)))
+    assert bot.sent[-1] == (4, "file-1")
+    assert len(bot.handles) == 1
+
+
+def test_rejected_file_id_is_uploaded_again(tmp_path):
+    pdf_path = tmp_path / "Daily_Report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 report")
+    store = ArtifactStore(path="")
+    bot = _FakeBot(stale_file_ids={"file-old"})
+    store.entries[store._key(bot, store.digest(str(pdf_path)))] = {"file_id": "file-old", "stored_at": time.time()}
+
+    asyncio.run(store.send_document(bot, 1, str(pdf_path)))
+
+    assert bot.sent == [(1, "upload")]
+    assert store.file_id(store._key(bot, store.digest(str(pdf_path)))) == "file-1"
@@ -0,0 +1,53 @@
+import sys
+import os
+import json
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.compaction import PromptCompactor, WEATHER_RAW_MARKER
+
+
+def _finance_text(news_lines):
+    news = "\n".join(f"- [Tin số {i} về kinh tế vĩ mô](https://example.com/{i})" for i in range(news_lines))
+    return (
+        "--- [MARKET OVERVIEW] ---\nVNINDEX: 1,250 (+0.5%)\n"
+        "--- [STOCK WATCHLIST] ---\n--- [WATCHLIST] ---\nFPT: 120 | RSI 55\nHPG: 28 | RSI 48\n"
+        "--- [BANKING] ---\nVCB: 6M(4.5%) - 12M(5.0%)\n"
+        f"--- [MACRO & POLITICS] ---\n{news}\n"
+    )
+
+
+def test_finance_drops_low_priority_news_first():
+    compactor = PromptCompactor(budgets={"finance": 150})
+    out = compactor.compact({"finance": _finance_text(60)})["finance"]
+
+    assert compactor.count_tokens(out) <= 150
+    # High-priority sections (including the nested WATCHLIST block) are untouched
+    assert "VNINDEX: 1,250" in out and "HPG: 28 | RSI 48" in out and "VCB: 6M" in out
+    assert "rút gọn" in out.split("--- [MACRO & POLITICS] ---")[1]
+    assert "https://" not in out
+
+
+def test_weather_json_becomes_compact_table():
+    hours = [{"time": f"2026-10-18 {h:02d}:00", "temp_c": 25 + h % 5, "feelslike_c": 27, "humidity": 80,
+              "chance_of_rain": 10, "precip_mm": 0.0, "wind_kph": 9.0, "uv": 3, "condition": {"text": "Nắng", "icon": "x", "code": 1000},
+              "dewpoint_c": 20, "heatindex_c": 28, "windchill_c": 25, "gust_kph": 15, "vis_km": 10, "pressure_mb": 1010}
+             for h in range(24)]
+    weather = {
+        "location": {"name": "Hanoi", "lat": 21.0, "lon": 105.8, "tz_id": "Asia/Bangkok"},
+        "current": {"temp_c": 27, "feelslike_c": 29, "humidity": 75, "wind_kph": 10, "wind_dir": "SE", "uv": 5,
+                    "precip_mm": 0, "condition": {"text": "Nắng"}, "air_quality": {"us-epa-index": 2, "pm2_5": 30.1, "co": 400}},
+        "forecast": {"forecastday": [{"date": "2026-10-18", "hour": hours, "astro": {"sunrise": "05:55 AM", "sunset": "05:30 PM"},
+                                      "day": {"maxtemp_c": 30, "mintemp_c": 24, "daily_chance_of_rain": 20, "totalprecip_mm": 0.1,
+                                              "uv": 6, "condition": {"text": "Nắng"}}}]},
+    }
+    text = f"📍 Hanoi: Nắng, 27°C\n{WEATHER_RAW_MARKER}\n{json.dumps(weather, ensure_ascii=False)}"
+
+    out = PromptCompactor(budgets={"weather": 10_000}).compact({"weather": text})["weather"]
+
+    assert len(out) < len(text) / 2
+    assert "📍 Hanoi" in out
+    assert "07:00|Nắng|27|27|80|10|0.0|9.0|3" in out
+    assert '"aqi_us_epa": 2' in out and "05:30 PM" in out
+    assert "dewpoint_c" not in out
@@ -0,0 +1,58 @@
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import Config
+from src.fake_genai import FakeGenAIClient
+from src.orchestrator import CategoryAgent, Orchestrator
+
+BASE_PROMPT = "QUY TẮC CHUNG: trả về HTML. " * 200  # ~1.9k tokens, above the fake's 1024 minimum
+
+
+def _run_agents(fake, names, api_key="key-a"):
+    llm_cache_enabled, Config.LLM_CACHE_ENABLED = Config.LLM_CACHE_ENABLED, False
+    latency_file, Config.GEMINI_LATENCY_FILE = Config.GEMINI_LATENCY_FILE, ""
+    CategoryAgent._clients[api_key] = fake
+    try:
+        orchestrator = Orchestrator(telegram_bot=None)
+        for name in names:
+            orchestrator.add_agent(CategoryAgent(name, api_key, f"Prompt riêng cho {name}.", shared_prefix=BASE_PROMPT))
+
+        async def main():
+            results = await orchestrator.run_all("user", {name: f"data {name}" for name in names})
+            await orchestrator.aclose()
+            return results
+
+        return asyncio.run(main())
+    finally:
+        CategoryAgent._clients.pop(api_key, None)
+        Config.LLM_CACHE_ENABLED = llm_cache_enabled
+        Config.GEMINI_LATENCY_FILE = latency_file
+
+
+def test_shared_prefix_is_cached_once_per_key():
+    fake = FakeGenAIClient()
+    results = _run_agents(fake, ["news", "tech", "weather"])
+
+    assert len(results) == 3
+    assert len(fake.caches_created) == 1
+    assert len(fake.calls) == 3
+    for call in fake.calls:
+        assert call["config"]["cached_content"] == fake.caches_created[0]
+        assert BASE_PROMPT not in call["prompt"]
+        assert call["prompt"].startswith("Prompt riêng cho")
+    assert fake.caches_store == {}  # Deleted by Orchestrator.aclose()
+
+
+def test_falls_back_to_full_prompt_without_caching():
+    for fake in (FakeGenAIClient(supports_caching=False), FakeGenAIClient(min_cache_tokens=10_000)):
+        _run_agents(fake, ["news", "tech"])
+
+        assert fake.caches_created == []
+        assert len(fake.calls) == 2
+        for call in fake.calls:
+            assert "cached_content" not in call["config"]
+            assert call["prompt"].startswith(BASE_PROMPT)
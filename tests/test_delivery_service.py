@@ -0,0 +1,84 @@
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from telegram.error import BadRequest, Forbidden, RetryAfter
+
+from src.services.delivery_service import DeliveryService, RateLimiter
+from src.services.report.artifact_store import ArtifactStore
+
+
+class _FakeBot:
+    token = "123:abc"
+
+    def __init__(self):
+        self.sent = []  # (monotonic time, chat_id, what)
+        self.flooded = {"2"}  # First send to chat 2 hits flood control
+        self.blocked = {"3"}
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if chat_id in self.blocked:
+            raise Forbidden("Forbidden: bot was blocked by the user")
+        if chat_id in self.flooded:
+            self.flooded.discard(chat_id)
+            raise RetryAfter(1)
+        if parse_mode and "*broken" in text:
+            raise BadRequest("Can't parse entities: can't find end of the entity")
+        self.sent.append((time.monotonic(), chat_id, text))
+        return SimpleNamespace()
+
+    async def send_document(self, chat_id, document, **kwargs):
+        what = document if isinstance(document, str) else "upload"
+        self.sent.append((time.monotonic(), chat_id, what))
+        return SimpleNamespace(document=SimpleNamespace(file_id="file-1"))
+
+
+class _FakeTable:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def insert(self, rows):
+        self.rows.extend(rows)
+        return self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+def test_fan_out_respects_limits_retries_and_records_status(tmp_path):
+    pdf_path = tmp_path / "Daily_Report.pdf"
+    pdf_path.write_bytes(b"%PDF-1.7 report")
+    bot = _FakeBot()
+    saved = []
+    supabase = SimpleNamespace(table=lambda name: _FakeTable(saved))
+    limiter = RateLimiter(global_rate=50, chat_interval=0.2, group_interval=0.5)
+    service = DeliveryService(bot, supabase=supabase, artifacts=ArtifactStore(path=""), limiter=limiter, workers=4)
+    recipients = [{"profile_id": f"p{i}", "chat_id": str(i)} for i in range(1, 5)]
+    messages = [
+        {"kind": "header", "text": "*Header*", "parse_mode": "Markdown"},
+        {"kind": "report", "document": str(pdf_path), "caption": "PDF", "parse_mode": "HTML"},
+        {"kind": "holidays", "text": "*broken markdown", "parse_mode": "Markdown"},
+    ]
+
+    statuses = asyncio.run(service.deliver(messages, recipients, run_id="run-1"))
+
+    by_chat = {s["chat_id"]: s for s in statuses}
+    assert {chat: s["status"] for chat, s in by_chat.items()} == {"1": "sent", "2": "sent", "3": "blocked", "4": "sent"}
+    assert by_chat["2"]["attempts"] == 5  # flood control, 3 messages, plain-text retry of the broken one
+    # One upload, the other chats reuse the file_id
+    assert [what for _, _, what in bot.sent].count("upload") == 1
+    # Per-chat order is kept and messages to one chat are spaced by the chat interval
+    for chat in ("1", "2", "4"):
+        times = [t for t, c, _ in bot.sent if c == chat]
+        texts = [w for _, c, w in bot.sent if c == chat]
+        assert texts[0] == "*Header*" and texts[-1] == "*broken markdown"
+        assert all(b - a >= 0.19 for a, b in zip(times, times[1:]))
+    chat2 = [t for t, c, _ in bot.sent if c == "2"]
+    assert chat2[0] - min(t for t, _, _ in bot.sent) >= 0.9  # Waited for RetryAfter(1)
+    assert sorted((row["chat_id"], row["status"], row["run_id"]) for row in saved) == [
+        ("1", "sent", "run-1"), ("2", "sent", "run-1"), ("3", "blocked", "run-1"), ("4", "sent", "run-1")]
@@ -0,0 +1,110 @@
+import sys
+import os
+import asyncio
+import json
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import httpx
+import pytest
+
+from src.config import Config
+from src.services.http_cache import ResponseCache
+from src.services.http_client import HttpClient
+
+URL = "https://api.example.test/rates"
+
+
+class _Origin:
+    """MockTransport handler: 304 when the request carries the current ETag, else 200 with the body."""
+
+    def __init__(self, etag='"v1"', last_modified=None):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.etag and request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304)
+        headers = {}
+        if self.etag:
+            headers["ETag"] = self.etag
+        if self.last_modified:
+            headers["Last-Modified"] = self.last_modified
+        return httpx.Response(200, json={"rate": len(self.requests)}, headers=headers)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    saved = ResponseCache._default, Config.HTTP_CACHE_ENABLED, dict(HttpClient._sync_clients)
+    ResponseCache._default = ResponseCache(str(tmp_path))
+    Config.HTTP_CACHE_ENABLED = True
+    yield ResponseCache._default
+    mock = HttpClient._sync_clients.pop(True, None)
+    if mock is not None:
+        mock.close()
+    ResponseCache._default, Config.HTTP_CACHE_ENABLED = saved[0], saved[1]
+    HttpClient._sync_clients.update(saved[2])
+
+
+def _use_origin(origin):
+    HttpClient._sync_clients[True] = httpx.Client(transport=httpx.MockTransport(origin))
+
+
+def _expire(cache):
+    entry = cache.load(URL)
+    entry["stored_at"] -= 3600
+    meta = {k: v for k, v in entry.items() if k != "body"}
+    cache._write_atomic(cache._paths(cache.key(URL))[0], json.dumps(meta).encode("utf-8"))
+
+
+def test_fresh_entry_is_served_and_stale_one_revalidates_with_etag(cache):
+    origin = _Origin()
+    _use_origin(origin)
+
+    assert HttpClient.get(URL, ttl=600).json() == {"rate": 1}
+    assert HttpClient.get(URL, ttl=600).json() == {"rate": 1}
+    assert len(origin.requests) == 1  # Fresh: no network
+
+    _expire(cache)
+    res = HttpClient.get(URL, ttl=600)
+
+    assert len(origin.requests) == 2
+    assert origin.requests[-1].headers["if-none-match"] == '"v1"'
+    assert res.status_code == 200 and res.json() == {"rate": 1}  # 304 -> cached body
+    assert ResponseCache.is_fresh(cache.load(URL), 600)  # Revalidated entry is fresh again
+
+
+def test_no_validator_from_origin_means_plain_refetch(cache):
+    origin = _Origin(etag=None)
+    _use_origin(origin)
+    HttpClient.get(URL, ttl=600)
+    _expire(cache)
+
+    assert HttpClient.get(URL, ttl=600).json() == {"rate": 2}
+    assert "if-modified-since" not in origin.requests[-1].headers
+    assert "if-none-match" not in origin.requests[-1].headers
+
+
+def test_async_get_revalidates_with_last_modified(cache):
+    origin = _Origin(etag=None, last_modified="Sun, 18 Oct 2026 00:00:00 GMT")
+
+    async def run():
+        HttpClient._async_clients[asyncio.get_running_loop()] = {True: httpx.AsyncClient(transport=httpx.MockTransport(origin))}
+        try:
+            first = await HttpClient.aget(URL, ttl=600)
+            fresh = await HttpClient.aget(URL, ttl=600)
+            _expire(cache)
+            stale = await HttpClient.aget(URL, ttl=600)
+            return first, fresh, stale
+        finally:
+            await HttpClient.aclose()
+
+    first, fresh, stale = asyncio.run(run())
+
+    assert first.json() == fresh.json() == {"rate": 1}
+    assert stale.json() == {"rate": 2}
+    assert len(origin.requests) == 2
+    assert origin.requests[-1].headers["if-modified-since"] == "Sun, 18 Oct 2026 00:00:00 GMT"
@@ -0,0 +1,45 @@
+import sys
+import os
+import io
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from PIL import Image
+
+from src.config import Config
+from src.services.report.image_optimizer import ImageOptimizer
+
+
+def _png_artifact(name, width=1200, height=600):
+    img = Image.new("RGBA", (width, height), (255, 255, 255, 255))
+    for x in range(width):
+        img.putpixel((x, height // 2 + (x % 50)), (31, 119, 180, 255))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return {"name": name, "format": "png", "mime": "image/png", "data": buf.getvalue(), "width": width, "height": height}
+
+
+def test_chart_is_resampled_to_print_size_and_duplicates_are_shared():
+    original = _png_artifact("vnindex")
+
+    optimized = ImageOptimizer.optimize(original)
+
+    assert optimized["width"] == ImageOptimizer.max_width_px() < original["width"]
+    assert optimized["format"] == "png"  # Line charts never become JPEG
+    assert Image.open(io.BytesIO(optimized["data"])).mode == "P"
+    assert len(optimized["data"]) <= optimized["original_size"] == len(original["data"])
+    assert ImageOptimizer.optimize({"name": "x", "format": "svg", "data": b"<svg/>"})["data"] == b"<svg/>"
+
+    chart_map, duplicates = ImageOptimizer.dedupe({"finance": [optimized, dict(optimized)], "trends": [dict(optimized)]})
+
+    assert duplicates == 2
+    assert len(chart_map["finance"]) == 1
+    assert chart_map["trends"][0] is chart_map["finance"][0]
+
+
+def test_small_chart_is_not_upscaled():
+    small = _png_artifact("stock", width=300, height=200)
+    assert 300 < Config.CHART_PRINT_WIDTH_IN * Config.CHART_TARGET_DPI
+
+    assert ImageOptimizer.optimize(small)["width"] == 300
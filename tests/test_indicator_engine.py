@@ -0,0 +1,72 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.services.stock.indicator_engine import IndicatorEngine
+
+
+def _make_history(n, seed):
+    """CafeF-style rows, newest first."""
+    rng = np.random.default_rng(seed)
+    close = 20 + np.cumsum(rng.normal(0, 0.5, n))
+    rows = []
+    for i in range(n):
+        rows.append({
+            "GiaDongCua": round(close[i], 2),
+            "GiaCaoNhat": round(close[i] + 0.4, 2),
+            "GiaThapNhat": round(close[i] - 0.4, 2),
+            "KhoiLuongKhopLenh": float(rng.integers(1_000, 50_000)),
+        })
+    return rows[::-1]
+
+
+def _wilder(series, period):
+    # Reference: SMA seed, then Wilder recursion
+    out = pd.Series(np.nan, index=series.index)
+    first = series.first_valid_index()
+    seed_at = first + period - 1
+    out[seed_at] = series[first:seed_at + 1].mean()
+    for t in range(seed_at + 1, len(series)):
+        out[t] = out[t - 1] + (series[t] - out[t - 1]) / period
+    return out
+
+
+def test_engine_matches_pandas_reference():
+    histories = {"AAA": _make_history(260, 1), "BBB": _make_history(120, 2)}
+    result = IndicatorEngine.compute(histories)
+
+    for symbol, rows in histories.items():
+        df = pd.DataFrame({
+            "close": [r["GiaDongCua"] for r in rows[::-1]],
+            "volume": [r["KhoiLuongKhopLenh"] for r in rows[::-1]],
+        })
+        ind = result[symbol]
+
+        assert np.isclose(ind["ma20"], df["close"].rolling(20).mean().iloc[-1])
+        assert np.isclose(ind["ma50"], df["close"].rolling(50).mean().iloc[-1])
+        assert np.isclose(ind["vol20"], df["volume"].rolling(20).mean().iloc[-1])
+        if len(rows) >= 200:
+            assert np.isclose(ind["ma200"], df["close"].rolling(200).mean().iloc[-1])
+        else:
+            assert np.isnan(ind["ma200"])
+
+        delta = df["close"].diff()
+        gain = _wilder(delta.clip(lower=0), 14)
+        loss = _wilder((-delta).clip(lower=0), 14)
+        assert np.isclose(ind["rsi"], (100 - 100 / (1 + gain / loss)).iloc[-1])
+
+        std = df["close"].rolling(20).std(ddof=0).iloc[-1]
+        assert np.isclose(ind["bb_upper"], ind["bb_middle"] + 2 * std)
+        assert ind["atr"] > 0
+        assert np.isclose(ind["macd_hist"], ind["macd"] - ind["macd_signal"])
+
+
+def test_short_history_is_nan_not_error():
+    result = IndicatorEngine.compute({"NEW": _make_history(10, 3)})
+    assert np.isnan(result["NEW"]["ma20"])
+    assert np.isnan(result["NEW"]["rsi"])
@@ -0,0 +1,81 @@
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from google.genai import errors
+
+from src.key_scheduler import KeyBudget, KeyScheduler, retry_after_seconds
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rpm_bucket_and_retry_hint_gate_requests():
+    clock = _Clock()
+    budget = KeyBudget(rpm=2, tpm=100_000, max_concurrency=4, clock=clock)
+
+    for _ in range(2):
+        assert budget.delay(100) == 0
+        budget.take(100)
+        budget.release(100)
+    # Bucket empty: the next request refills at 2/min -> 30s
+    assert abs(budget.delay(100) - 30.0) < 1e-6
+
+    clock.now += 30
+    assert budget.delay(100) == 0
+    budget.on_rate_limited(retry_after=45)
+    assert abs(budget.delay(100) - 45.0) < 1e-6
+
+
+def test_aimd_concurrency():
+    budget = KeyBudget(rpm=1000, tpm=10_000_000, max_concurrency=4, initial_concurrency=4, clock=_Clock())
+    budget.on_rate_limited(retry_after=0)
+    assert budget.limit == 2
+    budget.on_rate_limited(retry_after=0)
+    budget.on_rate_limited(retry_after=0)
+    assert budget.limit == 1
+
+    for _ in range(20):
+        budget.on_success()
+    assert budget.limit == 4
+
+    for _ in range(4):
+        budget.take(10)
+    assert budget.delay(10) == float("inf")  # Every slot in use
+
+
+def test_shared_key_is_bounded_and_own_keys_are_independent():
+    scheduler = KeyScheduler(rpm=1000, tpm=10_000_000, max_concurrency=2)
+    active = {"shared": 0, "own": 0}
+    peak = {"shared": 0, "own": 0}
+
+    async def call(key):
+        async with scheduler.slot(key, 10):
+            group = "shared" if key == "shared" else "own"
+            active[group] += 1
+            peak[group] = max(peak[group], active[group])
+            await asyncio.sleep(0.01)
+            active[group] -= 1
+
+    async def main():
+        await asyncio.gather(*[call("shared") for _ in range(6)], *[call(f"own{i}") for i in range(4)])
+
+    asyncio.run(main())
+    assert peak["shared"] == 2
+    assert peak["own"] == 4
+
+
+def test_retry_after_from_error_details():
+    error = errors.ClientError(429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED", "details": [
+        {"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": "37s"}
+    ]}})
+    assert retry_after_seconds(error) == 37.0
+    assert retry_after_seconds(errors.ClientError(429, {"error": {"code": 429}})) is None
@@ -0,0 +1,54 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_cache import FileCacheBackend, LLMCache
+
+ARGS = ("gemini-2.5-flash", {"temperature": 0, "top_p": 1}, "Bạn là chuyên gia tài chính.", "TODAY: 18/10/2026", "VN-Index 1.284")
+
+
+def test_key_is_stable_and_covers_every_input():
+    key = LLMCache.key(*ARGS)
+
+    assert key == LLMCache.key(*ARGS)
+    assert key == LLMCache.key(ARGS[0], {"top_p": 1, "temperature": 0}, *ARGS[2:])  # Config order does not matter
+    for i, changed in enumerate(["gemini-2.5-flash-lite", {"temperature": 0.2, "top_p": 1}, "Bạn là nhà báo.", "TODAY: 19/10/2026", "VN-Index 1.285"]):
+        assert LLMCache.key(*ARGS[:i], changed, *ARGS[i + 1:]) != key
+
+
+def test_file_backend_expires_entries(tmp_path):
+    backend = FileCacheBackend(str(tmp_path), max_bytes=1024 * 1024)
+    backend.set("fresh", "<div>ok</div>", ttl=60)
+    backend.set("old", "<div>stale</div>", ttl=-1)
+
+    assert backend.get("fresh") == "<div>ok</div>"
+    assert backend.get("old") is None
+    assert not (tmp_path / "old.json").exists()  # Expired entries are removed on read
+
+
+def test_file_backend_evicts_least_recently_used(tmp_path):
+    backend = FileCacheBackend(str(tmp_path), max_bytes=10 ** 9)
+    now = time.time()
+    for age, key in [(300, "a"), (200, "b"), (100, "c")]:
+        backend.set(key, "x" * 100, ttl=3600)
+        os.utime(tmp_path / f"{key}.json", (now - age, now - age))
+    backend.get("a")  # Read refreshes the mtime: "a" is now the most recently used
+
+    # Entry sizes differ slightly (expires_at repr): budget exactly the two that should survive
+    backend.max_bytes = os.path.getsize(tmp_path / "a.json") + os.path.getsize(tmp_path / "c.json")
+    backend.evict()
+
+    assert sorted(p.stem for p in tmp_path.glob("*.json")) == ["a", "c"]
+
+
+def test_hit_in_a_later_backend_is_copied_to_earlier_ones(tmp_path):
+    local, shared = FileCacheBackend(str(tmp_path / "local"), 10 ** 6), FileCacheBackend(str(tmp_path / "shared"), 10 ** 6)
+    cache = LLMCache([local, shared], ttl=60)
+    key = LLMCache.key(*ARGS)
+    shared.set(key, "<div>answer</div>", ttl=60)
+
+    assert cache.get(key) == "<div>answer</div>"
+    assert local.get(key) == "<div>answer</div>"
@@ -0,0 +1,72 @@
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import Config
+from src.fake_genai import FakeGenAIClient
+from src.key_scheduler import KeyScheduler
+from src.model_router import LatencyStats, ModelRouter
+from src.orchestrator import CategoryAgent
+
+TIERS = {"trends": ["lite", "flash"], "finance": ["flash", "lite"]}
+
+
+def _agent(name, fake, router):
+    CategoryAgent._clients["key-router"] = fake
+    agent = CategoryAgent(name, "key-router", "Prompt.")
+    agent.scheduler = KeyScheduler(rpm=1000, tpm=10_000_000, max_concurrency=4)
+    agent.router = router
+    CategoryAgent._clients.pop("key-router", None)
+    return agent
+
+
+def test_tiers_and_fallback_when_quota_runs_out():
+    fake = FakeGenAIClient(rate_limited_models={"flash"})
+    router = ModelRouter(tiers=TIERS, stats=LatencyStats(path=""))
+
+    trends = asyncio.run(_agent("trends", fake, router).safe_generate("data"))
+    assert "fake lite" in trends
+    assert [c["model"] for c in fake.calls] == ["lite"]
+
+    finance = asyncio.run(_agent("finance", fake, router).safe_generate("data"))
+    assert "fake lite" in finance
+    assert [c["model"] for c in fake.calls[1:]] == ["flash", "lite"]
+    # flash is cooling down for this key: the next request goes straight to the fallback
+    assert router.pick("finance", "key-router") == ("lite", 0.0)
+
+
+def test_hedged_request_after_p95():
+    hedge_enabled, Config.GEMINI_HEDGE_ENABLED = Config.GEMINI_HEDGE_ENABLED, True
+    min_delay, Config.GEMINI_HEDGE_MIN_DELAY = Config.GEMINI_HEDGE_MIN_DELAY, 0.0
+    try:
+        stats = LatencyStats(path="")
+        for _ in range(20):
+            stats.record("finance", "flash", 0.05)
+        router = ModelRouter(tiers=TIERS, stats=stats)
+        agent = _agent("finance", FakeGenAIClient(), router)
+
+        calls = []
+
+        async def request(prompt, model):
+            calls.append(model)
+            # First request hangs (tail latency), the hedge answers quickly
+            await asyncio.sleep(5 if len(calls) == 1 else 0.01)
+            return f"answer {len(calls)}", None
+
+        agent._request = request
+
+        async def main():
+            started = asyncio.get_running_loop().time()
+            text = await agent.safe_generate("data")
+            return text, asyncio.get_running_loop().time() - started
+
+        text, elapsed = asyncio.run(main())
+        assert text == "answer 2"
+        assert calls == ["flash", "flash"]
+        assert elapsed < 1
+    finally:
+        Config.GEMINI_HEDGE_ENABLED = hedge_enabled
+        Config.GEMINI_HEDGE_MIN_DELAY = min_delay
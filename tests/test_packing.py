@@ -0,0 +1,56 @@
+import sys
+import os
+import asyncio
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import Config
+from src.fake_genai import FakeGenAIClient
+from src.orchestrator import CategoryAgent, Orchestrator
+
+
+def _orchestrator(fake, keys):
+    llm_cache_enabled, Config.LLM_CACHE_ENABLED = Config.LLM_CACHE_ENABLED, False
+    latency_file, Config.GEMINI_LATENCY_FILE = Config.GEMINI_LATENCY_FILE, ""
+    try:
+        orchestrator = Orchestrator(telegram_bot=None)
+    finally:
+        Config.LLM_CACHE_ENABLED = llm_cache_enabled
+        Config.GEMINI_LATENCY_FILE = latency_file
+    orchestrator.pack_categories = ["tech", "trends", "calendar"]
+    for name, key in keys.items():
+        CategoryAgent._clients[key] = fake
+        orchestrator.add_agent(CategoryAgent(name, key, f"Prompt riêng cho {name}."))
+    return orchestrator
+
+
+def _run(orchestrator):
+    data = {agent.name: f"data {agent.name}" for agent in orchestrator.agents}
+    try:
+        return asyncio.run(orchestrator.run_all("user", data))
+    finally:
+        CategoryAgent._clients.clear()
+
+
+def test_small_categories_sharing_a_key_are_packed():
+    fake = FakeGenAIClient()
+    orchestrator = _orchestrator(fake, {"finance": "k1", "tech": "k1", "trends": "k1", "calendar": "k2"})
+
+    assert [[a.name for a in group] for group in orchestrator.groups()] == [["finance"], ["tech", "trends"], ["calendar"]]
+
+    results = _run(orchestrator)
+    assert [r["category"] for r in results] == ["finance", "tech", "trends", "calendar"]
+    assert "[fake gemini-2.5-flash: trends]" in results[2]["content"]
+    assert len(fake.calls) == 3  # finance, tech+trends, calendar
+    schemas = [c["config"]["response_schema"]["required"] for c in fake.calls]
+    assert ["tech", "trends"] in schemas
+
+
+def test_malformed_packed_answer_falls_back_to_one_request_per_category():
+    fake = FakeGenAIClient(responder=lambda prompt: '{"tech": "<p>only tech</p>"}' if "MỤC:" in prompt else "<p>ok</p>")
+    orchestrator = _orchestrator(fake, {"tech": "k1", "trends": "k1"})
+
+    results = _run(orchestrator)
+    assert [r["content"] for r in results] == ["<p>ok</p>", "<p>ok</p>"]
+    assert len(fake.calls) == 3  # packed attempt + one retry per category
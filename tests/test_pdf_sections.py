@@ -0,0 +1,64 @@
+import sys
+import os
+import io
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+
+from src.services.report.pdf_service import PDFService
+
+
+class _FakeWorker:
+    """Stands in for PDFRenderWorker: one blank page per document, fails documents with broken markup."""
+
+    def __init__(self, broken="<broken>"):
+        self.documents = []
+        self.broken = broken
+
+    @staticmethod
+    def _page():
+        writer = pypdf.PdfWriter()
+        writer.add_blank_page(595, 842)
+        buf = io.BytesIO()
+        writer.write(buf)
+        return buf.getvalue()
+
+    def render_documents(self, documents, timeout=None):
+        self.documents.extend(documents)
+        return [None if self.broken in doc else self._page() for doc in documents]
+
+
+def test_sections_render_separately_and_a_broken_one_falls_back(tmp_path):
+    results = [
+        {"category": "weather", "content": "<div class=\"card\">Nắng</div>"},
+        {"category": "finance", "content": "<div class=\"card\"><broken>VN-Index <b>1.284</b> &amp; vàng</div>"},
+        {"category": "news", "content": "<div class=\"card\">Tin</div>"},
+    ]
+    worker = _FakeWorker()
+    pdf_path = str(tmp_path / "report.pdf")
+
+    assert PDFService._render_sections(results, {}, pdf_path, worker) == pdf_path
+
+    assert len(pypdf.PdfReader(pdf_path).pages) == 4  # cover + 3 sections
+    # cover + 3 sections, then one plain-text retry for finance only
+    assert len(worker.documents) == 5
+    fallback = worker.documents[-1]
+    assert "FINANCE" in fallback and "VN-Index 1.284 &amp; vàng" in fallback
+    assert "<broken>" not in fallback
+
+
+def test_section_lost_after_fallback_aborts_the_merge(tmp_path):
+    results = [
+        {"category": "weather", "content": "<div class=\"card\">Nắng</div>"},
+        {"category": "finance", "content": "<div class=\"card\">VN-Index</div>"},
+    ]
+    worker = _FakeWorker(broken="VN-Index")  # Plain-text retry of finance fails as well
+    pdf_path = tmp_path / "report.pdf"
+
+    assert PDFService._render_sections(results, {}, str(pdf_path), worker) is None
+    assert len(worker.documents) == 4  # cover + 2 sections + finance retry
+    assert not pdf_path.exists()
@@ -0,0 +1,66 @@
+import sys
+import os
+import asyncio
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from src.pipeline import Pipeline
+
+
+def test_nodes_start_when_their_inputs_are_ready():
+    pipeline = Pipeline(max_workers=4)
+
+    async def fast_source():
+        await asyncio.sleep(0.01)
+        return "weather"
+
+    def slow_source():
+        time.sleep(0.3)
+        return "stock"
+
+    async def agent(text):
+        await asyncio.sleep(0.05)
+        return f"report:{text}"
+
+    pipeline.add("weather", fast_source)
+    pipeline.add("stock", slow_source)
+    pipeline.add("agent:weather", agent, deps=["weather"])
+    pipeline.add("agent:finance", agent, deps=["stock"])
+    pipeline.add("report", lambda *sections: list(sections), deps=["agent:weather", "agent:finance"])
+
+    out = asyncio.run(pipeline.run())
+
+    assert out["report"] == ["report:weather", "report:stock"]
+    # The weather agent finished while the stock source was still fetching
+    assert pipeline.status["agent:weather"]["end"] < pipeline.status["stock"]["end"]
+    assert pipeline.critical_path() == ["stock", "agent:finance", "report"]
+
+
+def test_failed_or_late_nodes_use_their_default():
+    pipeline = Pipeline()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    async def hangs():
+        await asyncio.sleep(10)
+
+    pipeline.add("broken", broken, default="fallback")
+    pipeline.add("late", hangs, default="late-default", timeout=0.05)
+    pipeline.add("joined", lambda a, b: f"{a}+{b}", deps=["broken", "late"])
+
+    out = asyncio.run(pipeline.run())
+
+    assert out["joined"] == "fallback+late-default"
+    assert pipeline.status["broken"]["status"] == "error"
+    assert pipeline.status["late"]["status"] == "timeout"
+
+
+def test_dependencies_must_be_registered_first():
+    pipeline = Pipeline()
+    with pytest.raises(ValueError):
+        pipeline.add("agent", lambda x: x, deps=["missing"])